@@ -0,0 +1,232 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from imagine.client import Imagine
+from imagine.models.image import Image
+from imagine.models.response import Response
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.remote.http2.http_client import Http2Client
+from tests.support.stubs import Http1StubServer, Http2StubServer
+from imagine.utils.file.cache import ImageFileCache
+
+# An operation takes the shared client, a unique marker and an image source,
+# and returns the response with the endpoint it must have been sent to
+Operation = Callable[[Imagine, str, Any], Tuple[Response[Image], str]]
+
+OPERATIONS: Dict[str, Operation] = {
+    "generations": lambda imagine, marker, image: (
+        imagine.generations(marker),
+        "/generations",
+    ),
+    "image_remix": lambda imagine, marker, image: (
+        imagine.image_remix(image, marker),
+        "/edits/remix",
+    ),
+    "super_resolution": lambda imagine, marker, image: (
+        imagine.super_resolution(image),
+        "/upscale/",
+    ),
+    "variations": lambda imagine, marker, image: (
+        imagine.variations(image, marker),
+        "/generations/variations",
+    ),
+    "in_painting": lambda imagine, marker, image: (
+        imagine.in_painting(image, image, marker),
+        "/edits/inpaint",
+    ),
+}
+
+
+class StressReport:
+    """
+    The outcome of a stress run. ``failures`` describes every response that
+    was an error or did not belong to its request.
+    """
+
+    __slots__ = (
+        "transport",
+        "threads",
+        "requests",
+        "failures",
+        "seconds",
+        "connections",
+    )
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The report as a JSON compatible dictionary.
+        :rtype: Dict[str, Any]
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _check(
+    operation: str,
+    response: Response[Image],
+    endpoint: str,
+    markers: List[str],
+) -> Optional[str]:
+    """
+    Describe why an echoed response does not belong to its request, if it
+    does not.
+    """
+    if response.status.value != 200 or response.data is None:
+        return f"{operation}: status {response.status.value}"
+
+    path, _, body = bytes(response.data.bytes).partition(b"\n")
+    if not path.decode("utf-8").endswith(endpoint):
+        return f"{operation}: sent to {path!r} instead of {endpoint}"
+    for marker in markers:
+        if marker.encode("utf-8") not in body:
+            return f"{operation}: response lacks {marker}"
+    return None
+
+
+def run_stress(
+    *,
+    threads: int = 32,
+    iterations: int = 20,
+    http2: bool = False,
+    latency: float = 0.005,
+    files: int = 8,
+) -> StressReport:
+    """
+    Hammer one shared :class:`Imagine` instance with all five operations from
+    many threads at once and check every response against its request.
+
+    The client talks to a local stub server echoing every request. Each
+    request carries unique markers in its prompt and image, and its response
+    must echo the right endpoint and these markers; a response crossing over
+    from another thread's request is reported as a failure. Half of the
+    images are files read through one shared :class:`ImageFileCache`.
+
+    :param threads: The number of threads (default: 32).
+    :type threads: int
+    :param iterations: The number of requests per thread (default: 20).
+    :type iterations: int
+    :param http2: Whether to use :class:`Http2Client` against an HTTP/2 stub
+        instead of :class:`RequestClient` (default: False).
+    :type http2: bool
+    :param latency: The server time per request in seconds (default: 0.005).
+    :type latency: float
+    :param files: The number of image files shared by the threads
+        (default: 8).
+    :type files: int
+    :return: The report of the run.
+    :rtype: :class:`StressReport`
+    """
+    server = (
+        Http2StubServer(latency=latency, echo=True)
+        if http2
+        else Http1StubServer(latency=latency, echo=True)
+    )
+    names = list(OPERATIONS)
+    failures: List[str] = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    with tempfile.TemporaryDirectory() as directory, server:
+        images: List[Tuple[str, str]] = []
+        for index in range(max(1, files)):
+            marker = f"file-{uuid.uuid4().hex}"
+            path = os.path.join(directory, f"{index}.png")
+            with open(path, "wb") as file:
+                file.write(marker.encode("utf-8"))
+            images.append((path, marker))
+
+        client = (
+            Http2Client(base_url=server.base_url, prior_knowledge=True)
+            if http2
+            else RequestClient(base_url=server.base_url)
+        )
+        imagine = Imagine("token", client=client, file_cache=ImageFileCache())
+
+        def hammer(thread: int) -> None:
+            start.wait()
+            for iteration in range(iterations):
+                operation = names[(thread + iteration) % len(names)]
+                marker = f"prompt-{uuid.uuid4().hex}"
+                if iteration % 2:
+                    image, image_marker = images[(thread + iteration) % len(images)]
+                else:
+                    image_marker = f"image-{uuid.uuid4().hex}"
+                    image = image_marker.encode("utf-8")
+
+                # Generations send no image and upscaling sends no prompt
+                markers = [marker, image_marker]
+                if operation == "generations":
+                    markers = [marker]
+                elif operation == "super_resolution":
+                    markers = [image_marker]
+
+                try:
+                    response, endpoint = OPERATIONS[operation](imagine, marker, image)
+                    failure = _check(operation, response, endpoint, markers)
+                except Exception as error:
+                    failure = f"{operation}: raised {error!r}"
+                if failure is not None:
+                    with lock:
+                        failures.append(failure)
+
+        workers = [
+            threading.Thread(target=hammer, args=(index,)) for index in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        began = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - began
+
+        return StressReport(
+            transport="http2" if http2 else "http1.1",
+            threads=threads,
+            requests=threads * iterations,
+            failures=failures,
+            seconds=elapsed,
+            connections=server.connections,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point running the stress test.
+
+    Usage:
+        $ python -m benchmarks.stress --threads 64 --http2
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stress")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.005)
+    arguments = parser.parse_args(argv)
+
+    report = run_stress(
+        threads=arguments.threads,
+        iterations=arguments.iterations,
+        http2=arguments.http2,
+        latency=arguments.latency,
+    )
+    print(
+        f"{report.transport}: {report.requests} requests from {report.threads}"
+        + f" threads in {report.seconds:.2f}s over {report.connections}"
+        + f" connections, {len(report.failures)} failures"
+    )
+    for failure in report.failures[:20]:
+        print(f"FAILURE {failure}")
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
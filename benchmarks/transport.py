@@ -0,0 +1,195 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from imagine.remote.http_client import HttpClient
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.remote.http2.http_client import Http2Client
+from tests.support.stubs import Http1StubServer, Http2StubServer
+
+
+class TransportResult:
+    """
+    The measurements of a transport under concurrent load. Latencies are in
+    seconds per request.
+    """
+
+    __slots__ = (
+        "name",
+        "requests",
+        "errors",
+        "seconds",
+        "throughput",
+        "p50",
+        "p99",
+        "connections",
+    )
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The measurements as a JSON compatible dictionary.
+        :rtype: Dict[str, Any]
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _load(
+    client: HttpClient, concurrency: int, requests: int, upload: bytes
+) -> Tuple[float, List[float], int]:
+    """
+    Send requests from ``concurrency`` threads and time every one of them.
+    """
+
+    def send(_: int) -> Tuple[float, int]:
+        start = time.perf_counter()
+        status, _ = client.post(
+            "/generations", {"prompt": "a red fox"}, {"image": upload}
+        )
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Warm the pools up so that connection setup is not measured
+        list(executor.map(send, range(concurrency)))
+
+        start = time.perf_counter()
+        outcomes = list(executor.map(send, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    errors = sum(1 for _, status in outcomes if status != 200)
+    return elapsed, [latency for latency, _ in outcomes], errors
+
+
+def run_transport_benchmark(
+    *,
+    concurrency: int = 64,
+    requests: int = 1024,
+    latency: float = 0.05,
+    body_size: int = 64 * 1024,
+    upload_size: int = 64 * 1024,
+    max_connections: int = 4,
+) -> List[TransportResult]:
+    """
+    Compare :class:`RequestClient` and :class:`Http2Client` against local stub
+    servers answering after the same latency.
+
+    :param concurrency: The number of threads sending requests (default: 64).
+    :type concurrency: int
+    :param requests: The number of measured requests per transport
+        (default: 1024).
+    :type requests: int
+    :param latency: The server time per request in seconds (default: 0.05).
+    :type latency: float
+    :param body_size: The size of every response in bytes (default: 64 KiB).
+    :type body_size: int
+    :param upload_size: The size of the file uploaded with every request in
+        bytes (default: 64 KiB).
+    :type upload_size: int
+    :param max_connections: The number of HTTP/2 connections (default: 4).
+    :type max_connections: int
+    :return: The results of the HTTP/1.1 and HTTP/2 transports.
+    :rtype: List[:class:`TransportResult`]
+    """
+    upload = bytes(upload_size)
+    transports: List[Tuple[str, Callable[[], Any], Callable[[str], HttpClient]]] = [
+        (
+            "http1.1 (RequestClient)",
+            lambda: Http1StubServer(latency=latency, body_size=body_size),
+            lambda url: RequestClient(base_url=url),
+        ),
+        (
+            f"http2 x{max_connections} (Http2Client)",
+            lambda: Http2StubServer(latency=latency, body_size=body_size),
+            lambda url: Http2Client(
+                base_url=url, max_connections=max_connections, prior_knowledge=True
+            ),
+        ),
+    ]
+
+    results = []
+    for name, server_factory, client_factory in transports:
+        with server_factory() as server:
+            client = client_factory(server.base_url)
+            elapsed, latencies, errors = _load(client, concurrency, requests, upload)
+            results.append(
+                TransportResult(
+                    name=name,
+                    requests=requests,
+                    errors=errors,
+                    seconds=elapsed,
+                    throughput=requests / elapsed,
+                    p50=statistics.median(latencies),
+                    p99=_percentile(latencies, 0.99),
+                    connections=server.connections,
+                )
+            )
+    return results
+
+
+def format_transport_results(results: Iterable[TransportResult]) -> str:
+    """
+    Render results as a table.
+
+    :param results: The results.
+    :type results: Iterable[:class:`TransportResult`]
+    :return: The table.
+    :rtype: str
+    """
+    lines = [
+        f"{'transport':<28}{'req/s':>10}{'p50':>12}{'p99':>12}{'errors':>8}"
+        + f"{'conns':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.name:<28}{r.throughput:>10.1f}{r.p50 * 1e3:>10.2f}ms"
+            + f"{r.p99 * 1e3:>10.2f}ms{r.errors:>8}{r.connections:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point comparing the transports.
+
+    Usage:
+        $ python -m benchmarks.transport --concurrency 128
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.transport")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--body-size", type=int, default=64 * 1024)
+    parser.add_argument("--upload-size", type=int, default=64 * 1024)
+    parser.add_argument("--max-connections", type=int, default=4)
+    parser.add_argument("--json", help="write the results to this file")
+    arguments = parser.parse_args(argv)
+
+    results = run_transport_benchmark(
+        concurrency=arguments.concurrency,
+        requests=arguments.requests,
+        latency=arguments.latency,
+        body_size=arguments.body_size,
+        upload_size=arguments.upload_size,
+        max_connections=arguments.max_connections,
+    )
+    print(format_transport_results(results))
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump({r.name: r.to_dict() for r in results}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+from .suite import (
+    BenchmarkCase,
+    BenchmarkResult,
+    NullHttpClient,
+    compare,
+    default_cases,
+    run_benchmarks,
+)
+
+__all__ = [
+    "BenchmarkCase",
+    "BenchmarkResult",
+    "NullHttpClient",
+    "compare",
+    "default_cases",
+    "run_benchmarks",
+]
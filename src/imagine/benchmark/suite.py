@@ -0,0 +1,329 @@
+import argparse
+import json
+import statistics
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from ..client import Imagine
+from ..models.image import Image
+from ..models.response import Response
+from ..models.status import Status
+from ..remote.http_client import HttpClient
+from ..remote.rest.http_client import RestClient
+from ..utils.imports.dynamic import dynamic_import
+from ..utils.parameter.checker import parameter_builder
+from ..utils.parameter.multipart import multipart_file_builder, multipart_form_builder
+from ..utils.profiling.profiler import CallProfiler
+
+
+class NullHttpClient(HttpClient):
+    """
+    An :class:`HttpClient` answering every request at once with a fixed
+    response, so that only the SDK's own work is measured.
+    """
+
+    __status: int
+    __body: bytes
+
+    def __init__(self, status: int = 200, body: bytes = b"\xff\xd8\xff\xe0") -> None:
+        """
+        :param status: The status code of every response (default: 200).
+        :type status: int
+        :param body: The content of every response (default: a JPEG header).
+        :type body: bytes
+        """
+        self.__status = status
+        self.__body = body
+
+    def post(
+        self,
+        endpoint: str,
+        parameters: Dict[str, Union[int, float, str]],
+        files: Optional[Dict[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        return self.__status, self.__body
+
+
+class BenchmarkCase:
+    """
+    A named operation to measure.
+
+    :param name: The name of the case.
+    :type name: str
+    :param function: The operation, called without arguments.
+    :type function: Callable[[], Any]
+    """
+
+    __slots__ = ("name", "function")
+
+    def __init__(self, name: str, function: Callable[[], Any]) -> None:
+        self.name = name
+        self.function = function
+
+
+class BenchmarkResult:
+    """
+    The measurements of a :class:`BenchmarkCase`. Times are in seconds and
+    sizes in bytes, per call.
+    """
+
+    __slots__ = (
+        "name",
+        "rounds",
+        "iterations",
+        "minimum",
+        "median",
+        "mean",
+        "stddev",
+        "peak_bytes",
+        "retained_bytes",
+    )
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The measurements as a JSON compatible dictionary.
+        :rtype: Dict[str, Any]
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def default_cases() -> List[BenchmarkCase]:
+    """
+    Build the cases covering the per-call hot path of the SDK.
+
+    :return: The cases, from the smallest building blocks to whole calls
+        through :class:`Imagine` with a :class:`NullHttpClient`.
+    :rtype: List[:class:`BenchmarkCase`]
+    """
+    arguments = {
+        "prompt": "a red fox in the snow, golden hour",
+        "style_id": 27,
+        "aspect_ratio": "1:1",
+        "cfg": 7.5,
+        "seed": None,
+        "steps": 30,
+        "neg_prompt": None,
+        "high_res_results": 0,
+    }
+    parameters = parameter_builder(**arguments)
+    image = bytes(256 * 1024)
+    body = bytes(512 * 1024)
+    rest = RestClient("token", NullHttpClient())
+    imagine = Imagine("token", client=NullHttpClient(body=body))
+
+    return [
+        BenchmarkCase("parameter_builder", lambda: parameter_builder(**arguments)),
+        BenchmarkCase(
+            "multipart_form_builder", lambda: multipart_form_builder(parameters)
+        ),
+        BenchmarkCase(
+            "multipart_file_builder", lambda: multipart_file_builder({"image": image})
+        ),
+        BenchmarkCase("status", lambda: Status(200)),
+        BenchmarkCase("response", lambda: Response(Image(body), 200)),
+        BenchmarkCase("dynamic_import", lambda: dynamic_import("json")),
+        BenchmarkCase(
+            "rest_client.post", lambda: rest.post("/generations", parameters)
+        ),
+        BenchmarkCase(
+            "rest_client.post_headers",
+            lambda: rest.post("/generations", parameters, headers={"X-Trace": "1"}),
+        ),
+        BenchmarkCase(
+            "imagine.generations",
+            lambda: imagine.generations("a red fox", cfg=7.5, steps=30),
+        ),
+        BenchmarkCase(
+            "imagine.variations", lambda: imagine.variations(image, "a red fox")
+        ),
+    ]
+
+
+def _allocations(function: Callable[[], Any], samples: int) -> Tuple[int, int]:
+    """
+    Measure the median peak and retained allocation of single calls.
+    """
+    peaks, retained = [], []
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        for _ in range(samples):
+            # Clearing also resets the peak, on every supported Python version
+            tracemalloc.clear_traces()
+            function()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak)
+            retained.append(current)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return int(statistics.median(peaks)), int(statistics.median(retained))
+
+
+def run_benchmarks(
+    cases: Optional[Iterable[BenchmarkCase]] = None,
+    *,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    allocation_samples: int = 50,
+    profiler: Optional[CallProfiler] = None,
+) -> List[BenchmarkResult]:
+    """
+    Measure the time and memory every case takes per call.
+
+    Each case is timed in ``repeat`` rounds of at least ``min_time`` seconds,
+    like pytest-benchmark does, and its allocations are then sampled with
+    :mod:`tracemalloc` over single calls.
+
+    :param cases: The cases to run (default: :func:`default_cases`).
+    :type cases: Optional[Iterable[:class:`BenchmarkCase`]]
+    :param repeat: The number of timed rounds (default: 5).
+    :type repeat: int
+    :param min_time: The minimum duration of a round in seconds (default: 0.2).
+    :type min_time: float
+    :param allocation_samples: The number of calls sampled for allocations
+        (default: 50).
+    :type allocation_samples: int
+    :param profiler: An optional :class:`CallProfiler` that profiles one
+        extra round of every case under the case's name (default: None).
+    :type profiler: Optional[:class:`CallProfiler`]
+    :return: The results, in the order of the cases.
+    :rtype: List[:class:`BenchmarkResult`]
+    """
+    results = []
+    for case in cases if cases is not None else default_cases():
+        timer = timeit.Timer(case.function)
+        number, elapsed = timer.autorange()
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+        rounds = [total / number for total in timer.repeat(repeat, number)]
+
+        peak, retained = _allocations(case.function, allocation_samples)
+
+        if profiler is not None:
+            with profiler.profile(case.name):
+                for _ in range(number):
+                    case.function()
+
+        results.append(
+            BenchmarkResult(
+                name=case.name,
+                rounds=repeat,
+                iterations=number,
+                minimum=min(rounds),
+                median=statistics.median(rounds),
+                mean=statistics.mean(rounds),
+                stddev=statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+                peak_bytes=peak,
+                retained_bytes=retained,
+            )
+        )
+    return results
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    results: Iterable[BenchmarkResult],
+    *,
+    tolerance: float = 0.25,
+) -> List[str]:
+    """
+    Find the cases that became slower or allocate more than in a baseline.
+
+    :param baseline: Earlier results by name, as written by ``--json``.
+    :type baseline: Dict[str, Dict[str, Any]]
+    :param results: The current results.
+    :type results: Iterable[:class:`BenchmarkResult`]
+    :param tolerance: The allowed relative increase (default: 0.25).
+    :type tolerance: float
+    :return: A description of every regression.
+    :rtype: List[str]
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        for metric in ("median", "peak_bytes"):
+            before, after = previous[metric], getattr(result, metric)
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append(
+                    f"{result.name}: {metric} rose from {before:.4g} to {after:.4g}"
+                    + f" (+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_results(results: Iterable[BenchmarkResult]) -> str:
+    """
+    Render results as a table.
+
+    :param results: The results.
+    :type results: Iterable[:class:`BenchmarkResult`]
+    :return: The table.
+    :rtype: str
+    """
+    lines = [
+        f"{'case':<28}{'median':>12}{'min':>12}{'stddev':>12}{'peak':>12}"
+        + f"{'retained':>12}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.name:<28}{r.median * 1e6:>10.2f}us{r.minimum * 1e6:>10.2f}us"
+            + f"{r.stddev * 1e6:>10.2f}us{r.peak_bytes:>11}B{r.retained_bytes:>11}B"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point running the benchmarks.
+
+    Usage:
+        $ python -m imagine.benchmark --json baseline.json
+        $ python -m imagine.benchmark --compare baseline.json --profile prof/
+    """
+    parser = argparse.ArgumentParser(prog="python -m imagine.benchmark")
+    parser.add_argument("-k", "--filter", help="only run cases containing this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="fail on regressions against this file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--profile", help="write cProfile stats to this directory")
+    arguments = parser.parse_args(argv)
+
+    cases = [
+        case
+        for case in default_cases()
+        if arguments.filter is None or arguments.filter in case.name
+    ]
+    profiler = CallProfiler(arguments.profile) if arguments.profile else None
+    results = run_benchmarks(
+        cases,
+        repeat=arguments.repeat,
+        min_time=arguments.min_time,
+        profiler=profiler,
+    )
+    print(format_results(results))
+
+    if profiler is not None:
+        print(f"Wrote {len(profiler.dump())} profiles to {arguments.profile}")
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump({r.name: r.to_dict() for r in results}, file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(
+                json.load(file), results, tolerance=arguments.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
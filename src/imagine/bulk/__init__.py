@@ -0,0 +1,15 @@
+from .directory import (
+    IMAGE_EXTENSIONS,
+    OPERATIONS,
+    BulkReport,
+    process_directory,
+    walk_images,
+)
+
+__all__ = [
+    "IMAGE_EXTENSIONS",
+    "OPERATIONS",
+    "BulkReport",
+    "process_directory",
+    "walk_images",
+]
@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+from ..client import Imagine
+from ..models.status import Status
+from ..remote.limiter.local import LocalLimiter
+from ..utils.cancellation.token import CancellationToken
+from ..utils.file.integrity import check_image_file_integrity
+from ..utils.tracing.span import bind, span
+
+#: The operations transforming one input image into one output image.
+OPERATIONS = ("super_resolution", "image_remix", "variations")
+
+#: The file extensions of input images by default.
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+
+class BulkReport:
+    """
+    The outcome of :func:`process_directory`, updated while it runs.
+
+    :param processed: The number of images written.
+    :type processed: int
+    :param skipped: The number of images whose output already existed.
+    :type skipped: int
+    :param failures: Why an image failed, by its path relative to the input
+        directory: the name of the response status or the error raised.
+    :type failures: Dict[str, str]
+    :param seconds: The duration of the run.
+    :type seconds: float
+    """
+
+    __slots__ = ("processed", "skipped", "failures", "seconds")
+
+    def __init__(self) -> None:
+        self.processed = 0
+        self.skipped = 0
+        self.failures: Dict[str, str] = {}
+        self.seconds = 0.0
+
+    @property
+    def failed(self) -> int:
+        """
+        :return: The number of images that failed.
+        :rtype: int
+        """
+        return len(self.failures)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The report as a JSON compatible dictionary.
+        :rtype: Dict[str, Any]
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def walk_images(
+    directory: str, extensions: Sequence[str] = IMAGE_EXTENSIONS
+) -> Iterator[str]:
+    """
+    Lazily list the images of a directory tree, one directory at a time.
+
+    :param directory: The root of the tree.
+    :type directory: str
+    :param extensions: The file extensions of images, compared case
+        insensitively (default: :data:`IMAGE_EXTENSIONS`).
+    :type extensions: Sequence[str]
+    :return: The paths of the images relative to ``directory``, in sorted
+        order within every directory.
+    :rtype: Iterator[str]
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        with os.scandir(os.path.join(directory, relative)) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        subdirectories = []
+        for entry in entries:
+            path = os.path.join(relative, entry.name)
+            if entry.is_dir():
+                subdirectories.append(path)
+            elif entry.is_file() and entry.name.lower().endswith(extensions):
+                yield path
+        # Reversed so that the stack visits them in sorted order
+        pending.extend(reversed(subdirectories))
+
+
+def _output_path(output_dir: str, relative: str, suffix: Optional[str]) -> str:
+    if suffix is not None:
+        relative = os.path.splitext(relative)[0] + suffix
+    return os.path.join(output_dir, relative)
+
+
+def _write(path: str, data: bytes) -> None:
+    # Written aside and renamed, so that an interrupted write never leaves a
+    # partial output that would be skipped as done
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = f"{path}.part"
+    with open(partial, "wb") as file:
+        file.write(data)
+    os.replace(partial, path)
+
+
+def process_directory(
+    imagine: Imagine,
+    input_dir: str,
+    output_dir: str,
+    *,
+    operation: str = "super_resolution",
+    arguments: Optional[Dict[str, Any]] = None,
+    extensions: Sequence[str] = IMAGE_EXTENSIONS,
+    suffix: Optional[str] = None,
+    overwrite: bool = False,
+    max_workers: int = 8,
+    io_workers: int = 2,
+    read_ahead: int = 16,
+    rate: Optional[float] = None,
+    progress: Optional[Callable[[str, str, BulkReport], None]] = None,
+    priority: Optional[str] = None,
+    cancellation: Optional[CancellationToken] = None,
+) -> BulkReport:
+    """
+    Apply an operation to every image of a directory tree and write the
+    results into a mirror of the tree.
+
+    The tree is walked lazily while images are processed. A small I/O pool
+    reads up to ``read_ahead`` images ahead of the network workers and writes
+    their results, so the workers only wait for the API. Images whose output
+    already exists and is complete, see :func:`check_image_file_integrity`,
+    are skipped without reading them, so that running again over a partly
+    processed tree only sends the missing images. Outputs are written to a
+    temporary file first and renamed, so an interrupted run leaves no
+    truncated output behind.
+
+    :param imagine: The client executing the requests.
+    :type imagine: :class:`Imagine`
+    :param input_dir: The root of the input tree.
+    :type input_dir: str
+    :param output_dir: The root of the output tree, created as needed.
+    :type output_dir: str
+    :param operation: The :class:`Imagine` method applied to every image, one
+        of :data:`OPERATIONS` (default: super_resolution).
+    :type operation: str
+    :param arguments: The other arguments of the method, e.g. the ``prompt``
+        of a remix (default: None).
+    :type arguments: Optional[Dict[str, Any]]
+    :param extensions: The file extensions of input images
+        (default: :data:`IMAGE_EXTENSIONS`).
+    :type extensions: Sequence[str]
+    :param suffix: The extension replacing the one of the input in output
+        names, e.g. ``.png``, or None to keep the input names (default: None).
+    :type suffix: Optional[str]
+    :param overwrite: Whether to process images whose output already exists
+        (default: False).
+    :type overwrite: bool
+    :param max_workers: The number of requests executed concurrently
+        (default: 8).
+    :type max_workers: int
+    :param io_workers: The number of threads reading and writing files
+        (default: 2).
+    :type io_workers: int
+    :param read_ahead: The number of images read ahead of the requests,
+        bounding the memory used (default: 16).
+    :type read_ahead: int
+    :param rate: The maximum number of requests per second, or None for no
+        limit besides the one of the client (default: None).
+    :type rate: Optional[float]
+    :param progress: A function called after every image with its path
+        relative to ``input_dir``, its outcome (``processed``, ``skipped`` or
+        ``failed``) and the report so far (default: None).
+    :type progress: Optional[Callable[[str, str, :class:`BulkReport`], None]]
+    :param priority: The scheduler lane of the calls (default: None).
+    :type priority: Optional[str]
+    :param cancellation: A token cancelling the run; images not started yet
+        are not sent (default: None).
+    :type cancellation: Optional[:class:`CancellationToken`]
+    :return: The report of the run.
+    :rtype: :class:`BulkReport`
+    :raises ValueError: If the operation does not transform one image.
+
+    Usage:
+        >>> report = process_directory(
+        ...     client, "photos", "upscaled", max_workers=16, rate=5
+        ... )
+        >>> print(report.processed, report.skipped, report.failures)
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unsupported bulk operation '{operation}'.")
+
+    method = getattr(imagine, operation)
+    arguments = dict(arguments or {})
+    limiter = LocalLimiter(rate=rate) if rate is not None else None
+    report = BulkReport()
+    lock = threading.Lock()
+    # Bounds the images read but not yet written
+    window = threading.BoundedSemaphore(max(1, max_workers) + max(0, read_ahead))
+
+    def record(relative: str, outcome: str, failure: Optional[str] = None) -> None:
+        # Frees the image's slot in the window, even if the callback raises
+        try:
+            with lock:
+                if outcome == "processed":
+                    report.processed += 1
+                elif outcome == "skipped":
+                    report.skipped += 1
+                else:
+                    report.failures[relative] = failure
+                if progress is not None:
+                    progress(relative, outcome, report)
+        finally:
+            window.release()
+
+    def read(relative: str, target: str) -> Optional[bytes]:
+        if not overwrite and os.path.isfile(target):
+            try:
+                if check_image_file_integrity(target) is None:
+                    return None
+            except OSError:
+                pass
+        with open(os.path.join(input_dir, relative), "rb") as file:
+            return file.read()
+
+    def written(relative: str, future: "Future[None]") -> None:
+        error = future.exception()
+        if error is None:
+            record(relative, "processed")
+        else:
+            record(relative, "failed", repr(error))
+
+    def send(relative: str, target: str, loaded: "Future[Optional[bytes]]") -> None:
+        try:
+            data = loaded.result()
+        except Exception as error:
+            record(relative, "failed", repr(error))
+            return
+        if data is None:
+            # Outside the try, so a raising callback is not recorded twice
+            record(relative, "skipped")
+            return
+
+        try:
+            if limiter is not None:
+                with limiter.slot(cancellation):
+                    response = method(
+                        data, **arguments, priority=priority, cancellation=cancellation
+                    )
+            else:
+                response = method(
+                    data, **arguments, priority=priority, cancellation=cancellation
+                )
+        except Exception as error:
+            record(relative, "failed", repr(error))
+            return
+
+        if response.status != Status.OK:
+            record(relative, "failed", response.status.name)
+            return
+
+        output = response.data.bytes
+        writing = io.submit(_write, target, output)
+        writing.add_done_callback(lambda future: written(relative, future))
+
+    began = time.perf_counter()
+    attributes = {"imagine.operation": operation, "imagine.input": input_dir}
+    with span("imagine.process_directory", attributes) as run_span:
+        io = ThreadPoolExecutor(max_workers=max(1, io_workers))
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as network:
+                for relative in walk_images(input_dir, extensions):
+                    window.acquire()
+                    if cancellation is not None and cancellation.cancelled:
+                        window.release()
+                        break
+                    target = _output_path(output_dir, relative, suffix)
+                    loaded = io.submit(read, relative, target)
+                    network.submit(bind(send), relative, target, loaded)
+        finally:
+            # Writes are submitted by the network workers, so they are all
+            # queued once the network pool has shut down
+            io.shutdown(wait=True)
+
+        report.seconds = time.perf_counter() - began
+        run_span.set_attributes(
+            {
+                "imagine.processed": report.processed,
+                "imagine.skipped": report.skipped,
+                "imagine.failed": report.failed,
+            }
+        )
+    return report
@@ -1,4 +1,9 @@
-from typing import Optional
+import inspect
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+from typing import Tuple
 
 from .features.aspect_ratio import AspectRatio
 from .features.generations.handler import GenerationsHandler
@@ -13,8 +18,39 @@ from .features.in_painting.style_ids import InPaintingStyle
 from .features.super_resolution.style_ids import SuperResolutionStyle
 from .models.image import Image
 from .models.response import Response
+from .models.status import Status
+from .remote.failover.http_client import FailoverClient
 from .remote.http_client import HttpClient
+from .remote.http2.http_client import Http2Client
+from .remote.limiter.limiter import Limiter
+from .remote.scheduler.scheduler import PriorityScheduler
 from .remote.rest.http_client import RestClient
+from .specs.request import RequestSpec
+from .utils.cancellation.token import (
+    CancellationToken,
+    CancelledError,
+    cancellation_scope,
+    current_token,
+)
+from .utils.file.cache import ImageFileCache
+from .utils.profiling.profiler import CallProfiler
+from .utils.tracing.span import bind, span
+from .validation.catalog import ConstraintCatalog
+from .validation.error import ValidationError
+from .utils.file.read import ImageSource, load_image_source, read_image_file_as_bytes
+
+
+def _keyword_defaults(method: Callable[..., Any]) -> Dict[str, Any]:
+    """
+    Get the default values of the request arguments of an :class:`Imagine`
+    method.
+    """
+    return {
+        name: parameter.default
+        for (name, parameter) in inspect.signature(method).parameters.items()
+        if parameter.default is not parameter.empty
+        and name not in ("priority", "cancellation")
+    }
 
 
 class Imagine:
@@ -26,6 +62,12 @@ class Imagine:
     """
 
     __client: HttpClient
+    __failover: Optional[FailoverClient]
+    __limiter: Optional[Limiter]
+    __scheduler: Optional[PriorityScheduler]
+    __catalog: Optional[ConstraintCatalog]
+    __profiler: Optional[CallProfiler]
+    __reader: Callable[[str], bytes]
 
     __generations_handler: GenerationsHandler
     __image_remix_handler: ImageRemixHandler
@@ -33,22 +75,186 @@ class Imagine:
     __variations_handler: VariationsHandler
     __in_paint_handler: InPaintHandler
 
-    def __init__(self, token: str, *, client: Optional[HttpClient] = None) -> None:
+    def __init__(
+        self,
+        token: str,
+        *,
+        client: Optional[HttpClient] = None,
+        limiter: Optional[Limiter] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        file_cache: Optional[ImageFileCache] = None,
+        catalog: Optional[ConstraintCatalog] = None,
+        profiler: Optional[CallProfiler] = None,
+        http2: bool = False,
+        base_urls: Optional[List[str]] = None,
+    ) -> None:
         """
         Initialize an instance of the Imagine class.
 
+        The instance is fork-safe: pooled connections of the default client are
+        rebuilt in a child process after ``fork()``. It is also thread-safe and
+        meant to be shared: calls keep no state on the instance, and the
+        default clients share one connection pool between all threads.
+
         :param token: The authorization token used for API authentication.
         :type token: str
         :param client: An optional instance of :class:`HttpClient` to use for requests.
         :type client: Optional[:py:class:`HttpClient`]
+        :param limiter: An optional :class:`Limiter` throttling the requests, e.g.
+            a :class:`SharedLimiter` coordinating all processes on a machine or an
+            :class:`AdaptiveLimiter` tuning the concurrency on its own.
+        :type limiter: Optional[:py:class:`Limiter`]
+        :param scheduler: An optional :class:`PriorityScheduler` sharing the
+            concurrent calls of this instance between priority lanes. Every
+            method accepts a ``priority`` naming the lane of the call.
+        :type scheduler: Optional[:py:class:`PriorityScheduler`]
+        :param file_cache: An optional :class:`ImageFileCache` serving input
+            images that are used repeatedly without reading them again.
+        :type file_cache: Optional[:py:class:`ImageFileCache`]
+        :param catalog: An optional :class:`ConstraintCatalog` checking the
+            arguments of every call before it is sent, e.g. the one built by
+            :func:`default_catalog`. Calls breaking a constraint raise a
+            :class:`ValidationError`; batches are checked as a whole before
+            any request is sent.
+        :type catalog: Optional[:py:class:`ConstraintCatalog`]
+        :param profiler: An optional :class:`CallProfiler` collecting cProfile
+            statistics of every call per method. Time spent waiting for the
+            scheduler is not included.
+        :type profiler: Optional[:py:class:`CallProfiler`]
+        :param http2: Whether the default client multiplexes the requests over
+            a few HTTP/2 connections with :class:`Http2Client` instead of
+            using :class:`RequestClient`. Ignored when ``client`` is given
+            (default: False).
+        :type http2: bool
+        :param base_urls: Base URLs of several API gateways, e.g. one per
+            region. The default client then sends every request to the
+            fastest healthy one and fails over to the others on connection
+            and server errors, see :class:`FailoverClient`. Ignored when
+            ``client`` is given (default: None).
+        :type base_urls: Optional[List[str]]
+
+        Every method accepts a ``cancellation`` token. Cancelling it skips
+        calls that have not started, withdraws waiting calls from the limiter
+        and scheduler queues, aborts uploads and downloads in progress and
+        makes the calls return a response with the ``CANCELLED`` status.
+
+        Every call is traced when OpenTelemetry is installed: a span per method
+        with nested spans for waiting, reading files, encoding, sending and
+        downloading. See :func:`set_tracer` to choose the tracer.
         """
-        self.__client = RestClient(token, client)
+        self.__failover = None
+        if client is None and base_urls:
+            self.__failover = FailoverClient(
+                base_urls,
+                client_factory=(
+                    (lambda url: Http2Client(base_url=url)) if http2 else None
+                ),
+            )
+            client = self.__failover
+        elif client is None and http2:
+            client = Http2Client()
+        elif isinstance(client, FailoverClient):
+            self.__failover = client
+        self.__client = RestClient(token, client, limiter)
+        self.__limiter = limiter
+        self.__scheduler = scheduler
+        self.__catalog = catalog
+        self.__profiler = profiler
+
+        self.__reader = (
+            file_cache.read if file_cache is not None else read_image_file_as_bytes
+        )
 
         self.__generations_handler = GenerationsHandler(self.__client)
-        self.__image_remix_handler = ImageRemixHandler(self.__client)
-        self.__super_resolution_handler = SuperResolutionHandler(self.__client)
-        self.__variations_handler = VariationsHandler(self.__client)
-        self.__in_paint_handler = InPaintHandler(self.__client)
+        self.__image_remix_handler = ImageRemixHandler(self.__client, self.__reader)
+        self.__super_resolution_handler = SuperResolutionHandler(
+            self.__client, self.__reader
+        )
+        self.__variations_handler = VariationsHandler(self.__client, self.__reader)
+        self.__in_paint_handler = InPaintHandler(self.__client, self.__reader)
+
+    @contextmanager
+    def __admit(
+        self, priority: Optional[str], cancellation: Optional[CancellationToken]
+    ) -> Iterator[None]:
+        if self.__scheduler is None:
+            yield
+            return
+
+        with span("imagine.wait", {"imagine.wait.for": "scheduler"}):
+            self.__scheduler.acquire(priority, cancellation)
+        try:
+            yield
+        finally:
+            self.__scheduler.release(priority)
+
+    @contextmanager
+    def __profile(self, operation: str) -> Iterator[None]:
+        if self.__profiler is None:
+            yield
+            return
+
+        with self.__profiler.profile(operation):
+            yield
+
+    def __execute(
+        self,
+        operation: str,
+        handler: Callable[..., Response[Image]],
+        priority: Optional[str],
+        cancellation: Optional[CancellationToken],
+        **arguments: Any,
+    ) -> Response[Image]:
+        if self.__catalog is not None:
+            violations = self.__catalog.check_arguments(operation, [arguments])
+            if violations:
+                raise ValidationError(violations)
+
+        # An explicit token wins over the one of an enclosing scope
+        if cancellation is None:
+            cancellation = current_token()
+        if cancellation is not None and cancellation.cancelled:
+            return Response(None, Status.CANCELLED.value)
+
+        style_id = arguments.get("style_id", arguments.get("model_version"))
+        attributes = {
+            "imagine.operation": operation,
+            "imagine.style_id": style_id,
+            "imagine.priority": priority,
+        }
+        with span(f"imagine.{operation}", attributes) as call_span:
+            try:
+                with cancellation_scope(cancellation):
+                    with self.__admit(priority, cancellation):
+                        with self.__profile(operation):
+                            response = handler(**arguments)
+            except CancelledError:
+                response = Response(None, Status.CANCELLED.value)
+
+            call_span.set_attribute("imagine.status", response.status.value)
+            if response.status != Status.OK:
+                call_span.set_error(response.status.name)
+            return response
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the limiter, scheduler and endpoint state of this
+        instance.
+
+        :return: A dictionary with the ``limiter``, ``scheduler`` and
+            ``endpoints`` metrics; an entry is None when the component is not
+            configured.
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "limiter": self.__limiter.metrics() if self.__limiter is not None else None,
+            "scheduler": (
+                self.__scheduler.metrics() if self.__scheduler is not None else None
+            ),
+            "endpoints": (
+                self.__failover.metrics() if self.__failover is not None else None
+            ),
+        }
 
     def generations(
         self,
@@ -61,6 +267,8 @@ class Imagine:
         seed: Optional[int] = None,
         steps: Optional[int] = None,
         high_res_results: bool = False,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
     ) -> Response[Image]:
         """
         Generate an image based on specified parameters using the
@@ -83,11 +291,21 @@ class Imagine:
         :type steps: Optional[int]
         :param high_res_results: The level of high-resolution results (default: False).
         :type high_res_results: bool
+        :param priority: The scheduler lane of the call, ignored without a
+            scheduler (default: the scheduler's default lane).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call, see
+            :class:`CancellationToken` (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
         :return: A response containing the generated error or an :class:`Image`
             object.
         :rtype: :class:`Response`[:class:`Image`]
         """
-        return self.__generations_handler(
+        return self.__execute(
+            "generations",
+            self.__generations_handler,
+            priority,
+            cancellation,
             prompt=prompt,
             style_id=style.value,
             aspect_ratio=aspect_ratio.value,
@@ -100,7 +318,7 @@ class Imagine:
 
     def image_remix(
         self,
-        image_path: str,
+        image_path: ImageSource,
         prompt: str,
         *,
         style: ImageRemixStyle = ImageRemixStyle.IMAGINE_V1,
@@ -110,13 +328,15 @@ class Imagine:
         steps: Optional[int] = None,
         cfg: Optional[float] = None,
         neg_prompt: Optional[str] = None,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
     ) -> Response[Image]:
         """
         Remix an image based on specified parameters using the
         ImageRemixHandler.
 
-        :param image_path: The path to the source image.
-        :type image_path: str
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
         :param prompt: The prompt for remixing the image.
         :type prompt: str
         :param style: The style for the image remixing (default:
@@ -135,11 +355,21 @@ class Imagine:
         :type cfg: Optional[float]
         :param neg_prompt: The negative prompt for remixing (default: None).
         :type neg_prompt: Optional[str]
+        :param priority: The scheduler lane of the call, ignored without a
+            scheduler (default: the scheduler's default lane).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call, see
+            :class:`CancellationToken` (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
         :return: A response containing the generated error or an :class:`Image`
             object.
         :rtype: :class:`Response`[:class:`Image`]
         """
-        return self.__image_remix_handler(
+        return self.__execute(
+            "image_remix",
+            self.__image_remix_handler,
+            priority,
+            cancellation,
             prompt=prompt,
             image_path=image_path,
             style_id=style.value,
@@ -153,29 +383,60 @@ class Imagine:
 
     def super_resolution(
         self,
-        image_path: str,
+        image_path: ImageSource,
         *,
         style: SuperResolutionStyle = SuperResolutionStyle.BASIC,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 32,
+        max_workers: int = 4,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
     ) -> Response[Image]:
         """
         Enhance the resolution of an image using the SuperResolutionHandler.
 
-        :param image_path: The path to the source image.
-        :type image_path: str
+        When ``tile_size`` is given, the image is split into overlapping tiles
+        which are upscaled concurrently and blended back together. This
+        requires Pillow and NumPy.
+
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
         :param style: The model version for super resolution.
         :type style: :class:SuperResolutionStyle
+        :param tile_size: The edge length of a tile in pixels, or None to
+            upscale the whole image in a single request (default: None).
+        :type tile_size: Optional[int]
+        :param tile_overlap: The overlap between neighbouring tiles in pixels
+            (default: 32).
+        :type tile_overlap: int
+        :param max_workers: The number of tiles upscaled concurrently
+            (default: 4).
+        :type max_workers: int
+        :param priority: The scheduler lane of the call, ignored without a
+            scheduler (default: the scheduler's default lane).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call, see
+            :class:`CancellationToken` (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
         :return: A response containing the generated error or an :class:`Image`
             object.
         :rtype: :class:`Response`[:class:`Image`]
         """
-        return self.__super_resolution_handler(
+        return self.__execute(
+            "super_resolution",
+            self.__super_resolution_handler,
+            priority,
+            cancellation,
             image_path=image_path,
-            model_version=style.value
+            model_version=style.value,
+            tile_size=tile_size,
+            tile_overlap=tile_overlap,
+            max_workers=max_workers,
         )
 
     def variations(
         self,
-        image_path: str,
+        image_path: ImageSource,
         prompt: str,
         *,
         style: GenerationsStyle = GenerationsStyle.IMAGINE_V1,
@@ -184,14 +445,16 @@ class Imagine:
         strength: Optional[int] = None,
         cfg: Optional[float] = None,
         neg_prompt: Optional[str] = None,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
     ) -> Response[Image]:
         """
         Generate a variation of an image based on specified parameters using
         the VariateHandler. It is an extension of generations hence why it
         uses the same styles as Generations.
 
-        :param image_path: The path to the source image.
-        :type image_path: str
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
         :param prompt: The prompt for generating the variation.
         :type prompt: str
         :param style: The style for generating the variation.
@@ -206,11 +469,21 @@ class Imagine:
         :type cfg: Optional[float]
         :param neg_prompt: The negative prompt for contrasting variations.
         :type neg_prompt: Optional[str]
+        :param priority: The scheduler lane of the call, ignored without a
+            scheduler (default: the scheduler's default lane).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call, see
+            :class:`CancellationToken` (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
         :return: A response containing the generated error or an :class:`Image`
             object.
         :rtype: :class:`Response`[:class:`Image`]
         """
-        return self.__variations_handler(
+        return self.__execute(
+            "variations",
+            self.__variations_handler,
+            priority,
+            cancellation,
             prompt=prompt,
             image_path=image_path,
             style_id=style.value,
@@ -223,31 +496,358 @@ class Imagine:
 
     def in_painting(
         self,
-        image_path: str,
-        mask_path: str,
+        image_path: ImageSource,
+        mask_path: ImageSource,
         prompt: str,
         *,
         style: InPaintingStyle = InPaintingStyle.BASIC,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
     ) -> Response[Image]:
         """
         Perform image in-painting based on specified parameters using the
         InPaintHandler.
 
-        :param image_path: The path to the source image.
-        :type image_path: str
-        :param mask_path: The path to the mask image for in-painting.
-        :type mask_path: str
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
+        :param mask_path: The path to the mask image for in-painting, or its
+            bytes.
+        :type mask_path: Union[str, bytes]
         :param prompt: The prompt for guiding the in-painting process.
         :type prompt: str
         :param style: The model version for in-painting.
         :type style: :class:`InPaintingModel`
+        :param priority: The scheduler lane of the call, ignored without a
+            scheduler (default: the scheduler's default lane).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call, see
+            :class:`CancellationToken` (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
         :return: A response containing the generated error or an :class:`Image`
             object.
         :rtype: :class:`Response`[:class:`Image`]
         """
-        return self.__in_paint_handler(
+        return self.__execute(
+            "in_painting",
+            self.__in_paint_handler,
+            priority,
+            cancellation,
             prompt=prompt,
             image_path=image_path,
             mask_path=mask_path,
             model_version=style.value,
         )
+
+    def __fan_out(
+        self,
+        operation: Callable[..., Response[Image]],
+        image_path: ImageSource,
+        parameter_sets: Iterable[Dict[str, Any]],
+        max_workers: int,
+        priority: Optional[str],
+        cancellation: Optional[CancellationToken],
+    ) -> List[Response[Image]]:
+        parameter_sets = list(parameter_sets)
+        if self.__catalog is not None:
+            # Checked with the defaults, e.g. the style, as every call will be
+            defaults = _keyword_defaults(operation)
+            violations = self.__catalog.check_arguments(
+                operation.__name__,
+                [{"image_path": image_path, **defaults, **p} for p in parameter_sets],
+            )
+            if violations:
+                raise ValidationError(violations)
+
+        # Read once; every request shares the same immutable buffer
+        image = load_image_source(image_path, self.__reader)
+
+        def run(parameters: Dict[str, Any]) -> Response[Image]:
+            return operation(
+                image,
+                **{"priority": priority, "cancellation": cancellation, **parameters},
+            )
+
+        with span(f"imagine.{operation.__name__}_many"):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                return list(executor.map(bind(run), parameter_sets))
+
+    def image_remix_many(
+        self,
+        image_path: ImageSource,
+        parameter_sets: Iterable[Dict[str, Any]],
+        *,
+        max_workers: int = 8,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> List[Response[Image]]:
+        """
+        Remix one source image with many parameter sets concurrently.
+
+        The source is read once and its buffer is shared by all requests.
+
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
+        :param parameter_sets: The keyword arguments of :meth:`image_remix`
+            for every request, e.g. ``{"prompt": ..., "control": ...}``.
+        :type parameter_sets: Iterable[Dict[str, Any]]
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls; calls that have not
+            started yet are skipped (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The responses, in the order of ``parameter_sets``.
+        :rtype: List[:class:`Response`[:class:`Image`]]
+        :raises ValidationError: If a catalog is configured and any request
+            breaks a constraint. Nothing is sent then.
+        """
+        return self.__fan_out(
+            self.image_remix,
+            image_path,
+            parameter_sets,
+            max_workers,
+            priority,
+            cancellation,
+        )
+
+    def variations_many(
+        self,
+        image_path: ImageSource,
+        parameter_sets: Iterable[Dict[str, Any]],
+        *,
+        max_workers: int = 8,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> List[Response[Image]]:
+        """
+        Generate variations of one source image with many parameter sets
+        concurrently.
+
+        The source is read once and its buffer is shared by all requests.
+
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
+        :param parameter_sets: The keyword arguments of :meth:`variations`
+            for every request, e.g. ``{"prompt": ..., "seed": ...}``.
+        :type parameter_sets: Iterable[Dict[str, Any]]
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls; calls that have not
+            started yet are skipped (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The responses, in the order of ``parameter_sets``.
+        :rtype: List[:class:`Response`[:class:`Image`]]
+        :raises ValidationError: If a catalog is configured and any request
+            breaks a constraint. Nothing is sent then.
+        """
+        return self.__fan_out(
+            self.variations,
+            image_path,
+            parameter_sets,
+            max_workers,
+            priority,
+            cancellation,
+        )
+
+    def in_painting_many(
+        self,
+        image_path: ImageSource,
+        masks: Iterable[ImageSource],
+        prompt: str,
+        *,
+        style: InPaintingStyle = InPaintingStyle.BASIC,
+        max_workers: int = 8,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> List[Response[Image]]:
+        """
+        In-paint one source image with many masks concurrently, e.g. masks
+        encoded in memory by :meth:`MaskBuilder.encode`.
+
+        The source is read once and its buffer is shared by all requests.
+
+        :param image_path: The path to the source image, or its bytes.
+        :type image_path: Union[str, bytes]
+        :param masks: The paths to the masks, or their bytes.
+        :type masks: Iterable[Union[str, bytes]]
+        :param prompt: The prompt for guiding the in-painting process.
+        :type prompt: str
+        :param style: The model version for in-painting.
+        :type style: :class:`InPaintingModel`
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls; calls that have not
+            started yet are skipped (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The responses, in the order of ``masks``.
+        :rtype: List[:class:`Response`[:class:`Image`]]
+        :raises ValidationError: If a catalog is configured and any request
+            breaks a constraint. Nothing is sent then.
+        """
+        return self.__fan_out(
+            self.in_painting,
+            image_path,
+            [{"mask_path": mask, "prompt": prompt, "style": style} for mask in masks],
+            max_workers,
+            priority,
+            cancellation,
+        )
+
+    def submit(
+        self,
+        spec: RequestSpec,
+        *,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Response[Image]:
+        """
+        Execute a request specification.
+
+        :param spec: The request to execute, e.g. a :class:`GenerationsSpec`.
+        :type spec: :class:`RequestSpec`
+        :param priority: The scheduler lane of the call (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the call (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: A response containing the generated error or an :class:`Image`
+            object.
+        :rtype: :class:`Response`[:class:`Image`]
+        """
+        operation = getattr(self, spec.operation)
+        return operation(
+            **spec.arguments(), priority=priority, cancellation=cancellation
+        )
+
+    def submit_many(
+        self,
+        specs: Iterable[RequestSpec],
+        *,
+        max_workers: int = 8,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> List[Response[Image]]:
+        """
+        Execute request specifications concurrently.
+
+        Equal specifications are executed only once and share their response.
+
+        :param specs: The requests to execute.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls; calls that have not
+            started yet are skipped (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The responses, in the order of ``specs``.
+        :rtype: List[:class:`Response`[:class:`Image`]]
+        :raises ValidationError: If a catalog is configured and any request
+            breaks a constraint. Nothing is sent then.
+        """
+        specs = list(specs)
+        if self.__catalog is not None:
+            self.__catalog.validate(specs)
+        unique = list(dict.fromkeys(specs))
+
+        def run(spec: RequestSpec) -> Response[Image]:
+            return self.submit(spec, priority=priority, cancellation=cancellation)
+
+        with span("imagine.submit_many", {"imagine.request.count": len(unique)}):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                responses = dict(zip(unique, executor.map(bind(run), unique)))
+
+        return [responses[spec] for spec in specs]
+
+    def submit_iter(
+        self,
+        specs: Iterable[RequestSpec],
+        *,
+        max_workers: int = 8,
+        window: Optional[int] = None,
+        ordered: bool = True,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Iterator[Tuple[RequestSpec, Response[Image]]]:
+        """
+        Execute request specifications concurrently while streaming them in
+        and the responses out.
+
+        Unlike :meth:`submit_many`, the specifications are consumed lazily,
+        at most ``window`` at a time, so a generator of millions of them,
+        e.g. from :meth:`PromptTemplate.specs`, runs in constant memory.
+        Specifications are neither validated as a whole nor de-duplicated;
+        with a catalog, a request breaking a constraint raises its
+        :class:`ValidationError` when its response is reached. Closing the
+        iterator early withdraws the requests that have not started.
+
+        :param specs: The requests to execute.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param window: The number of requests taken from ``specs`` ahead of
+            the responses yielded (default: twice ``max_workers``).
+        :type window: Optional[int]
+        :param ordered: Whether to yield the responses in the order of
+            ``specs`` rather than as they complete (default: True).
+        :type ordered: bool
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: Every request with its response.
+        :rtype: Iterator[Tuple[:class:`RequestSpec`, :class:`Response`[:class:`Image`]]]
+
+        Usage:
+            >>> for spec, response in client.submit_iter(template.specs(tables)):
+            ...     response.get_or_throw().as_file(f"{spec.digest}.png")
+        """
+        workers = max(1, max_workers)
+        limit = max(workers, window if window is not None else 2 * workers)
+
+        def run(spec: RequestSpec) -> Response[Image]:
+            return self.submit(spec, priority=priority, cancellation=cancellation)
+
+        run = bind(run)
+        pending: Deque[Tuple[RequestSpec, "Future[Response[Image]]"]] = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for spec in specs:
+                    pending.append((spec, executor.submit(run, spec)))
+                    while len(pending) >= limit:
+                        yield from self.__next_done(pending, ordered)
+                while pending:
+                    yield from self.__next_done(pending, ordered)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def __next_done(
+        pending: Deque[Tuple[RequestSpec, "Future[Response[Image]]"]], ordered: bool
+    ) -> Iterator[Tuple[RequestSpec, Response[Image]]]:
+        """
+        Take the next finished requests out of ``pending``: the oldest one if
+        ordered, otherwise every one done by then.
+        """
+        if ordered:
+            spec, future = pending.popleft()
+            yield spec, future.result()
+            return
+
+        wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+        done = [entry for entry in pending if entry[1].done()]
+        for entry in done:
+            pending.remove(entry)
+        for spec, future in done:
+            yield spec, future.result()
@@ -0,0 +1,10 @@
+from .cost import CostModel, default_cost_model
+from .planner import BatchPlan, CreditPlanner, PlannedBatch
+
+__all__ = [
+    "CostModel",
+    "default_cost_model",
+    "BatchPlan",
+    "CreditPlanner",
+    "PlannedBatch",
+]
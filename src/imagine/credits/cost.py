@@ -0,0 +1,118 @@
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+from ..specs.request import RequestSpec
+
+
+_OPERATIONS = (
+    "generations",
+    "image_remix",
+    "super_resolution",
+    "variations",
+    "in_painting",
+)
+
+
+class CostModel:
+    """
+    Estimate the credits a request specification costs.
+
+    An operation has a base cost, multiplied by a factor for every argument
+    value that makes it more or less expensive, e.g. ``high_res_results``.
+    Factors are looked up by the argument's value; enums match by member or
+    by value.
+
+    Usage:
+        >>> model = CostModel()
+        >>> model.register("generations", 1.0, factors={"high_res_results": {True: 2}})
+        >>> model.estimate(GenerationsSpec("a red fox", high_res_results=True))
+        2.0
+    """
+
+    __default: float
+    __costs: Dict[str, float]
+    __factors: Dict[str, Dict[str, Dict[Any, float]]]
+
+    def __init__(self, *, default: float = 1.0) -> None:
+        """
+        :param default: The cost of operations without a registered cost
+            (default: 1).
+        :type default: float
+        """
+        self.__default = default
+        self.__costs = {}
+        self.__factors = {}
+
+    def register(
+        self,
+        operation: str,
+        cost: float,
+        *,
+        factors: Optional[Dict[str, Dict[Any, float]]] = None,
+    ) -> None:
+        """
+        Set the cost of an operation, replacing an earlier one.
+
+        :param operation: The operation, e.g. ``generations``.
+        :type operation: str
+        :param cost: The base cost in credits.
+        :type cost: float
+        :param factors: Multipliers per argument and value, e.g.
+            ``{"high_res_results": {True: 2}}`` (default: None).
+        :type factors: Optional[Dict[str, Dict[Any, float]]]
+        :raises ValueError: If the operation is unknown or the cost negative.
+        """
+        if operation not in _OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}'.")
+        if cost < 0:
+            raise ValueError(f"The cost of '{operation}' must not be negative.")
+        self.__costs[operation] = float(cost)
+        self.__factors[operation] = dict(factors or {})
+
+    def estimate(self, spec: RequestSpec) -> float:
+        """
+        Estimate the cost of one request.
+
+        :param spec: The request.
+        :type spec: :class:`RequestSpec`
+        :return: The estimated cost in credits.
+        :rtype: float
+        """
+        cost = self.__costs.get(spec.operation, self.__default)
+        for name, table in self.__factors.get(spec.operation, {}).items():
+            value = getattr(spec, name, None)
+            factor = table.get(value)
+            if factor is None and isinstance(value, Enum):
+                factor = table.get(value.value)
+            if factor is not None:
+                cost *= factor
+        return cost
+
+    def estimate_batch(self, specs: Iterable[RequestSpec]) -> List[float]:
+        """
+        Estimate the cost of every request of a batch.
+
+        :param specs: The requests.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :return: The estimated costs in credits, in order.
+        :rtype: List[float]
+        """
+        return [self.estimate(spec) for spec in specs]
+
+
+def default_cost_model() -> CostModel:
+    """
+    Build a cost model charging one credit per request and twice as much
+    for high resolution generations.
+
+    The weights are relative; register the prices of your plan to budget in
+    actual credits. The model is a new instance, so it can be changed
+    without affecting other users.
+
+    :return: The cost model.
+    :rtype: :class:`CostModel`
+    """
+    model = CostModel()
+    model.register("generations", 1.0, factors={"high_res_results": {True: 2.0}})
+    for operation in _OPERATIONS[1:]:
+        model.register(operation, 1.0)
+    return model
@@ -0,0 +1,276 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from ..client import Imagine
+from ..models.image import Image
+from ..models.response import Response
+from ..models.status import Status
+from ..specs.request import RequestSpec
+from ..utils.cancellation.token import CancellationToken
+from ..utils.tracing.span import bind, span
+from .cost import CostModel, default_cost_model
+
+
+class BatchPlan:
+    """
+    The requests of a batch that fit into the credit budget.
+
+    :param accepted: The requests to send, in dispatch order.
+    :type accepted: List[:class:`RequestSpec`]
+    :param deferred: The requests left out to stay within the budget.
+    :type deferred: List[:class:`RequestSpec`]
+    :param cost: The estimated cost of the accepted requests.
+    :type cost: float
+    :param budget: The budget the batch was planned against, or None if it is
+        unknown.
+    :type budget: Optional[float]
+    """
+
+    __slots__ = ("accepted", "deferred", "cost", "budget")
+
+    def __init__(
+        self,
+        accepted: List[RequestSpec],
+        deferred: List[RequestSpec],
+        cost: float,
+        budget: Optional[float],
+    ) -> None:
+        self.accepted = accepted
+        self.deferred = deferred
+        self.cost = cost
+        self.budget = budget
+
+    @property
+    def complete(self) -> bool:
+        """
+        :return: Whether every request of the batch fits.
+        :rtype: bool
+        """
+        return not self.deferred
+
+
+class PlannedBatch:
+    """
+    The outcome of a batch executed by :meth:`CreditPlanner.submit_many`.
+
+    :param plan: The plan the batch was executed with.
+    :type plan: :class:`BatchPlan`
+    :param responses: The response of every request, in the order of the
+        batch; None for requests that were not sent, because the plan
+        deferred them or dispatching halted.
+    :type responses: List[Optional[:class:`Response`[:class:`Image`]]]
+    :param halted: Whether dispatching stopped on ``NOT_ENOUGH_TOKENS``.
+    :type halted: bool
+    :param spent: The estimated cost of the successful requests.
+    :type spent: float
+    """
+
+    __slots__ = ("plan", "responses", "halted", "spent")
+
+    def __init__(
+        self,
+        plan: BatchPlan,
+        responses: List[Optional[Response[Image]]],
+        halted: bool,
+        spent: float,
+    ) -> None:
+        self.plan = plan
+        self.responses = responses
+        self.halted = halted
+        self.spent = spent
+
+    def unsent(self, specs: List[RequestSpec]) -> List[RequestSpec]:
+        """
+        Get the requests of the batch that were not sent, e.g. to retry them
+        once credits are topped up.
+
+        :param specs: The batch, as passed to :meth:`CreditPlanner.submit_many`.
+        :type specs: List[:class:`RequestSpec`]
+        :return: The requests without a response, in order.
+        :rtype: List[:class:`RequestSpec`]
+        """
+        return [
+            spec for spec, response in zip(specs, self.responses) if response is None
+        ]
+
+
+class CreditPlanner:
+    """
+    Plan batches against a credit budget so that they do not run out of
+    credits halfway.
+
+    Before a batch starts, the cost of every request is estimated with a
+    :class:`CostModel` and the batch is truncated to the budget: either the
+    longest prefix that fits, or as many of the cheapest requests as fit.
+    While it runs, the budget shrinks by the cost of every successful
+    request, and the first ``NOT_ENOUGH_TOKENS`` response stops dispatching:
+    requests in flight finish, the others are not sent. The budget is then
+    known to be exhausted until :meth:`set_budget` is called again.
+
+    The budget is either configured, e.g. from the balance of the account,
+    or unknown; an unknown budget accepts every request until the API
+    reports it exhausted.
+
+    Usage:
+        >>> planner = CreditPlanner(budget=500)
+        >>> batch = planner.submit_many(client, specs)
+        >>> if batch.halted:
+        ...     retry_later = batch.unsent(specs)
+    """
+
+    __model: CostModel
+    __remaining: Optional[float]
+    __lock: threading.Lock
+
+    def __init__(
+        self, *, budget: Optional[float] = None, model: Optional[CostModel] = None
+    ) -> None:
+        """
+        :param budget: The credits available, or None if unknown
+            (default: None).
+        :type budget: Optional[float]
+        :param model: The cost model (default: :func:`default_cost_model`).
+        :type model: Optional[:class:`CostModel`]
+        """
+        self.__model = model if model is not None else default_cost_model()
+        self.__remaining = budget
+        self.__lock = threading.Lock()
+
+    @property
+    def budget(self) -> Optional[float]:
+        """
+        :return: The credits believed to be left, or None if unknown.
+        :rtype: Optional[float]
+        """
+        with self.__lock:
+            return self.__remaining
+
+    def set_budget(self, budget: Optional[float]) -> None:
+        """
+        Set the credits available, e.g. after topping up the account.
+
+        :param budget: The credits available, or None if unknown.
+        :type budget: Optional[float]
+        """
+        with self.__lock:
+            self.__remaining = budget
+
+    def plan(self, specs: List[RequestSpec], *, prefer: str = "order") -> BatchPlan:
+        """
+        Select the requests of a batch that fit into the budget.
+
+        Equal requests are counted once, as they are sent once.
+
+        :param specs: The batch.
+        :type specs: List[:class:`RequestSpec`]
+        :param prefer: ``order`` to keep the longest prefix of the batch that
+            fits, or ``count`` to keep as many requests as possible, cheapest
+            first (default: order).
+        :type prefer: str
+        :return: The plan, with the accepted requests in batch order.
+        :rtype: :class:`BatchPlan`
+        :raises ValueError: If ``prefer`` is unknown.
+        """
+        if prefer not in ("order", "count"):
+            raise ValueError(f"Unknown preference '{prefer}'.")
+
+        unique = list(dict.fromkeys(specs))
+        costs = dict(zip(unique, self.__model.estimate_batch(unique)))
+        budget = self.budget
+        if budget is None:
+            return BatchPlan(unique, [], sum(costs.values()), None)
+
+        candidates = unique
+        if prefer == "count":
+            candidates = sorted(unique, key=costs.__getitem__)
+
+        accepted, total = set(), 0.0
+        for spec in candidates:
+            if total + costs[spec] > budget:
+                if prefer == "order":
+                    break
+                continue
+            accepted.add(spec)
+            total += costs[spec]
+
+        return BatchPlan(
+            [spec for spec in unique if spec in accepted],
+            [spec for spec in unique if spec not in accepted],
+            total,
+            budget,
+        )
+
+    def __record(self, spec: RequestSpec, response: Response[Image]) -> None:
+        with self.__lock:
+            if response.status == Status.NOT_ENOUGH_TOKENS:
+                self.__remaining = 0.0
+            elif response.status == Status.OK and self.__remaining is not None:
+                self.__remaining = max(
+                    0.0, self.__remaining - self.__model.estimate(spec)
+                )
+
+    def submit_many(
+        self,
+        imagine: Imagine,
+        specs: List[RequestSpec],
+        *,
+        prefer: str = "order",
+        max_workers: int = 8,
+        priority: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> PlannedBatch:
+        """
+        Plan a batch and execute the accepted requests concurrently.
+
+        :param imagine: The client executing the requests.
+        :type imagine: :class:`Imagine`
+        :param specs: The batch.
+        :type specs: List[:class:`RequestSpec`]
+        :param prefer: See :meth:`plan` (default: order).
+        :type prefer: str
+        :param max_workers: The number of requests executed concurrently
+            (default: 8).
+        :type max_workers: int
+        :param priority: The scheduler lane of the calls (default: None).
+        :type priority: Optional[str]
+        :param cancellation: A token cancelling the calls (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The plan, the responses and whether dispatching halted.
+        :rtype: :class:`PlannedBatch`
+        """
+        specs = list(specs)
+        plan = self.plan(specs, prefer=prefer)
+        halted = threading.Event()
+
+        def run(spec: RequestSpec) -> Optional[Response[Image]]:
+            if halted.is_set():
+                return None
+            response = imagine.submit(
+                spec, priority=priority, cancellation=cancellation
+            )
+            self.__record(spec, response)
+            if response.status == Status.NOT_ENOUGH_TOKENS:
+                halted.set()
+            return response
+
+        attributes = {
+            "imagine.request.count": len(plan.accepted),
+            "imagine.credits.estimate": plan.cost,
+        }
+        with span("imagine.planned_batch", attributes):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                results: Dict[Any, Optional[Response[Image]]] = dict(
+                    zip(plan.accepted, executor.map(bind(run), plan.accepted))
+                )
+
+        spent = sum(
+            self.__model.estimate(spec)
+            for spec, response in results.items()
+            if response is not None and response.status == Status.OK
+        )
+        return PlannedBatch(
+            plan,
+            [results.get(spec) for spec in specs],
+            halted.is_set(),
+            spent,
+        )
@@ -0,0 +1,11 @@
+from .hashing import dhash_batch, phash_batch, hamming_distance
+from .index import BKTree, DuplicateIndex, MultiIndexHashTable
+
+__all__ = [
+    "dhash_batch",
+    "phash_batch",
+    "hamming_distance",
+    "BKTree",
+    "DuplicateIndex",
+    "MultiIndexHashTable",
+]
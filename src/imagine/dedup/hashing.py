@@ -0,0 +1,116 @@
+from io import BytesIO
+from typing import TYPE_CHECKING, Sequence, Union
+from ..models.image import Image
+from ..utils.imports.dynamic import required_import
+
+if TYPE_CHECKING:
+    import numpy
+
+
+ImageLike = Union[Image, bytes]
+
+_HASH_SIZE = 8
+
+
+def _gray_stack(
+    images: Sequence[ImageLike], width: int, height: int
+) -> "numpy.ndarray":
+    """
+    Decode, grayscale and resize images into a ``(count, height, width)``
+    float32 array.
+    """
+    np = required_import("numpy")
+    pil_image = required_import("PIL.Image")
+
+    stack = np.empty((len(images), height, width), dtype=np.float32)
+    for i, image in enumerate(images):
+        data = image.view if isinstance(image, Image) else image
+        with pil_image.open(BytesIO(data)) as decoded:
+            # draft() lets JPEG decode at a reduced scale, which is much faster
+            decoded.draft("L", (width * 4, height * 4))
+            stack[i] = np.asarray(
+                decoded.convert("L").resize((width, height), pil_image.BILINEAR),
+                dtype=np.float32,
+            )
+    return stack
+
+
+def _pack(bits: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Pack ``(count, 64)`` boolean arrays into ``uint64`` hashes.
+    """
+    np = required_import("numpy")
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def dhash_batch(images: Sequence[ImageLike]) -> "numpy.ndarray":
+    """
+    Compute 64-bit difference hashes for a batch of images.
+
+    Each image is reduced to a 9x8 grayscale thumbnail and every bit records
+    whether a pixel is brighter than its left neighbour. The comparison runs on
+    the whole batch at once.
+
+    :param images: The images or their encoded bytes.
+    :type images: Sequence[Union[:class:`Image`, bytes]]
+    :return: The hashes as an array of ``uint64``.
+    :rtype: numpy.ndarray
+    :raises ImportError: If NumPy or Pillow is not installed.
+    """
+    gray = _gray_stack(images, _HASH_SIZE + 1, _HASH_SIZE)
+    bits = gray[:, :, 1:] > gray[:, :, :-1]
+    return _pack(bits.reshape(len(images), -1))
+
+
+def _dct_matrix(size: int) -> "numpy.ndarray":
+    np = required_import("numpy")
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return (matrix * np.sqrt(2 / size)).astype(np.float32)
+
+
+def phash_batch(images: Sequence[ImageLike]) -> "numpy.ndarray":
+    """
+    Compute 64-bit perceptual (DCT) hashes for a batch of images.
+
+    Each image is reduced to a 32x32 grayscale thumbnail and transformed with a
+    2-D DCT, computed for the whole batch as two matrix products. Every bit of
+    the hash records whether one of the 8x8 lowest frequencies lies above the
+    median of those frequencies (the DC term excluded).
+
+    :param images: The images or their encoded bytes.
+    :type images: Sequence[Union[:class:`Image`, bytes]]
+    :return: The hashes as an array of ``uint64``.
+    :rtype: numpy.ndarray
+    :raises ImportError: If NumPy or Pillow is not installed.
+    """
+    np = required_import("numpy")
+    size = _HASH_SIZE * 4
+    gray = _gray_stack(images, size, size)
+
+    dct = _dct_matrix(size)
+    coefficients = dct @ gray @ dct.T
+    low = coefficients[:, :_HASH_SIZE, :_HASH_SIZE].reshape(len(images), -1)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack(low > median)
+
+
+def hamming_distance(a: "numpy.ndarray", b: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Count the differing bits between ``uint64`` hashes, element-wise with
+    broadcasting.
+
+    :param a: The first hashes.
+    :type a: numpy.ndarray
+    :param b: The second hashes.
+    :type b: numpy.ndarray
+    :return: The number of differing bits.
+    :rtype: numpy.ndarray
+    """
+    np = required_import("numpy")
+    xor = np.bitwise_xor(
+        np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64)
+    )
+    as_bytes = np.ascontiguousarray(xor).view(np.uint8).reshape(xor.shape + (8,))
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1)
@@ -0,0 +1,323 @@
+import itertools
+import threading
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+from .hashing import ImageLike, dhash_batch, phash_batch
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+class BKTree:
+    """
+    A Burkhard-Keller tree over 64-bit hashes with the Hamming distance.
+
+    Searching for all hashes within a small distance only visits the subtrees
+    whose edge distance is compatible with the triangle inequality, which is
+    sub-linear for the small radii used in near-duplicate detection.
+    """
+
+    __root: Optional[list]
+    __size: int
+
+    def __init__(self) -> None:
+        # Nodes are [hash, keys, {distance: child}]
+        self.__root = None
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def add(self, hash_value: int, key: Hashable) -> None:
+        """
+        Insert a hash.
+
+        :param hash_value: The 64-bit hash.
+        :type hash_value: int
+        :param key: The key identifying the image with that hash.
+        :type key: Hashable
+        """
+        self.__size += 1
+        if self.__root is None:
+            self.__root = [hash_value, [key], {}]
+            return
+
+        node = self.__root
+        while True:
+            distance = _popcount(node[0] ^ hash_value)
+            if distance == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [key], {}]
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[Hashable, int]]:
+        """
+        Find all keys whose hash is within ``max_distance`` bits.
+
+        :param hash_value: The 64-bit hash to search for.
+        :type hash_value: int
+        :param max_distance: The maximum Hamming distance.
+        :type max_distance: int
+        :return: ``(key, distance)`` pairs.
+        :rtype: List[Tuple[Hashable, int]]
+        """
+        matches: List[Tuple[Hashable, int]] = []
+        stack = [self.__root] if self.__root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = _popcount(node[0] ^ hash_value)
+            if distance <= max_distance:
+                matches.extend((key, distance) for key in node[1])
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+
+class MultiIndexHashTable:
+    """
+    Near-duplicate lookup over 64-bit hashes using multi-index hashing.
+
+    Every hash is split into ``chunks`` disjoint bit ranges and indexed in one
+    exact-match table per range. Two hashes within ``d`` bits differ by at
+    most ``d // chunks`` bits in at least one range, so a query looks up every
+    value within that radius of each of its ranges and only verifies the
+    hashes found there instead of scanning all of them. Wide ranges keep the
+    buckets small, which scales to millions of hashes; the default of four
+    16-bit ranges probes 68 buckets for a distance of 7.
+    """
+
+    __max_distance: int
+    __ranges: List[Tuple[int, int]]
+    __tables: List[Dict[int, List[Tuple[int, Hashable]]]]
+    __flips: Dict[Tuple[int, int], List[int]]
+    __size: int
+
+    def __init__(self, max_distance: int, *, chunks: int = 4) -> None:
+        """
+        :param max_distance: The largest Hamming distance queries will use.
+        :type max_distance: int
+        :param chunks: The number of bit ranges indexed. Queries probe every
+            value within ``max_distance // chunks`` bits of each range, so
+            the radius should stay small (default: 4).
+        :type chunks: int
+        """
+        if not 0 <= max_distance < 64:
+            raise ValueError(
+                f"max_distance must be between 0 and 63, got {max_distance}."
+            )
+        if not 1 <= chunks <= 64:
+            raise ValueError(f"chunks must be between 1 and 64, got {chunks}.")
+
+        bounds = [round(i * 64 / chunks) for i in range(chunks + 1)]
+        self.__max_distance = max_distance
+        self.__ranges = [
+            (bounds[i], (1 << (bounds[i + 1] - bounds[i])) - 1) for i in range(chunks)
+        ]
+        self.__tables = [{} for _ in range(chunks)]
+        self.__flips = {}
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __neighbours(self, width: int, radius: int) -> List[int]:
+        # The masks flipping at most ``radius`` of ``width`` bits
+        flips = self.__flips.get((width, radius))
+        if flips is None:
+            flips = [0]
+            for count in range(1, radius + 1):
+                for bits in itertools.combinations(range(width), count):
+                    flips.append(sum(1 << bit for bit in bits))
+            self.__flips[(width, radius)] = flips
+        return flips
+
+    def add(self, hash_value: int, key: Hashable) -> None:
+        """
+        Insert a hash.
+
+        :param hash_value: The 64-bit hash.
+        :type hash_value: int
+        :param key: The key identifying the image with that hash.
+        :type key: Hashable
+        """
+        self.__size += 1
+        for (shift, mask), table in zip(self.__ranges, self.__tables):
+            chunk = (hash_value >> shift) & mask
+            table.setdefault(chunk, []).append((hash_value, key))
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[Hashable, int]]:
+        """
+        Find all keys whose hash is within ``max_distance`` bits.
+
+        :param hash_value: The 64-bit hash to search for.
+        :type hash_value: int
+        :param max_distance: The maximum Hamming distance, at most the one the
+            table was built for.
+        :type max_distance: int
+        :return: ``(key, distance)`` pairs.
+        :rtype: List[Tuple[Hashable, int]]
+        """
+        if max_distance > self.__max_distance:
+            raise ValueError(
+                f"The table supports distances up to {self.__max_distance}."
+            )
+
+        radius = max_distance // len(self.__ranges)
+        seen = set()
+        matches: List[Tuple[Hashable, int]] = []
+        for (shift, mask), table in zip(self.__ranges, self.__tables):
+            chunk = (hash_value >> shift) & mask
+            for flip in self.__neighbours(mask.bit_length(), radius):
+                for candidate, key in table.get(chunk ^ flip, ()):
+                    if (candidate, key) in seen:
+                        continue
+                    seen.add((candidate, key))
+                    distance = _popcount(candidate ^ hash_value)
+                    if distance <= max_distance:
+                        matches.append((key, distance))
+        return matches
+
+
+class DuplicateIndex:
+    """
+    Group near-identical images as they stream in.
+
+    Images are hashed in batches with :func:`dhash_batch` or
+    :func:`phash_batch`. The first image of a group becomes its representative
+    and is indexed; later images within ``max_distance`` bits of a
+    representative join its group, so callers can drop or group them before
+    storing. The index is safe to feed from multiple threads.
+
+    Usage:
+        >>> index = DuplicateIndex(max_distance=6)
+        >>> for key, response in results:
+        ...     if index.add(key, response.data) is None:
+        ...         store.put(key, response)
+    """
+
+    __method: str
+    __max_distance: int
+    __table: object
+    __groups: Dict[Hashable, List[Hashable]]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        *,
+        max_distance: int = 6,
+        method: str = "dhash",
+        backend: str = "multi_index",
+    ) -> None:
+        """
+        :param max_distance: The largest Hamming distance between the hashes of
+            two near-duplicates (default: 6).
+        :type max_distance: int
+        :param method: The hash, ``dhash`` or ``phash`` (default: ``dhash``).
+        :type method: str
+        :param backend: The lookup structure, ``multi_index`` or ``bk_tree``
+            (default: ``multi_index``).
+        :type backend: str
+        """
+        if method not in ("dhash", "phash"):
+            raise ValueError(f"Unknown hash method '{method}'.")
+        if backend == "multi_index":
+            self.__table = MultiIndexHashTable(max_distance)
+        elif backend == "bk_tree":
+            self.__table = BKTree()
+        else:
+            raise ValueError(f"Unknown index backend '{backend}'.")
+
+        self.__method = method
+        self.__max_distance = max_distance
+        self.__groups = {}
+        self.__lock = threading.Lock()
+
+    def hash(self, images: Sequence[ImageLike]) -> List[int]:
+        """
+        Hash a batch of images with the configured method.
+
+        :param images: The images or their encoded bytes.
+        :type images: Sequence[Union[:class:`Image`, bytes]]
+        :return: The 64-bit hashes.
+        :rtype: List[int]
+        """
+        if not images:
+            return []
+        hash_batch = dhash_batch if self.__method == "dhash" else phash_batch
+        hashes = hash_batch(images)
+        return [int(h) for h in hashes]
+
+    def add_batch(
+        self, keys: Sequence[Hashable], images: Sequence[ImageLike]
+    ) -> List[Optional[Hashable]]:
+        """
+        Add a batch of images, grouping each with an earlier near-duplicate.
+
+        :param keys: The keys identifying the images.
+        :type keys: Sequence[Hashable]
+        :param images: The images or their encoded bytes.
+        :type images: Sequence[Union[:class:`Image`, bytes]]
+        :return: For every image, the key of the representative it duplicates,
+            or None if it starts a new group.
+        :rtype: List[Optional[Hashable]]
+        """
+        hashes = self.hash(images)
+        results: List[Optional[Hashable]] = []
+        with self.__lock:
+            for key, hash_value in zip(keys, hashes):
+                matches = self.__table.search(hash_value, self.__max_distance)
+                if matches:
+                    representative = min(matches, key=lambda match: match[1])[0]
+                    self.__groups[representative].append(key)
+                    results.append(representative)
+                else:
+                    self.__table.add(hash_value, key)
+                    self.__groups[key] = [key]
+                    results.append(None)
+        return results
+
+    def add(self, key: Hashable, image: ImageLike) -> Optional[Hashable]:
+        """
+        Add a single image, see :meth:`add_batch`.
+
+        :param key: The key identifying the image.
+        :type key: Hashable
+        :param image: The image or its encoded bytes.
+        :type image: Union[:class:`Image`, bytes]
+        :return: The key of the representative the image duplicates, or None.
+        :rtype: Optional[Hashable]
+        """
+        return self.add_batch([key], [image])[0]
+
+    def find(self, image: ImageLike) -> List[Tuple[Hashable, int]]:
+        """
+        Find the representatives an image is a near-duplicate of, without
+        adding it.
+
+        :param image: The image or its encoded bytes.
+        :type image: Union[:class:`Image`, bytes]
+        :return: ``(representative, distance)`` pairs.
+        :rtype: List[Tuple[Hashable, int]]
+        """
+        hash_value = self.hash([image])[0]
+        with self.__lock:
+            return self.__table.search(hash_value, self.__max_distance)
+
+    def groups(self) -> Dict[Hashable, List[Hashable]]:
+        """
+        Get the groups found so far.
+
+        :return: The members of every group, keyed by representative. The
+            representative is the first member.
+        :rtype: Dict[Hashable, List[Hashable]]
+        """
+        with self.__lock:
+            return {k: list(v) for (k, v) in self.__groups.items()}
+
+    def __len__(self) -> int:
+        return len(self.__groups)
@@ -0,0 +1,11 @@
+from .broker import Broker, Message
+from .sqlite import SQLiteBroker
+from .worker import Producer, Worker
+
+__all__ = [
+    "Broker",
+    "Message",
+    "SQLiteBroker",
+    "Producer",
+    "Worker",
+]
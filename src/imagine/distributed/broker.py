@@ -0,0 +1,121 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+
+class Message:
+    """
+    A job reserved from a :class:`Broker`.
+
+    :param job_id: The id of the job.
+    :type job_id: str
+    :param payload: The serialised request, see :meth:`RequestSpec.to_json`.
+    :type payload: str
+    :param receipt: The token identifying this reservation of the job.
+    :type receipt: str
+    :param attempts: How many times the job has been reserved, this one included.
+    :type attempts: int
+    """
+
+    __slots__ = ("job_id", "payload", "receipt", "attempts")
+
+    def __init__(self, job_id: str, payload: str, receipt: str, attempts: int) -> None:
+        self.job_id = job_id
+        self.payload = payload
+        self.receipt = receipt
+        self.attempts = attempts
+
+
+class Broker(ABC):
+    """
+    Interface for work queue brokers.
+
+    Jobs follow at-least-once semantics: :meth:`reserve` hides a job for a
+    visibility timeout, and a job that is neither completed nor extended in
+    time becomes visible again and is handed to another worker. Results are
+    keyed by job id, so completing a job twice is harmless.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: str) -> str:
+        """
+        Add a job to the queue.
+
+        :param payload: The serialised request.
+        :type payload: str
+        :return: The id of the new job.
+        :rtype: str
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def reserve(self, visibility_timeout: float) -> Optional[Message]:
+        """
+        Take the oldest visible job and hide it from other workers.
+
+        :param visibility_timeout: The time the job stays hidden, in seconds.
+        :type visibility_timeout: float
+        :return: The reserved job, or None if the queue has no visible jobs.
+        :rtype: Optional[:class:`Message`]
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def extend(self, message: Message, visibility_timeout: float) -> bool:
+        """
+        Keep a reserved job hidden for longer.
+
+        :param message: The reserved job.
+        :type message: :class:`Message`
+        :param visibility_timeout: The time from now the job stays hidden.
+        :type visibility_timeout: float
+        :return: Whether the reservation was still held.
+        :rtype: bool
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def release(
+        self, message: Message, delay: float = 0.0, *, count_attempt: bool = True
+    ) -> None:
+        """
+        Give a reserved job back so it can be retried.
+
+        :param message: The reserved job.
+        :type message: :class:`Message`
+        :param delay: The time before the job becomes visible again.
+        :type delay: float
+        :param count_attempt: Whether the reservation counts as an attempt of
+            the job, False for jobs given back without being tried, e.g. on
+            cancellation (default: True).
+        :type count_attempt: bool
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def complete(self, message: Message, status: int, body: bytes) -> None:
+        """
+        Publish the result of a job and remove it from the queue.
+
+        A completion under a reservation that has expired and been taken over
+        neither removes the job nor replaces the result of the current one.
+
+        :param message: The reserved job.
+        :type message: :class:`Message`
+        :param status: The status code of the response.
+        :type status: int
+        :param body: The response content.
+        :type body: bytes
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def result(self, job_id: str) -> Optional[Tuple[int, bytes]]:
+        """
+        Get the published result of a job.
+
+        :param job_id: The id of the job.
+        :type job_id: str
+        :return: The status code and content, or None if the job is not done.
+        :rtype: Optional[Tuple[int, bytes]]
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Tuple
+from .broker import Broker, Message
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    visible_at REAL NOT NULL,
+    receipt TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (visible_at, created_at);
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    finished_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteBroker(Broker):
+    """
+    A :class:`Broker` backed by a single SQLite database file.
+
+    Every process and thread opens its own connection, so the broker can be
+    shared by producers and workers on one machine, or by several machines
+    through a shared filesystem that supports SQLite locking. It is meant for
+    tests and small deployments.
+    """
+
+    __path: str
+    __local: threading.local
+    __pid: int
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: The path of the database file. It is created if needed.
+        :type path: str
+        """
+        self.__path = path
+        self.__local = threading.local()
+        self.__pid = os.getpid()
+        self.__connection().executescript(_SCHEMA)
+
+    def __connection(self) -> sqlite3.Connection:
+        # Connections must not cross threads or be inherited through fork()
+        if self.__pid != os.getpid():
+            self.__pid = os.getpid()
+            self.__local = threading.local()
+
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.__path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.__local.connection = connection
+        return connection
+
+    def enqueue(self, payload: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.__connection().execute(
+            "INSERT INTO jobs (id, payload, visible_at, created_at)"
+            + " VALUES (?, ?, ?, ?)",
+            (job_id, payload, now, now),
+        )
+        return job_id
+
+    def reserve(self, visibility_timeout: float) -> Optional[Message]:
+        connection = self.__connection()
+        now = time.time()
+        receipt = uuid.uuid4().hex
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE visible_at <= ?"
+                + " ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            job_id, payload, attempts = row
+            connection.execute(
+                "UPDATE jobs SET visible_at = ?, receipt = ?, attempts = ?"
+                + " WHERE id = ?",
+                (now + visibility_timeout, receipt, attempts + 1, job_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return Message(job_id, payload, receipt, attempts + 1)
+
+    def extend(self, message: Message, visibility_timeout: float) -> bool:
+        cursor = self.__connection().execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND receipt = ?",
+            (time.time() + visibility_timeout, message.job_id, message.receipt),
+        )
+        return cursor.rowcount == 1
+
+    def release(
+        self, message: Message, delay: float = 0.0, *, count_attempt: bool = True
+    ) -> None:
+        self.__connection().execute(
+            "UPDATE jobs SET visible_at = ?, receipt = NULL, attempts = ?"
+            + " WHERE id = ? AND receipt = ?",
+            (
+                time.time() + delay,
+                message.attempts if count_attempt else message.attempts - 1,
+                message.job_id,
+                message.receipt,
+            ),
+        )
+
+    def complete(self, message: Message, status: int, body: bytes) -> None:
+        connection = self.__connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute(
+                "DELETE FROM jobs WHERE id = ? AND receipt = ?",
+                (message.job_id, message.receipt),
+            ).rowcount
+            # A lease that expired meanwhile must not overwrite the result of
+            # the worker holding the job now; it only fills in a missing one
+            verb = "INSERT OR REPLACE" if deleted else "INSERT OR IGNORE"
+            connection.execute(
+                verb + " INTO results (id, status, body, finished_at)"
+                + " VALUES (?, ?, ?, ?)",
+                (message.job_id, status, body, time.time()),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def result(self, job_id: str) -> Optional[Tuple[int, bytes]]:
+        row = self.__connection().execute(
+            "SELECT status, body FROM results WHERE id = ?", (job_id,)
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row is not None else None
+
+    def pending(self) -> int:
+        """
+        :return: The number of jobs not completed yet, reserved ones included.
+        :rtype: int
+        """
+        row = self.__connection().execute("SELECT COUNT(*) FROM jobs").fetchone()
+        return row[0]
@@ -0,0 +1,323 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from ..client import Imagine
+from ..models.image import Image
+from ..models.response import Response
+from ..models.status import Status
+from ..specs.request import RequestSpec
+from ..utils.cancellation.token import CancellationToken, CancelledError
+from ..utils.file.read import load_image_source
+from ..utils.tracing.span import span
+from .broker import Broker, Message
+
+# The arguments naming input images, read by the producer so that workers do
+# not need access to its filesystem
+_FILE_ARGUMENTS = ("image_path", "mask_path")
+
+
+def _transient(status: Status) -> bool:
+    # Throttled or failed on the server side, so worth another attempt
+    return status == Status.TOO_MANY_REQUESTS or 500 <= status.value < 600
+
+
+class Producer:
+    """
+    Enqueue request specifications on a :class:`Broker` and collect their
+    results.
+
+    Input images given as paths are read when the job is submitted and travel
+    with it, so workers on other machines do not need the producer's files.
+    With ``embed_files=False`` the paths are sent as they are, which requires
+    every worker to see the same files at the same paths, e.g. on a shared
+    filesystem.
+
+    Usage:
+        >>> producer = Producer(SQLiteBroker("jobs.db"))
+        >>> job_ids = producer.submit_many(specs)
+        >>> responses = producer.wait_all(job_ids)
+    """
+
+    __broker: Broker
+    __embed_files: bool
+
+    def __init__(self, broker: Broker, *, embed_files: bool = True) -> None:
+        """
+        :param broker: The broker shared with the workers.
+        :type broker: :class:`Broker`
+        :param embed_files: Whether input images given as paths are read and
+            sent with the job (default: True).
+        :type embed_files: bool
+        """
+        self.__broker = broker
+        self.__embed_files = embed_files
+
+    def submit(self, spec: RequestSpec) -> str:
+        """
+        Enqueue a request.
+
+        :param spec: The request to execute.
+        :type spec: :class:`RequestSpec`
+        :return: The id of the job.
+        :rtype: str
+        """
+        paths = {
+            name: value
+            for (name, value) in spec.arguments().items()
+            if name in _FILE_ARGUMENTS and isinstance(value, str)
+        }
+        if self.__embed_files and paths:
+            data = spec.to_dict()
+            data.update({name: load_image_source(p) for (name, p) in paths.items()})
+            spec = RequestSpec.from_dict(data)
+        return self.__broker.enqueue(spec.to_json())
+
+    def submit_many(self, specs: Iterable[RequestSpec]) -> List[str]:
+        """
+        Enqueue several requests.
+
+        :param specs: The requests to execute.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :return: The ids of the jobs, in order.
+        :rtype: List[str]
+        """
+        return [self.submit(spec) for spec in specs]
+
+    def result(self, job_id: str) -> Optional[Response[Image]]:
+        """
+        Get the response of a job if it is done.
+
+        :param job_id: The id of the job.
+        :type job_id: str
+        :return: The response, or None if the job is not done yet.
+        :rtype: Optional[:class:`Response`[:class:`Image`]]
+        """
+        result = self.__broker.result(job_id)
+        if result is None:
+            return None
+
+        status, body = result
+        return Response(Image(body) if status == 200 else None, status)
+
+    def wait_all(
+        self,
+        job_ids: Iterable[str],
+        *,
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.5,
+    ) -> Dict[str, Optional[Response[Image]]]:
+        """
+        Wait for jobs to finish.
+
+        :param job_ids: The ids of the jobs.
+        :type job_ids: Iterable[str]
+        :param timeout: The maximum time to wait in seconds, or None to wait
+            until every job is done (default: None).
+        :type timeout: Optional[float]
+        :param poll_interval: The time between checks in seconds (default: 0.5).
+        :type poll_interval: float
+        :return: The response of every job, None for jobs still pending when
+            the timeout expired.
+        :rtype: Dict[str, Optional[:class:`Response`[:class:`Image`]]]
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        responses: Dict[str, Optional[Response[Image]]] = dict.fromkeys(job_ids)
+        while True:
+            for job_id, response in responses.items():
+                if response is None:
+                    responses[job_id] = self.result(job_id)
+            if all(r is not None for r in responses.values()):
+                return responses
+            if deadline is not None and time.monotonic() >= deadline:
+                return responses
+            time.sleep(poll_interval)
+
+
+class Worker:
+    """
+    Pull jobs from a :class:`Broker`, execute them with an :class:`Imagine`
+    instance and publish their results.
+
+    Jobs run concurrently on ``max_workers`` threads. Reservations of running
+    jobs are extended in the background, so long requests are not handed to a
+    second worker. A job whose execution raises, or that is answered with
+    ``TOO_MANY_REQUESTS`` or a server error, is released for another attempt
+    after ``retry_delay``; after ``max_attempts`` the last response, or the
+    exception as an ``INTERNAL_SERVER_ERROR``, is published as the result.
+    Other responses of the API, including errors, are published as they are.
+    Jobs interrupted by a
+    cancelled token are released at once for another worker to pick up,
+    without using up an attempt.
+
+    Usage:
+        >>> worker = Worker(Imagine(token="your-api-token"), SQLiteBroker("jobs.db"))
+        >>> worker.run()
+    """
+
+    __imagine: Imagine
+    __broker: Broker
+    __visibility_timeout: float
+    __max_workers: int
+    __poll_interval: float
+    __max_attempts: int
+    __retry_delay: float
+    __active: Dict[str, Message]
+    __retry_deadline: float
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        imagine: Imagine,
+        broker: Broker,
+        *,
+        visibility_timeout: float = 300.0,
+        max_workers: int = 4,
+        poll_interval: float = 0.5,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+    ) -> None:
+        """
+        :param imagine: The client executing the requests.
+        :type imagine: :class:`Imagine`
+        :param broker: The broker to pull jobs from.
+        :type broker: :class:`Broker`
+        :param visibility_timeout: How long a reserved job stays hidden without
+            being extended, in seconds (default: 300).
+        :type visibility_timeout: float
+        :param max_workers: The number of jobs executed concurrently
+            (default: 4).
+        :type max_workers: int
+        :param poll_interval: The time to wait when the queue is empty, in
+            seconds (default: 0.5).
+        :type poll_interval: float
+        :param max_attempts: The number of attempts for a job whose execution
+            raises (default: 3).
+        :type max_attempts: int
+        :param retry_delay: The time before a failed job is retried, in seconds
+            (default: 5).
+        :type retry_delay: float
+        """
+        self.__imagine = imagine
+        self.__broker = broker
+        self.__visibility_timeout = visibility_timeout
+        self.__max_workers = max(1, max_workers)
+        self.__poll_interval = poll_interval
+        self.__max_attempts = max_attempts
+        self.__retry_delay = retry_delay
+        self.__active = {}
+        self.__retry_deadline = float("-inf")
+        self.__lock = threading.Lock()
+
+    def __execute(
+        self, message: Message, cancellation: Optional[CancellationToken]
+    ) -> None:
+        attributes = {
+            "imagine.job_id": message.job_id,
+            "imagine.retry_count": message.attempts - 1,
+        }
+        try:
+            with span("imagine.job", attributes):
+                response = self.__imagine.submit(
+                    RequestSpec.from_json(message.payload), cancellation=cancellation
+                )
+        except CancelledError:
+            self.__broker.release(message, count_attempt=False)
+        except Exception as error:
+            if not self.__retry(message):
+                self.__broker.complete(message, 500, repr(error).encode("utf-8"))
+        else:
+            if response.status == Status.CANCELLED:
+                self.__broker.release(message, count_attempt=False)
+                return
+            if _transient(response.status) and self.__retry(message):
+                return
+
+            body = response.data.bytes if response.data is not None else b""
+            self.__broker.complete(message, response.status.value, bytes(body))
+        finally:
+            with self.__lock:
+                self.__active.pop(message.receipt, None)
+
+    def __retry(self, message: Message) -> bool:
+        if message.attempts >= self.__max_attempts:
+            return False
+        self.__broker.release(message, self.__retry_delay)
+        with self.__lock:
+            # Keeps exit_when_empty from leaving before the retry
+            self.__retry_deadline = max(
+                self.__retry_deadline, time.monotonic() + self.__retry_delay
+            )
+        return True
+
+    def __heartbeat(self, stop: threading.Event) -> None:
+        while not stop.wait(self.__visibility_timeout / 3):
+            with self.__lock:
+                messages = list(self.__active.values())
+            for message in messages:
+                self.__broker.extend(message, self.__visibility_timeout)
+
+    def run(
+        self,
+        stop: Optional[threading.Event] = None,
+        *,
+        max_jobs: Optional[int] = None,
+        exit_when_empty: bool = False,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> int:
+        """
+        Process jobs until stopped.
+
+        :param stop: An event that ends the loop when set (default: None).
+        :type stop: Optional[threading.Event]
+        :param max_jobs: The number of jobs after which to stop, or None for no
+            limit (default: None).
+        :type max_jobs: Optional[int]
+        :param exit_when_empty: Whether to stop once the queue has no visible
+            jobs, nothing is running and no job released by this worker is
+            waiting for its retry (default: False).
+        :type exit_when_empty: bool
+        :param cancellation: A token that, unlike ``stop``, also interrupts
+            the jobs in progress (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :return: The number of jobs processed.
+        :rtype: int
+        """
+        stop = stop if stop is not None else threading.Event()
+        unregister = cancellation.register(stop.set) if cancellation else None
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self.__heartbeat, args=(heartbeat_stop,), daemon=True
+        )
+        heartbeat.start()
+
+        processed = 0
+        slots = threading.Semaphore(self.__max_workers)
+        executor = ThreadPoolExecutor(max_workers=self.__max_workers)
+        try:
+            while not stop.is_set() and (max_jobs is None or processed < max_jobs):
+                slots.acquire()
+                checked = time.monotonic()
+                message = self.__broker.reserve(self.__visibility_timeout)
+                if message is None:
+                    slots.release()
+                    with self.__lock:
+                        idle = not self.__active and checked >= self.__retry_deadline
+                    if exit_when_empty and idle:
+                        break
+                    stop.wait(self.__poll_interval)
+                    continue
+
+                with self.__lock:
+                    self.__active[message.receipt] = message
+                future = executor.submit(self.__execute, message, cancellation)
+                future.add_done_callback(lambda _: slots.release())
+                processed += 1
+        finally:
+            executor.shutdown(wait=True)
+            heartbeat_stop.set()
+            heartbeat.join()
+            if unregister is not None:
+                unregister()
+
+        return processed
@@ -3,7 +3,12 @@ from ....remote.http_client import HttpClient
 from ....models.response import Response
 from ....models.image import Image
 from ....utils.error.checker import check_and_raise
-from ....utils.file.read import read_image_file_as_bytes
+from ....utils.file.read import (
+    ImageReader,
+    ImageSource,
+    load_image_source,
+    read_image_file_as_bytes,
+)
 from ....utils.parameter.checker import parameter_builder, non_optional_parameter_checker
 
 
@@ -19,19 +24,26 @@ class VariationsHandler:
     """
 
     __client: HttpClient
+    __reader: ImageReader
     __endpoint: str = "/generations/variations"
 
-    def __init__(self, client: HttpClient) -> None:
+    def __init__(
+        self, client: HttpClient, reader: Optional[ImageReader] = None
+    ) -> None:
         """
         :param client: An instance of an HTTP client used to make requests to the API.
         :type client: :class:`HttpClient`
+        :param reader: An optional function reading image files, e.g. the
+            ``read`` method of an :class:`ImageFileCache`.
+        :type reader: Optional[Callable[[str], bytes]]
         """
         self.__client = client
+        self.__reader = reader if reader is not None else read_image_file_as_bytes
 
     def __call__(
         self,
         prompt: str,
-        image_path: str,
+        image_path: ImageSource,
         style_id: int,
         *,
         seed: Optional[int] = None,
@@ -56,7 +68,7 @@ class VariationsHandler:
             negative_prompt=neg_prompt,
         )
 
-        files = {"image": read_image_file_as_bytes(image_path)}
+        files = {"image": load_image_source(image_path, self.__reader)}
 
         status_code, content = self.__client.post(
             self.__endpoint, parameters=parameters, files=files
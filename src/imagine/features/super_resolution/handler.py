@@ -1,10 +1,21 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, List, Optional, Tuple
 from ...remote.http_client import HttpClient
 from ...models.response import Response
 from ...models.image import Image
+from ...utils.cancellation.token import cancellation_scope, current_token
 from ...utils.error.checker import check_and_raise
-from ...utils.file.read import read_image_file_as_bytes
+from ...utils.file.read import (
+    ImageReader,
+    ImageSource,
+    load_image_source,
+    read_image_file_as_bytes,
+)
+from ...utils.imports.dynamic import dynamic_import
+from ...utils.tracing.span import bind
 from ...utils.parameter.checker import parameter_builder, non_optional_parameter_checker
+from .tiling import tile_grid, stitch
 
 
 class SuperResolutionHandler:
@@ -15,19 +26,41 @@ class SuperResolutionHandler:
     This class facilitates the interaction with the Imagine API to upscale
     images using super-resolution techniques, providing the image to be
     upscaled and the model version to be used.
+
+    Large images can be upscaled in tiled mode: the input is split into
+    overlapping tiles that are upscaled concurrently through the shared client
+    and stitched back together with feathered blending. Tiled mode requires
+    Pillow and NumPy. Only the colour channels are sent to the API; the
+    alpha channel of a transparent image is resized locally and put back,
+    so tiled results keep their transparency.
     """
 
     __client: HttpClient
+    __reader: ImageReader
     __endpoint: str = "/upscale/"
 
-    def __init__(self, client: HttpClient) -> None:
+    def __init__(
+        self, client: HttpClient, reader: Optional[ImageReader] = None
+    ) -> None:
         """
         :param client: An instance of an HTTP client used to make requests to the API.
         :type client: :class:`HttpClient`
+        :param reader: An optional function reading image files, e.g. the
+            ``read`` method of an :class:`ImageFileCache`.
+        :type reader: Optional[Callable[[str], bytes]]
         """
         self.__client = client
+        self.__reader = reader if reader is not None else read_image_file_as_bytes
 
-    def __call__(self, image_path: str, model_version: str) -> Response[Image]:
+    def __call__(
+        self,
+        image_path: ImageSource,
+        model_version: str,
+        *,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 32,
+        max_workers: int = 4,
+    ) -> Response[Image]:
         # Validate prompt and image_path
         error: Optional[ValueError] = non_optional_parameter_checker(
             image_path=image_path
@@ -36,7 +69,13 @@ class SuperResolutionHandler:
 
         parameters = parameter_builder(model_version=model_version)
 
-        files = {"image": read_image_file_as_bytes(image_path)}
+        image_bytes = load_image_source(image_path, self.__reader)
+        if tile_size is not None:
+            return self.__tiled(
+                image_bytes, parameters, tile_size, tile_overlap, max_workers
+            )
+
+        files = {"image": image_bytes}
 
         status_code, content = self.__client.post(self.__endpoint, parameters, files)
         if status_code != 200:
@@ -45,3 +84,94 @@ class SuperResolutionHandler:
         result = Image(content)
 
         return Response(result, status_code)
+
+    def __upscale_tile(self, tile_bytes: bytes, parameters: dict) -> Tuple[int, bytes]:
+        return self.__client.post(self.__endpoint, parameters, {"image": tile_bytes})
+
+    def __tiled(
+        self,
+        image_bytes: bytes,
+        parameters: dict,
+        tile_size: int,
+        tile_overlap: int,
+        max_workers: int,
+    ) -> Response[Image]:
+        pil_image = dynamic_import("PIL.Image")
+        np = dynamic_import("numpy")
+        if pil_image is None or np is None:
+            return Response(None, 1000)
+
+        source = pil_image.open(BytesIO(image_bytes))
+        alpha = _alpha_channel(source)
+        source = source.convert("RGB")
+        boxes = tile_grid(source.width, source.height, tile_size, tile_overlap)
+
+        # Nothing to split, send the original bytes untouched
+        if len(boxes) == 1:
+            status_code, content = self.__upscale_tile(image_bytes, parameters)
+            if status_code != 200:
+                return Response(None, status_code)
+            return Response(Image(content), status_code)
+
+        encoded: List[bytes] = []
+        for box in boxes:
+            buffer = BytesIO()
+            source.crop(box).save(buffer, format="PNG")
+            encoded.append(buffer.getvalue())
+
+        # Worker threads inherit neither the cancellation scope nor the
+        # tracing context of the caller
+        cancellation = current_token()
+
+        def upscale(tile: bytes) -> Tuple[int, bytes]:
+            with cancellation_scope(cancellation):
+                return self.__upscale_tile(tile, parameters)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(bind(upscale), encoded))
+
+        for status_code, _ in results:
+            if status_code != 200:
+                return Response(None, status_code)
+
+        # The scale factor is inferred from the first tile returned by the API
+        first = pil_image.open(BytesIO(results[0][1]))
+        left, top, right, bottom = boxes[0]
+        scale = first.width / (right - left)
+
+        def scaled(box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+            return tuple(int(round(v * scale)) for v in box)
+
+        output_boxes = [scaled(box) for box in boxes]
+        tiles = []
+        for (_, content), box in zip(results, output_boxes):
+            tile = pil_image.open(BytesIO(content)).convert("RGB")
+            expected = (box[2] - box[0], box[3] - box[1])
+            if tile.size != expected:
+                tile = tile.resize(expected)
+            tiles.append(np.asarray(tile))
+
+        size = (int(round(source.width * scale)), int(round(source.height * scale)))
+        stitched = stitch(
+            np, tiles, output_boxes, size, int(round(tile_overlap * scale))
+        )
+
+        result = pil_image.fromarray(stitched)
+        if alpha is not None:
+            result.putalpha(alpha.resize(size, pil_image.BICUBIC))
+
+        buffer = BytesIO()
+        result.save(buffer, format="PNG")
+
+        return Response(Image(buffer.getvalue()), 200)
+
+
+def _alpha_channel(image: Any) -> Optional[Any]:
+    """
+    Get the alpha channel of a PIL image, or None if it is opaque.
+    """
+    if "A" in image.getbands():
+        return image.getchannel("A")
+    if "transparency" in image.info:
+        return image.convert("RGBA").getchannel("A")
+    return None
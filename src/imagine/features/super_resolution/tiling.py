@@ -0,0 +1,141 @@
+from types import ModuleType
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy
+
+
+Box = Tuple[int, int, int, int]
+
+
+def _axis_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    """
+    Compute the start offsets of tiles along a single axis.
+
+    Tiles advance by ``tile_size - overlap`` and the last tile is aligned to
+    the end of the axis so that no tile is smaller than ``tile_size`` (unless
+    the axis itself is shorter).
+
+    :param length: The length of the axis in pixels.
+    :type length: int
+    :param tile_size: The length of a tile in pixels.
+    :type tile_size: int
+    :param overlap: The overlap between neighbouring tiles in pixels.
+    :type overlap: int
+    :return: A sorted list of tile start offsets.
+    :rtype: List[int]
+    """
+    if length <= tile_size:
+        return [0]
+
+    stride = tile_size - overlap
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: int) -> List[Box]:
+    """
+    Split an image of the given size into overlapping tiles.
+
+    :param width: The width of the image in pixels.
+    :type width: int
+    :param height: The height of the image in pixels.
+    :type height: int
+    :param tile_size: The edge length of a square tile in pixels.
+    :type tile_size: int
+    :param overlap: The overlap between neighbouring tiles in pixels.
+    :type overlap: int
+    :return: A list of ``(left, top, right, bottom)`` boxes in row-major order.
+    :rtype: List[Tuple[int, int, int, int]]
+    :raises ValueError: If the overlap is not smaller than the tile size.
+
+    Usage:
+        >>> tile_grid(1000, 600, 512, 64)
+        [(0, 0, 512, 512), (448, 0, 960, 512), (488, 0, 1000, 512), ...]
+    """
+    if tile_size <= 0 or overlap < 0 or overlap >= tile_size:
+        raise ValueError(
+            f"Invalid tiling: tile_size={tile_size}, overlap={overlap}. The overlap"
+            + " must be non-negative and smaller than the tile size."
+        )
+
+    return [
+        (left, top, min(left + tile_size, width), min(top + tile_size, height))
+        for top in _axis_starts(height, tile_size, overlap)
+        for left in _axis_starts(width, tile_size, overlap)
+    ]
+
+
+def _ramp(np: ModuleType, length: int, head: int, tail: int) -> "numpy.ndarray":
+    """
+    Build a 1-D blending ramp that rises over ``head`` pixels and falls over
+    ``tail`` pixels.
+    """
+    ramp = np.ones(length, dtype=np.float32)
+    if head > 0:
+        ramp[:head] = (np.arange(head, dtype=np.float32) + 0.5) / head
+    if tail > 0:
+        ramp[length - tail:] = np.minimum(
+            ramp[length - tail:],
+            (np.arange(tail, 0, -1, dtype=np.float32) - 0.5) / tail,
+        )
+    return ramp
+
+
+def stitch(
+    np: ModuleType,
+    tiles: Sequence["numpy.ndarray"],
+    boxes: Sequence[Box],
+    size: Tuple[int, int],
+    feather: int,
+) -> "numpy.ndarray":
+    """
+    Blend upscaled tiles into a single image using feathered weights.
+
+    Every tile is weighted by the outer product of two linear ramps that fade
+    out over ``feather`` pixels on each side facing a neighbour, so seams are
+    blended instead of cut. The accumulation is done with whole-array
+    operations and normalised by the summed weights.
+
+    :param np: The NumPy module.
+    :type np: ModuleType
+    :param tiles: The upscaled tiles as ``(height, width, channels)`` arrays.
+    :type tiles: Sequence[numpy.ndarray]
+    :param boxes: The ``(left, top, right, bottom)`` position of every tile in
+        the output image, in output pixels.
+    :type boxes: Sequence[Tuple[int, int, int, int]]
+    :param size: The ``(width, height)`` of the output image.
+    :type size: Tuple[int, int]
+    :param feather: The width of the blending ramp in output pixels.
+    :type feather: int
+    :return: The stitched image as a ``uint8`` array.
+    :rtype: numpy.ndarray
+    """
+    width, height = size
+    channels = tiles[0].shape[2]
+    canvas = np.zeros((height, width, channels), dtype=np.float32)
+    weights = np.zeros((height, width, 1), dtype=np.float32)
+
+    for tile, (left, top, right, bottom) in zip(tiles, boxes):
+        tile_width, tile_height = right - left, bottom - top
+        mask = np.outer(
+            _ramp(
+                np,
+                tile_height,
+                min(feather, tile_height) if top > 0 else 0,
+                min(feather, tile_height) if bottom < height else 0,
+            ),
+            _ramp(
+                np,
+                tile_width,
+                min(feather, tile_width) if left > 0 else 0,
+                min(feather, tile_width) if right < width else 0,
+            ),
+        )[:, :, None]
+
+        canvas[top:bottom, left:right] += tile.astype(np.float32) * mask
+        weights[top:bottom, left:right] += mask
+
+    canvas /= np.maximum(weights, 1e-6)
+    return np.clip(np.rint(canvas), 0, 255).astype(np.uint8)
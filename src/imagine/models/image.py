@@ -11,7 +11,9 @@ class Image:
     and provides methods to convert it into a PIL (Pillow) image object
     and a NumPy array.
 
-    :param data: The image data as bytes.
+    :param data: The image data as bytes. Any bytes-like object is accepted,
+        e.g. a ``memoryview`` into a memory-mapped file to avoid copying; use
+        :attr:`view` to read it without a copy.
     :type data: bytes
     """
 
@@ -25,10 +27,23 @@ class Image:
         """
         Get the image data as bytes.
 
-        :return: The image data as bytes.
+        :return: The image data as bytes, copied if the image wraps another
+            bytes-like object.
         :rtype: bytes
         """
-        return self.__data
+        if isinstance(self.__data, bytes):
+            return self.__data
+        return bytes(self.__data)
+
+    @property
+    def view(self) -> memoryview:
+        """
+        Get the image data without copying it.
+
+        :return: A view of the image data.
+        :rtype: memoryview
+        """
+        return memoryview(self.__data)
 
     def to_pil_image(self) -> "PIL.Image.Image":  # noqa: F821
         """
@@ -14,4 +14,6 @@ class Status(Enum):
     INTERNAL_SERVER_ERROR = 500
     SERVICE_UNAVAILABLE = 503
     MODULE_NOT_FOUND = 1000
+    CANCELLED = 1001
+    INCOMPLETE_RESPONSE = 1002
     NOT_ENOUGH_TOKENS = 424
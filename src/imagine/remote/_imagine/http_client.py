@@ -1,17 +1,163 @@
-from typing import Optional, Dict, Tuple, Union
+import os
+import threading
+from typing import Any, List, Optional, Dict, Tuple, Union
+from urllib.parse import urljoin
 from ..http_client import HttpClient
+from ...models.status import Status
 from ...type.multipart import Multipart
+from ...utils.cancellation.token import (
+    CancellationToken,
+    call_interruptibly,
+    current_token,
+)
+from ...utils.file.integrity import check_image_integrity
 from ...utils.imports.dynamic import dynamic_import
-from ...utils.parameter.multipart import multipart_form_builder, multipart_file_builder
+from ...utils.tracing.span import span
+from ...utils.parameter.multipart import (
+    multipart_body_builder,
+    multipart_file_builder,
+    multipart_form_builder,
+)
+
+
+class _PartsBody:
+    """
+    A request body streamed from the parts of a multipart form, so file
+    contents are sent from their own buffers instead of being copied into
+    one body. With a token, reading fails as soon as it is cancelled, which
+    aborts an upload in progress.
+    """
+
+    __slots__ = ("__parts", "__index", "__offset", "__size", "__cancellation")
+
+    def __init__(
+        self, parts: List[bytes], cancellation: Optional[CancellationToken]
+    ) -> None:
+        self.__parts = [memoryview(part) for part in parts]
+        self.__index = 0
+        self.__offset = 0
+        self.__size = sum(len(part) for part in self.__parts)
+        self.__cancellation = cancellation
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def read(self, size: int = -1) -> bytes:
+        if self.__cancellation is not None:
+            self.__cancellation.raise_if_cancelled()
+        if size is None or size < 0:
+            rest = [self.__parts[self.__index][self.__offset :]]
+            rest += self.__parts[self.__index + 1 :]
+            self.__index, self.__offset = len(self.__parts), 0
+            return b"".join(rest)
+
+        while self.__index < len(self.__parts):
+            part = self.__parts[self.__index]
+            if self.__offset < len(part):
+                chunk = part[self.__offset : self.__offset + size].tobytes()
+                self.__offset += len(chunk)
+                return chunk
+            self.__index, self.__offset = self.__index + 1, 0
+        return b""
 
 
 class RequestClient(HttpClient):
     """
     The default provided implementation of :class:HttpClient. RequestClient
     class is responsible for making HTTP POST requests to the Imagine API.
+
+    The client is safe for concurrent use. Every thread sends its requests
+    through its own ``requests.Session``, since sessions are not thread-safe,
+    but all sessions share one connection pool of up to ``pool_size``
+    connections per host, so connections are reused across threads. The
+    pool is owned by the process that created it; after ``fork()`` the child
+    transparently builds its own instead of sharing sockets with the parent.
+
+    Inside a :func:`cancellation_scope`, the upload and the download are
+    performed in blocks and abort as soon as the token is cancelled, and the
+    wait for the response headers is given up on at once.
+
+    A download is incomplete when the connection breaks off or the body is
+    shorter than its ``Content-Length``. It is then resumed with range
+    requests when the response names its resource in ``Content-Location``
+    and advertises ``Accept-Ranges: bytes``. A response that stays
+    incomplete is returned with the ``INCOMPLETE_RESPONSE`` status, unless
+    ``max_retries`` allows sending the request again. With
+    ``check_images``, successful responses must also pass
+    :func:`check_image_integrity` to count as complete.
     """
 
+    __chunk_size: int = 64 * 1024
+
     __base_url: str = "https://api.vyro.ai/v1/imagine/api"
+    __pool_size: int
+    __max_resumes: int
+    __max_retries: int
+    __check_images: bool
+    __adapter: Optional[Any]
+    __local: threading.local
+    __pid: Optional[int]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        *,
+        base_url: Optional[str] = None,
+        pool_size: int = 32,
+        max_resumes: int = 3,
+        max_retries: int = 0,
+        check_images: bool = False,
+    ) -> None:
+        """
+        :param base_url: The URL the endpoints are appended to, e.g. the one of
+            a local stub server (default: the Imagine API).
+        :type base_url: Optional[str]
+        :param pool_size: The number of connections kept open per host
+            (default: 32).
+        :type pool_size: int
+        :param max_resumes: The number of range requests resuming one
+            download (default: 3).
+        :type max_resumes: int
+        :param max_retries: The number of times a request whose response
+            could not be completed is sent again. Requests are not
+            idempotent: a request sent again is charged again (default: 0).
+        :type max_retries: int
+        :param check_images: Whether successful responses must pass
+            :func:`check_image_integrity`, which only knows the framing of
+            common formats (default: False).
+        :type check_images: bool
+        """
+        if base_url is not None:
+            self.__base_url = base_url.rstrip("/")
+        self.__pool_size = max(1, pool_size)
+        self.__max_resumes = max(0, max_resumes)
+        self.__max_retries = max(0, max_retries)
+        self.__check_images = check_images
+        self.__adapter = None
+        self.__local = threading.local()
+        self.__pid = None
+        self.__lock = threading.Lock()
+
+    def __get_session(self, requests: Any) -> Any:
+        pid = os.getpid()
+        if self.__pid != pid:
+            with self.__lock:
+                if self.__pid != pid:
+                    # The pool of the parent is neither closed nor reused
+                    # after fork(), its sockets belong to the parent
+                    self.__adapter = requests.adapters.HTTPAdapter(
+                        pool_maxsize=self.__pool_size
+                    )
+                    self.__local = threading.local()
+                    self.__pid = pid
+
+        session = getattr(self.__local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.__adapter)
+            session.mount("https://", self.__adapter)
+            self.__local.session = session
+        return session
 
     def post(
         self,
@@ -46,6 +192,178 @@ class RequestClient(HttpClient):
             file_tuple = multipart_file_builder(files)
             multipart = {**multipart, **file_tuple}
 
-        response = requests.post(url, headers=headers, files=multipart, timeout=180)
+        # The form is encoded up front so that encoding, upload and download
+        # can be told apart. The parts are streamed as they are, file
+        # contents are not copied into a single body
+        with span("imagine.encode") as encode_span:
+            parts, content_type = multipart_body_builder(multipart)
+            encode_span.set_attribute(
+                "imagine.request.size", sum(len(part) for part in parts)
+            )
+
+        final_headers = {**(headers or {}), "Content-Type": content_type}
+        cancellation = current_token()
+
+        for attempt in range(self.__max_retries + 1):
+            body = _PartsBody(parts, cancellation)
+            attributes = {"imagine.endpoint": endpoint, "imagine.attempt": attempt}
+            with span("imagine.send", attributes) as send_span:
+                # The session is looked up by the thread sending the request
+                response = call_interruptibly(
+                    lambda: self.__get_session(requests).post(
+                        url, headers=final_headers, data=body, timeout=180, stream=True
+                    ),
+                    cancellation,
+                    discard=lambda late: late.close(),
+                )
+                send_span.set_attribute("imagine.status", response.status_code)
+
+            with span("imagine.download") as download_span:
+                content, problem = self.__download(
+                    requests, response, headers, cancellation
+                )
+                if (
+                    problem is None
+                    and self.__check_images
+                    and response.status_code == 200
+                ):
+                    invalid = check_image_integrity(content)
+                    if invalid is not None:
+                        problem = f"The response is incomplete, {invalid}."
+                download_span.set_attribute("imagine.response.size", len(content))
+                if problem is not None:
+                    download_span.set_error(problem)
+
+            if problem is None:
+                return response.status_code, content
+
+        return Status.INCOMPLETE_RESPONSE.value, problem.encode("utf-8")
+
+    def __download(
+        self,
+        requests: Any,
+        response: Any,
+        headers: Optional[Dict[str, str]],
+        cancellation: Optional[CancellationToken],
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Read a response, resuming it with range requests when it breaks off.
+
+        :return: The content and why it is incomplete, None if it is not.
+        """
+        content = bytearray()
+        try:
+            error = self.__read(requests, response, content, cancellation)
+        finally:
+            response.close()
+        expected = _content_length(response)
+        resource = _resumable_resource(response)
+        validator = response.headers.get("ETag") or response.headers.get(
+            "Last-Modified"
+        )
+
+        resumes = 0
+        while True:
+            problem = _problem(content, expected, error)
+            truncated = error is not None or (
+                expected is not None and len(content) < expected
+            )
+            if (
+                problem is None
+                or not truncated
+                or resource is None
+                or resumes >= self.__max_resumes
+            ):
+                return bytes(content), problem
+
+            resumes += 1
+            range_headers = {**(headers or {}), "Range": f"bytes={len(content)}-"}
+            if validator is not None:
+                range_headers["If-Range"] = validator
+            with span("imagine.resume", {"imagine.offset": len(content)}):
+                try:
+                    ranged = call_interruptibly(
+                        lambda: self.__get_session(requests).get(
+                            resource, headers=range_headers, timeout=180, stream=True
+                        ),
+                        cancellation,
+                        discard=lambda late: late.close(),
+                    )
+                except requests.exceptions.RequestException as exception:
+                    error = exception
+                    continue
+
+                try:
+                    if ranged.status_code == 206 and _range_start(ranged) == len(
+                        content
+                    ):
+                        error = self.__read(requests, ranged, content, cancellation)
+                    elif ranged.status_code == 200:
+                        # The range was ignored or the resource changed
+                        del content[:]
+                        expected = _content_length(ranged)
+                        error = self.__read(requests, ranged, content, cancellation)
+                    else:
+                        return bytes(content), problem
+                finally:
+                    ranged.close()
+
+    def __read(
+        self,
+        requests: Any,
+        response: Any,
+        content: bytearray,
+        cancellation: Optional[CancellationToken],
+    ) -> Optional[Exception]:
+        """
+        Append the body of a response to ``content``.
+
+        :return: The error that broke the transfer off, if any.
+        """
+        try:
+            for chunk in response.iter_content(self.__chunk_size):
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+                content += chunk
+        except requests.exceptions.RequestException as exception:
+            return exception
+        return None
+
+
+def _content_length(response: Any) -> Optional[int]:
+    # The length of an encoded body says nothing about the decoded content
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _resumable_resource(response: Any) -> Optional[str]:
+    """
+    Get the URL a response can be resumed from with range requests, if the
+    server advertises one.
+    """
+    location = response.headers.get("Content-Location")
+    accept_ranges = response.headers.get("Accept-Ranges", "").lower()
+    if response.status_code != 200 or location is None or accept_ranges != "bytes":
+        return None
+    return urljoin(response.url, location)
+
+
+def _range_start(response: Any) -> Optional[int]:
+    # Content-Range: bytes <start>-<end>/<length>
+    unit, _, rest = response.headers.get("Content-Range", "").partition(" ")
+    try:
+        return int(rest.split("-", 1)[0]) if unit == "bytes" else None
+    except ValueError:
+        return None
+
 
-        return response.status_code, response.content
+def _problem(content: bytearray, expected: Optional[int], error: Any) -> Optional[str]:
+    if error is not None:
+        return f"The download broke off after {len(content)} bytes: {error}"
+    if expected is not None and len(content) != expected:
+        return f"Received {len(content)} of {expected} bytes."
+    return None
@@ -0,0 +1,173 @@
+import base64
+import gzip
+import hashlib
+import json
+import threading
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class Exchange:
+    """
+    A single recorded request/response exchange.
+
+    :param key: The request key, see :func:`request_key`.
+    :type key: str
+    :param endpoint: The API endpoint the request was made to.
+    :type endpoint: str
+    :param status: The HTTP status code of the response.
+    :type status: int
+    :param body: The response content.
+    :type body: bytes
+    :param latency: The time the request took, in seconds.
+    :type latency: float
+    """
+
+    __slots__ = ("key", "endpoint", "status", "body", "latency")
+
+    def __init__(
+        self, key: str, endpoint: str, status: int, body: bytes, latency: float
+    ) -> None:
+        self.key = key
+        self.endpoint = endpoint
+        self.status = status
+        self.body = body
+        self.latency = latency
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_key(
+    endpoint: str,
+    parameters: Dict[str, Union[int, float, str]],
+    files: Optional[Dict[str, bytes]] = None,
+) -> str:
+    """
+    Compute a stable key for a request.
+
+    Parameters are compared by their string form, as that is how they are sent
+    in the multipart body, and files are compared by their SHA-256 digest.
+    Headers are deliberately not part of the key so that tokens are never
+    written to a cassette.
+
+    :param endpoint: The API endpoint to which the request is made.
+    :type endpoint: str
+    :param parameters: The data parameters included in the request.
+    :type parameters: Dict[str, Union[int, float, str]]
+    :param files: Files uploaded along with the request.
+    :type files: Optional[Dict[str, bytes]]
+    :return: A hex digest identifying the request.
+    :rtype: str
+    """
+    canonical = json.dumps(
+        {
+            "endpoint": endpoint,
+            "parameters": {k: str(v) for (k, v) in parameters.items()},
+            "files": {k: _digest(v) for (k, v) in (files or {}).items()},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return _digest(canonical.encode("utf-8"))
+
+
+class CassetteWriter:
+    """
+    Append exchanges to a gzip compressed JSON lines cassette.
+
+    Response bodies are stored once per distinct content and referenced by
+    digest, so repeated identical responses do not grow the file. The writer
+    is safe to use from multiple threads.
+
+    :param path: The path of the cassette file.
+    :type path: str
+    """
+
+    __file: "gzip.GzipFile"
+    __lock: threading.Lock
+    __bodies: set
+
+    def __init__(self, path: str) -> None:
+        self.__file = gzip.open(path, "wt", encoding="utf-8")
+        self.__lock = threading.Lock()
+        self.__bodies = set()
+
+    def write(self, exchange: Exchange) -> None:
+        """
+        Append an exchange to the cassette.
+
+        :param exchange: The exchange to record.
+        :type exchange: :class:`Exchange`
+        """
+        body_digest = _digest(exchange.body)
+        with self.__lock:
+            if body_digest not in self.__bodies:
+                self.__bodies.add(body_digest)
+                self.__write_line(
+                    {
+                        "type": "body",
+                        "digest": body_digest,
+                        "data": base64.b64encode(exchange.body).decode("ascii"),
+                    }
+                )
+            self.__write_line(
+                {
+                    "type": "exchange",
+                    "key": exchange.key,
+                    "endpoint": exchange.endpoint,
+                    "status": exchange.status,
+                    "latency": round(exchange.latency, 6),
+                    "body": body_digest,
+                }
+            )
+
+    def __write_line(self, record: dict) -> None:
+        self.__file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        """
+        Flush and close the cassette file.
+        """
+        with self.__lock:
+            self.__file.close()
+
+
+def read_cassette(path: str) -> Iterator[Exchange]:
+    """
+    Read all exchanges from a cassette written by :class:`CassetteWriter`.
+
+    :param path: The path of the cassette file.
+    :type path: str
+    :return: An iterator over the recorded exchanges, in recording order.
+    :rtype: Iterator[:class:`Exchange`]
+    """
+    bodies: Dict[str, bytes] = {}
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            if record["type"] == "body":
+                bodies[record["digest"]] = base64.b64decode(record["data"])
+            else:
+                yield Exchange(
+                    record["key"],
+                    record["endpoint"],
+                    record["status"],
+                    bodies[record["body"]],
+                    record["latency"],
+                )
+
+
+def load_cassette(path: str) -> Dict[str, List[Exchange]]:
+    """
+    Load a cassette and group its exchanges by request key.
+
+    :param path: The path of the cassette file.
+    :type path: str
+    :return: A dictionary mapping request keys to their exchanges.
+    :rtype: Dict[str, List[:class:`Exchange`]]
+    """
+    exchanges: Dict[str, List[Exchange]] = {}
+    for exchange in read_cassette(path):
+        exchanges.setdefault(exchange.key, []).append(exchange)
+    return exchanges
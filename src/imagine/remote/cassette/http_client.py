@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from ..http_client import HttpClient
+from ...utils.cancellation.token import current_token
+from .cassette import CassetteWriter, Exchange, load_cassette, request_key
+
+
+class RecordingHttpClient(HttpClient):
+    """
+    An :class:`HttpClient` that forwards every request to another client and
+    records the exchange into a cassette file for later replay.
+
+    Request headers are never recorded. The cassette is only complete once
+    :meth:`close` has been called, which can be done by using the client as a
+    context manager.
+
+    Usage:
+        >>> with RecordingHttpClient(RequestClient(), "run.cassette") as recorder:
+        ...     client = Imagine(token="your-api-token", client=recorder)
+        ...     client.generations("a red fox in the snow")
+    """
+
+    __client: HttpClient
+    __writer: CassetteWriter
+
+    def __init__(self, client: HttpClient, path: str) -> None:
+        """
+        :param client: The client that performs the actual requests.
+        :type client: :class:`HttpClient`
+        :param path: The path of the cassette file to write.
+        :type path: str
+        """
+        self.__client = client
+        self.__writer = CassetteWriter(path)
+
+    def post(
+        self,
+        endpoint: str,
+        parameters: Dict[str, Union[int, float, str]],
+        files: Optional[Dict[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        Perform the request through the wrapped client and record it.
+
+        :param endpoint: The API endpoint to which the request is made.
+        :type endpoint: str
+        :param parameters: The data parameters to include in the request.
+        :type parameters: Dict[str, Union[int, float, str]]
+        :param files: Files to be uploaded along with the request.
+        :type files: Optional[Dict[str, bytes]]
+        :param headers: Custom headers to include in the request.
+        :type headers: Dict[str, str], optional
+        :return: A tuple containing the HTTP response status code and the
+            response content (bytes) received from the server.
+        :rtype: Tuple[int, bytes]
+        """
+        start = time.perf_counter()
+        status_code, content = self.__client.post(
+            endpoint=endpoint, parameters=parameters, files=files, headers=headers
+        )
+        latency = time.perf_counter() - start
+
+        self.__writer.write(
+            Exchange(
+                request_key(endpoint, parameters, files),
+                endpoint,
+                status_code,
+                content,
+                latency,
+            )
+        )
+        return status_code, content
+
+    def close(self) -> None:
+        """
+        Finish writing the cassette file.
+        """
+        self.__writer.close()
+
+    def __enter__(self) -> "RecordingHttpClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ReplayHttpClient(HttpClient):
+    """
+    An :class:`HttpClient` that answers requests from a cassette recorded by
+    :class:`RecordingHttpClient`, without touching the network.
+
+    When a request was recorded several times, the recorded exchanges are
+    replayed in turn. Recorded latencies are reproduced by sleeping, scaled by
+    ``latency_scale``, so throughput tests see realistic timings. The client is
+    safe to use from multiple threads.
+    """
+
+    __exchanges: Dict[str, List[Exchange]]
+    __by_endpoint: Dict[str, List[Exchange]]
+    __counters: Dict[str, int]
+    __lock: threading.Lock
+    __latency_scale: float
+    __match_endpoint: bool
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        latency_scale: float = 1.0,
+        match_endpoint: bool = False,
+    ) -> None:
+        """
+        :param path: The path of the cassette file to replay.
+        :type path: str
+        :param latency_scale: A factor applied to recorded latencies. Use 0 to
+            replay as fast as possible (default: 1.0).
+        :type latency_scale: float
+        :param match_endpoint: Whether requests that were not recorded exactly
+            are answered with any exchange recorded for the same endpoint
+            (default: False).
+        :type match_endpoint: bool
+        """
+        self.__exchanges = load_cassette(path)
+        self.__by_endpoint = {}
+        for exchanges in self.__exchanges.values():
+            for exchange in exchanges:
+                self.__by_endpoint.setdefault(exchange.endpoint, []).append(exchange)
+
+        self.__counters = {}
+        self.__lock = threading.Lock()
+        self.__latency_scale = latency_scale
+        self.__match_endpoint = match_endpoint
+
+    def post(
+        self,
+        endpoint: str,
+        parameters: Dict[str, Union[int, float, str]],
+        files: Optional[Dict[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        Answer the request with a recorded exchange.
+
+        :param endpoint: The API endpoint to which the request is made.
+        :type endpoint: str
+        :param parameters: The data parameters to include in the request.
+        :type parameters: Dict[str, Union[int, float, str]]
+        :param files: Files to be uploaded along with the request.
+        :type files: Optional[Dict[str, bytes]]
+        :param headers: Custom headers to include in the request. Ignored.
+        :type headers: Dict[str, str], optional
+        :return: A tuple containing the recorded HTTP response status code and
+            response content.
+        :rtype: Tuple[int, bytes]
+        :raises KeyError: If no matching exchange was recorded.
+        """
+        key = request_key(endpoint, parameters, files)
+        candidates = self.__exchanges.get(key)
+        if candidates is None and self.__match_endpoint:
+            key = endpoint
+            candidates = self.__by_endpoint.get(endpoint)
+        if not candidates:
+            raise KeyError(
+                f"No recorded exchange matches the request to '{endpoint}'."
+                + " Record it first or enable match_endpoint."
+            )
+
+        with self.__lock:
+            index = self.__counters.get(key, 0)
+            self.__counters[key] = index + 1
+        exchange = candidates[index % len(candidates)]
+
+        if self.__latency_scale > 0:
+            # The simulated latency is interrupted like a real request
+            delay = exchange.latency * self.__latency_scale
+            cancellation = current_token()
+            if cancellation is None:
+                time.sleep(delay)
+            elif cancellation.wait(delay):
+                cancellation.raise_if_cancelled()
+
+        return exchange.status, exchange.body
@@ -0,0 +1,25 @@
+import socket
+from urllib.parse import urlsplit
+
+
+def tcp_health_check(base_url: str, timeout: float = 2.0) -> bool:
+    """
+    Check that the host of a base URL accepts TCP connections.
+
+    The check needs no API call and no authorization, so it can run often
+    against every endpoint.
+
+    :param base_url: The base URL to check.
+    :type base_url: str
+    :param timeout: The connection timeout in seconds (default: 2).
+    :type timeout: float
+    :return: Whether a connection could be opened.
+    :rtype: bool
+    """
+    parts = urlsplit(base_url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        with socket.create_connection((parts.hostname, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from ..http_client import HttpClient
+from .._imagine.http_client import RequestClient
+from ...utils.cancellation.token import CancelledError
+from ...utils.tracing.span import span
+from .health import tcp_health_check
+from .selector import EndpointSelector
+
+
+class FailoverClient(HttpClient):
+    """
+    An implementation of :class:`HttpClient` spreading requests over several
+    base URLs, e.g. regional gateways or a caching proxy in front of the API.
+
+    Every request goes to a healthy endpoint drawn at random, weighted
+    towards the lowest latency averages, see :class:`EndpointSelector`. When
+    the endpoint raises a connection error or answers with a server error
+    (5xx), the request is sent again to the next endpoint, and so on once
+    through all of them.
+    Note that a request failing with a server error may have been processed
+    by the API all the same.
+
+    With ``health_check_interval``, every endpoint is checked in the
+    background, so endpoints are taken out of rotation before a request
+    fails on them and are put back as soon as they pass a check again. A
+    passed check does not end the cooldown of an endpoint that answered
+    with server errors, since a reachable endpoint may still be failing.
+
+    Usage:
+        >>> client = FailoverClient(
+        ...     ["https://eu.gateway.example/api", "https://us.gateway.example/api"],
+        ...     health_check_interval=10,
+        ... )
+        >>> imagine = Imagine(token="your-api-token", client=client)
+    """
+
+    __selector: EndpointSelector
+    __clients: Dict[str, HttpClient]
+    __health_check: Callable[[str], bool]
+    __health_check_interval: Optional[float]
+    __health_thread: Optional[threading.Thread]
+    __health_pid: Optional[int]
+    __stop: threading.Event
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        *,
+        client_factory: Optional[Callable[[str], HttpClient]] = None,
+        alpha: float = 0.3,
+        sharpness: float = 2.0,
+        failure_threshold: int = 1,
+        cooldown: float = 30.0,
+        health_check: Callable[[str], bool] = tcp_health_check,
+        health_check_interval: Optional[float] = None,
+    ) -> None:
+        """
+        :param base_urls: The base URLs the endpoints are appended to.
+        :type base_urls: List[str]
+        :param client_factory: A function building the client of a base URL
+            (default: a :class:`RequestClient` per base URL).
+        :type client_factory: Optional[Callable[[str], :class:`HttpClient`]]
+        :param alpha: The weight of the latest latency in the moving average
+            (default: 0.3).
+        :type alpha: float
+        :param sharpness: How strongly requests favour the fastest endpoint
+            (default: 2).
+        :type sharpness: float
+        :param failure_threshold: The number of consecutive failures taking
+            an endpoint out of rotation (default: 1).
+        :type failure_threshold: int
+        :param cooldown: The time an endpoint stays out of rotation, in
+            seconds (default: 30).
+        :type cooldown: float
+        :param health_check: A function telling whether a base URL is
+            reachable (default: :func:`tcp_health_check`).
+        :type health_check: Callable[[str], bool]
+        :param health_check_interval: The time between two health checks of
+            the endpoints in seconds, or None to check them only through the
+            requests (default: None).
+        :type health_check_interval: Optional[float]
+        :raises ValueError: If no base URL is given.
+        """
+        self.__selector = EndpointSelector(
+            base_urls,
+            alpha=alpha,
+            sharpness=sharpness,
+            failure_threshold=failure_threshold,
+            cooldown=cooldown,
+        )
+        factory = (
+            client_factory
+            if client_factory is not None
+            else lambda url: RequestClient(base_url=url)
+        )
+        self.__clients = {url: factory(url) for url in self.__selector.base_urls}
+        self.__health_check = health_check
+        self.__health_check_interval = health_check_interval
+        self.__health_thread = None
+        self.__health_pid = None
+        self.__stop = threading.Event()
+        self.__lock = threading.Lock()
+        self.__start_health_checks()
+
+    def __start_health_checks(self) -> None:
+        # Threads do not survive fork(), a child starts its own
+        if self.__health_check_interval is None or self.__stop.is_set():
+            return
+        pid = os.getpid()
+        with self.__lock:
+            if self.__health_pid == pid:
+                return
+            self.__health_pid = pid
+            self.__health_thread = threading.Thread(
+                target=self.__check_health, daemon=True
+            )
+            self.__health_thread.start()
+
+    def __check_health(self) -> None:
+        while True:
+            for url in self.__selector.base_urls:
+                if self.__stop.is_set():
+                    return
+                self.__selector.record_health(url, self.__health_check(url))
+            if self.__stop.wait(self.__health_check_interval):
+                return
+
+    def post(
+        self,
+        endpoint: str,
+        parameters: Dict[str, Union[int, float, str]],
+        files: Optional[Dict[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        Perform an HTTP POST request on the best endpoint, failing over to
+        the others on connection and server errors.
+
+        :param endpoint: The API endpoint to which the request is made.
+        :type endpoint: str
+        :param parameters: The data parameters to include in the request.
+        :type parameters: Dict[str, Union[int, float, str]]
+        :param files: Files to be uploaded along with the request.
+        :type files: Optional[Dict[str, bytes]]
+        :param headers: Custom headers to include in the request.
+        :type headers: Optional[Dict[str, str]]
+        :return: A tuple containing the HTTP response status code and the
+            response content (bytes) received from the server.
+        :rtype: Tuple[int, bytes]
+        :raises Exception: The error of the last endpoint when every endpoint
+            raised.
+        """
+        self.__start_health_checks()
+
+        response: Optional[Tuple[int, bytes]] = None
+        error: Optional[Exception] = None
+        for attempt, url in enumerate(self.__selector.ranked()):
+            attributes = {"imagine.base_url": url, "imagine.attempt": attempt}
+            with span("imagine.attempt", attributes) as attempt_span:
+                start = time.perf_counter()
+                try:
+                    status, content = self.__clients[url].post(
+                        endpoint, parameters, files=files, headers=headers
+                    )
+                except CancelledError:
+                    raise
+                except Exception as exception:
+                    attempt_span.set_error(repr(exception))
+                    self.__selector.record_failure(url)
+                    error = exception
+                    continue
+
+                attempt_span.set_attribute("imagine.status", status)
+                # Codes from 1000 on are raised by the SDK, not the server
+                if 500 <= status < 1000:
+                    self.__selector.record_failure(url)
+                    response = (status, content)
+                    continue
+
+                self.__selector.record_success(url, time.perf_counter() - start)
+                return status, content
+
+        if response is not None:
+            return response
+        raise error
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """
+        Get a snapshot of the endpoints for monitoring, see
+        :meth:`EndpointSelector.metrics`.
+
+        :return: The state of every base URL, the fastest healthy one first.
+        :rtype: List[Dict[str, Any]]
+        """
+        return self.__selector.metrics()
+
+    def close(self) -> None:
+        """
+        Stop the background health checks.
+        """
+        self.__stop.set()
+        thread = self.__health_thread
+        if thread is not None and self.__health_pid == os.getpid():
+            thread.join()
@@ -0,0 +1,248 @@
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _Endpoint:
+    """
+    The state kept for one base URL.
+    """
+
+    __slots__ = (
+        "url",
+        "latency",
+        "failures",
+        "requests",
+        "errors",
+        "down_until",
+        "tripped",
+    )
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.down_until = 0.0
+        # Whether the cooldown was started by failed requests rather than by
+        # a failed health check
+        self.tripped = False
+
+
+class EndpointSelector:
+    """
+    Rank base URLs by health and by an exponentially weighted moving average
+    (EWMA) of their latency.
+
+    Healthy endpoints come first; endpoints without a measurement yet are
+    tried before measured ones so every endpoint gets measured. Measured
+    endpoints are then drawn at random, weighted by their inverse latency
+    average raised to ``sharpness``: the fastest endpoint gets most of the
+    traffic, while slower ones keep being sampled, so an endpoint that was
+    slow once or has recovered is measured again and regains its share. An
+    endpoint is taken out of rotation for ``cooldown`` seconds
+    after ``failure_threshold`` consecutive failures, or at once when a
+    health check fails. Once the cooldown expires it is tried again, and a
+    single success makes it healthy. A passed health check only ends a
+    cooldown started by a failed health check: a reachable endpoint may
+    still answer with server errors. Endpoints out of rotation are still
+    ranked last, so a request is attempted even when every endpoint is down.
+
+    The selector is thread-safe.
+
+    Usage:
+        >>> selector = EndpointSelector(["https://eu.example", "https://us.example"])
+        >>> for url in selector.ranked():
+        ...     ...
+        >>> selector.record_success(url, 0.42)
+    """
+
+    __alpha: float
+    __sharpness: float
+    __random: random.Random
+    __failure_threshold: int
+    __cooldown: float
+    __endpoints: Dict[str, _Endpoint]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        *,
+        alpha: float = 0.3,
+        sharpness: float = 2.0,
+        failure_threshold: int = 1,
+        cooldown: float = 30.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        :param base_urls: The base URLs to choose from, in order of preference
+            while they are not measured.
+        :type base_urls: List[str]
+        :param alpha: The weight of the latest latency in the moving average,
+            between 0 and 1 (default: 0.3).
+        :type alpha: float
+        :param sharpness: The power of the inverse latency weighting the
+            random choice; 0 spreads the requests evenly, higher values send
+            more of them to the fastest endpoint (default: 2).
+        :type sharpness: float
+        :param failure_threshold: The number of consecutive failures taking an
+            endpoint out of rotation (default: 1).
+        :type failure_threshold: int
+        :param cooldown: The time an endpoint stays out of rotation, in
+            seconds (default: 30).
+        :type cooldown: float
+        :param seed: The seed of the random choice, for reproducible rankings
+            (default: None).
+        :type seed: Optional[int]
+        :raises ValueError: If no base URL is given, or ``alpha`` or
+            ``sharpness`` is out of range.
+        """
+        if not base_urls:
+            raise ValueError("At least one base URL is required.")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1].")
+        if sharpness < 0:
+            raise ValueError("sharpness must not be negative.")
+
+        self.__alpha = alpha
+        self.__sharpness = sharpness
+        self.__random = random.Random(seed)
+        self.__failure_threshold = max(1, failure_threshold)
+        self.__cooldown = cooldown
+        self.__endpoints = {}
+        for url in base_urls:
+            url = url.rstrip("/")
+            self.__endpoints.setdefault(url, _Endpoint(url))
+        self.__lock = threading.Lock()
+
+    @property
+    def base_urls(self) -> List[str]:
+        """
+        :return: The base URLs, in the order they were given.
+        :rtype: List[str]
+        """
+        return list(self.__endpoints)
+
+    def ranked(self) -> List[str]:
+        """
+        Order the base URLs for the next request.
+
+        :return: Every base URL, the preferred one first.
+        :rtype: List[str]
+        """
+        return self.__order(randomised=True)
+
+    def __order(self, randomised: bool) -> List[str]:
+        now = time.monotonic()
+        with self.__lock:
+            endpoints = list(self.__endpoints.values())
+            order = {url: index for index, url in enumerate(self.__endpoints)}
+
+            def key(endpoint: _Endpoint) -> Any:
+                down = endpoint.down_until > now
+                measured = endpoint.latency is not None
+                if not measured or down:
+                    rank = 0.0
+                elif randomised:
+                    # Weighted sampling without replacement: sorting by
+                    # -u ** (1 / weight) draws every position in proportion
+                    # to the weights of the endpoints left (Efraimidis and
+                    # Spirakis), here with weight = latency ** -sharpness
+                    latency = max(endpoint.latency, 1e-6)
+                    rank = -(self.__random.random() ** (latency**self.__sharpness))
+                else:
+                    rank = endpoint.latency
+                return (
+                    down,
+                    endpoint.down_until if down else 0.0,
+                    measured,
+                    rank,
+                    order[endpoint.url],
+                )
+
+            return [endpoint.url for endpoint in sorted(endpoints, key=key)]
+
+    def record_success(self, url: str, latency: float) -> None:
+        """
+        Record a request answered by an endpoint.
+
+        :param url: The base URL.
+        :type url: str
+        :param latency: The time the request took, in seconds.
+        :type latency: float
+        """
+        with self.__lock:
+            endpoint = self.__endpoints[url]
+            endpoint.requests += 1
+            endpoint.failures = 0
+            endpoint.down_until = 0.0
+            endpoint.tripped = False
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.__alpha * (latency - endpoint.latency)
+
+    def record_failure(self, url: str) -> None:
+        """
+        Record a connection error or a server error of an endpoint.
+
+        :param url: The base URL.
+        :type url: str
+        """
+        with self.__lock:
+            endpoint = self.__endpoints[url]
+            endpoint.requests += 1
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.failures >= self.__failure_threshold:
+                endpoint.down_until = time.monotonic() + self.__cooldown
+                endpoint.tripped = True
+
+    def record_health(self, url: str, healthy: bool) -> None:
+        """
+        Record the outcome of a health check.
+
+        A failed check takes the endpoint out of rotation; a passed check
+        puts it back unless it was taken out by failed requests.
+
+        :param url: The base URL.
+        :type url: str
+        :param healthy: Whether the endpoint passed the check.
+        :type healthy: bool
+        """
+        now = time.monotonic()
+        with self.__lock:
+            endpoint = self.__endpoints[url]
+            if endpoint.down_until <= now:
+                endpoint.tripped = False
+            if not healthy:
+                endpoint.down_until = max(endpoint.down_until, now + self.__cooldown)
+            elif not endpoint.tripped:
+                endpoint.down_until = 0.0
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """
+        Get a snapshot of the endpoints for monitoring.
+
+        :return: Per base URL, healthy ones first and then by latency
+            average: whether it is healthy, its latency average, and its
+            request, error and consecutive failure counts.
+        :rtype: List[Dict[str, Any]]
+        """
+        ranked = self.__order(randomised=False)
+        now = time.monotonic()
+        with self.__lock:
+            return [
+                {
+                    "url": url,
+                    "healthy": self.__endpoints[url].down_until <= now,
+                    "latency": self.__endpoints[url].latency,
+                    "requests": self.__endpoints[url].requests,
+                    "errors": self.__endpoints[url].errors,
+                    "failures": self.__endpoints[url].failures,
+                }
+                for url in ranked
+            ]
@@ -0,0 +1,251 @@
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from ..http_client import HttpClient
+from ...type.multipart import Multipart
+from ...utils.cancellation.token import (
+    CancellationToken,
+    call_interruptibly,
+    current_token,
+)
+from ...utils.imports.dynamic import dynamic_import
+from ...utils.tracing.span import span
+from ...utils.parameter.multipart import (
+    multipart_body_builder,
+    multipart_file_builder,
+    multipart_form_builder,
+)
+
+
+class _StreamOpening:
+    """
+    Hold a lock from the start of a request until its headers are sent, as
+    reported by the trace extension of httpcore.
+    """
+
+    __slots__ = ("__lock", "__held")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.__lock = lock
+        self.__held = False
+
+    def __enter__(self) -> "_StreamOpening":
+        self.__lock.acquire()
+        self.__held = True
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.__release()
+
+    def trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event.endswith(".send_request_headers.complete"):
+            self.__release()
+
+    def __release(self) -> None:
+        if self.__held:
+            self.__held = False
+            self.__lock.release()
+
+
+class Http2Client(HttpClient):
+    """
+    An implementation of :class:`HttpClient` multiplexing concurrent requests
+    as streams over a few HTTP/2 connections.
+
+    Where :class:`RequestClient` holds one connection per request in flight,
+    this client shares at most ``max_connections`` connections between all
+    threads, which saves handshakes and sockets at high concurrency. It
+    requires ``httpx`` with HTTP/2 support (``pip install imaginesdk[http2]``).
+
+    Like :class:`RequestClient`, the connection pool is owned by the process
+    that created it and is rebuilt in a child process after ``fork()``, and
+    uploads and downloads abort as soon as the token of the current
+    :func:`cancellation_scope` is cancelled.
+
+    httpcore opens streams without a lock, so concurrent requests could take
+    stream IDs and compress their headers out of order, which the server
+    rejects. Requests therefore open their streams one at a time; uploads
+    and the waits for the responses still run concurrently.
+
+    Usage:
+        >>> client = Imagine(token="your-api-token", http2=True)
+    """
+
+    __chunk_size: int = 64 * 1024
+
+    __base_url: str
+    __max_connections: int
+    __prior_knowledge: bool
+    __timeout: float
+    __client: Optional[Any]
+    __client_pid: Optional[int]
+    __opening: threading.Lock
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        *,
+        base_url: str = "https://api.vyro.ai/v1/imagine/api",
+        max_connections: int = 4,
+        prior_knowledge: bool = False,
+        timeout: float = 180.0,
+    ) -> None:
+        """
+        :param base_url: The URL the endpoints are appended to
+            (default: the Imagine API).
+        :type base_url: str
+        :param max_connections: The maximum number of connections the
+            requests are multiplexed over (default: 4).
+        :type max_connections: int
+        :param prior_knowledge: Whether to speak HTTP/2 without negotiating
+            it, which is required for cleartext ``http://`` servers
+            (default: False).
+        :type prior_knowledge: bool
+        :param timeout: The timeout of network operations in seconds
+            (default: 180).
+        :type timeout: float
+        """
+        self.__base_url = base_url.rstrip("/")
+        self.__max_connections = max(1, max_connections)
+        self.__prior_knowledge = prior_knowledge
+        self.__timeout = timeout
+        self.__client = None
+        self.__client_pid = None
+        self.__opening = threading.Lock()
+        self.__lock = threading.Lock()
+
+    def __get_client(self, httpx: Any) -> Any:
+        pid = os.getpid()
+        with self.__lock:
+            if self.__client is None or self.__client_pid != pid:
+                # The pool is neither closed nor reused after fork(), its
+                # sockets belong to the parent
+                self.__client = httpx.Client(
+                    http1=not self.__prior_knowledge,
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=self.__max_connections,
+                        max_keepalive_connections=self.__max_connections,
+                    ),
+                    timeout=self.__timeout,
+                )
+                self.__client_pid = pid
+                # A lock held by another thread at fork() is never released
+                self.__opening = threading.Lock()
+            return self.__client
+
+    def post(
+        self,
+        endpoint: str,
+        parameters: Dict[str, Union[int, float, str]],
+        files: Optional[Dict[str, bytes]] = None,
+        headers: Dict[str, str] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        Perform an HTTP POST request to the Imagine API over HTTP/2.
+
+        :param endpoint: The API endpoint to which the request is made.
+        :type endpoint: str
+        :param parameters: The data parameters to include in the request.
+        :type parameters: Dict[str, Union[int, float, str]]
+        :param files: Files to be uploaded along with the request.
+        :type files: Optional[Dict[str, bytes]]
+        :param headers: Custom headers to include in the request.
+        :type headers: Dict[str, str], optional
+        :return: A tuple containing the HTTP response status code and the
+            response content (bytes) received from the server.
+        :rtype: Tuple[int, bytes]
+        """
+        httpx = dynamic_import("httpx")
+        if httpx is None:
+            return (1000, b"Module httpx could not be loaded.")
+
+        try:
+            client = self.__get_client(httpx)
+        except ImportError:
+            return (1000, b"Module h2 could not be loaded.")
+
+        multipart: Multipart = multipart_form_builder(parameters)
+        if files is not None:
+            multipart = {**multipart, **multipart_file_builder(files)}
+
+        with span("imagine.encode") as encode_span:
+            parts, content_type = multipart_body_builder(multipart)
+            size = sum(len(part) for part in parts)
+            encode_span.set_attribute("imagine.request.size", size)
+
+        final_headers = {
+            **(headers or {}),
+            "Content-Type": content_type,
+            "Content-Length": str(size),
+        }
+        cancellation = current_token()
+        # The parts are streamed as they are, file contents are not copied
+        # into a single body
+        content = (
+            iter(parts)
+            if cancellation is None
+            else self.__upload(parts, cancellation)
+        )
+
+        opening = _StreamOpening(self.__opening)
+        request = client.build_request(
+            "POST",
+            self.__base_url + endpoint,
+            headers=final_headers,
+            content=content,
+            extensions={"trace": opening.trace},
+        )
+
+        def send() -> Any:
+            with opening:
+                return client.send(request, stream=True)
+
+        with span("imagine.send", {"imagine.endpoint": endpoint}) as send_span:
+            response = call_interruptibly(
+                send,
+                cancellation,
+                discard=lambda late: late.close(),
+            )
+            send_span.set_attribute("imagine.status", response.status_code)
+            send_span.set_attribute("imagine.http_version", response.http_version)
+
+        with span("imagine.download") as download_span:
+            try:
+                body = self.__download(response, cancellation)
+            finally:
+                response.close()
+            download_span.set_attribute("imagine.response.size", len(body))
+
+        return response.status_code, body
+
+    def __upload(
+        self, parts: List[bytes], cancellation: CancellationToken
+    ) -> Iterator[bytes]:
+        for part in parts:
+            view = memoryview(part)
+            for offset in range(0, len(view), self.__chunk_size):
+                cancellation.raise_if_cancelled()
+                yield view[offset : offset + self.__chunk_size].tobytes()
+
+    def __download(
+        self, response: Any, cancellation: Optional[CancellationToken]
+    ) -> bytes:
+        if cancellation is None:
+            return response.read()
+
+        content = bytearray()
+        for chunk in response.iter_bytes(self.__chunk_size):
+            cancellation.raise_if_cancelled()
+            content += chunk
+        return bytes(content)
+
+    def close(self) -> None:
+        """
+        Close the connections of the current process.
+        """
+        with self.__lock:
+            if self.__client is not None and self.__client_pid == os.getpid():
+                self.__client.close()
+            self.__client = None
+            self.__client_pid = None
@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from ...utils.cancellation.token import CancellationToken
+from .limiter import Limiter
+
+
+class AdaptiveLimiter(Limiter):
+    """
+    A :class:`Limiter` that finds the number of requests in flight on its own.
+
+    The limit follows an AIMD scheme: every successful (2xx) response received
+    while the limit is fully used raises it by ``increase / limit``, i.e. by
+    about ``increase`` per round of requests. A ``TOO_MANY_REQUESTS`` or
+    ``SERVICE_UNAVAILABLE`` response, another server error, an incomplete
+    response, a request that raised, or a latency spike multiplies it by
+    ``backoff``. A spike is a short-term latency average that exceeds the
+    long-term baseline by more than ``latency_tolerance`` times. After a cut,
+    further cuts are ignored for ``cooldown`` seconds so one overloaded round
+    only counts once. Other responses, such as client errors, leave the limit
+    unchanged.
+
+    The current limit and a bounded history of its changes are exposed through
+    :attr:`limit`, :attr:`history` and :meth:`metrics`.
+
+    Usage:
+        >>> limiter = AdaptiveLimiter(initial_limit=8, max_limit=128)
+        >>> client = Imagine(token="your-api-token", limiter=limiter)
+        >>> client.metrics()["limiter"]["limit"]
+    """
+
+    __THROTTLED = (429, 503)
+    # Server errors and responses broken off in transit
+    __FAILED = (500, 502, 504, 1002)
+
+    __limit: float
+    __min_limit: int
+    __max_limit: int
+    __increase: float
+    __backoff: float
+    __latency_tolerance: float
+    __cooldown: float
+    __in_flight: int
+    __short_latency: float
+    __long_latency: float
+    __last_cut: float
+    __history: Deque[Tuple[float, int, str]]
+    __condition: threading.Condition
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 1.0,
+        history_size: int = 256,
+    ) -> None:
+        """
+        :param initial_limit: The number of requests in flight to start with
+            (default: 4).
+        :type initial_limit: int
+        :param min_limit: The lowest limit (default: 1).
+        :type min_limit: int
+        :param max_limit: The highest limit (default: 64).
+        :type max_limit: int
+        :param increase: The additive increase per round of successful
+            requests (default: 1.0).
+        :type increase: float
+        :param backoff: The factor applied to the limit on overload
+            (default: 0.5).
+        :type backoff: float
+        :param latency_tolerance: How many times the baseline latency the
+            recent latency may reach before it counts as a spike (default: 2.0).
+        :type latency_tolerance: float
+        :param cooldown: The time after a cut during which further cuts are
+            ignored, in seconds (default: 1.0).
+        :type cooldown: float
+        :param history_size: The number of limit changes kept in
+            :attr:`history` (default: 256).
+        :type history_size: int
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "The limits must satisfy 1 <= min_limit <= initial_limit <= max_limit."
+            )
+        if not 0 < backoff < 1:
+            raise ValueError(f"The backoff must be between 0 and 1, got {backoff}.")
+
+        self.__limit = float(initial_limit)
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__increase = increase
+        self.__backoff = backoff
+        self.__latency_tolerance = latency_tolerance
+        self.__cooldown = cooldown
+        self.__in_flight = 0
+        self.__short_latency = 0.0
+        self.__long_latency = 0.0
+        self.__last_cut = float("-inf")
+        self.__history = deque([(time.time(), initial_limit, "initial")], history_size)
+        self.__condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """
+        Get the current number of requests allowed in flight.
+
+        :return: The current limit.
+        :rtype: int
+        """
+        return int(self.__limit)
+
+    @property
+    def history(self) -> List[Tuple[float, int, str]]:
+        """
+        Get the recent changes of the limit.
+
+        :return: ``(timestamp, limit, reason)`` tuples, oldest first. The reason
+            is one of ``initial``, ``increase``, ``throttled``, ``failure`` or
+            ``latency``.
+        :rtype: List[Tuple[float, int, str]]
+        """
+        with self.__condition:
+            return list(self.__history)
+
+    def __wake(self) -> None:
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def acquire(self, cancellation: Optional[CancellationToken] = None) -> None:
+        """
+        Block until fewer requests than the current limit are in flight.
+
+        :param cancellation: A token interrupting the wait when cancelled
+            (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :raises CancelledError: If the token is cancelled before a slot is
+            taken.
+        """
+        unregister = cancellation.register(self.__wake) if cancellation else None
+        try:
+            with self.__condition:
+                while self.__in_flight >= int(self.__limit):
+                    if cancellation is not None:
+                        cancellation.raise_if_cancelled()
+                    self.__condition.wait()
+                self.__in_flight += 1
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def release(self) -> None:
+        """
+        Release a slot and wake up waiting requests.
+        """
+        with self.__condition:
+            self.__in_flight = max(0, self.__in_flight - 1)
+            self.__condition.notify_all()
+
+    def __set_limit(self, limit: float, reason: str) -> None:
+        previous = int(self.__limit)
+        self.__limit = min(float(self.__max_limit), max(float(self.__min_limit), limit))
+        if int(self.__limit) != previous:
+            self.__history.append((time.time(), int(self.__limit), reason))
+
+    def __cut(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self.__last_cut >= self.__cooldown:
+            self.__last_cut = now
+            self.__set_limit(self.__limit * self.__backoff, reason)
+
+    def record(self, status_code: int, latency: float) -> None:
+        """
+        Adjust the limit according to the outcome of a request.
+
+        :param status_code: The HTTP status code of the response.
+        :type status_code: int
+        :param latency: The time the request took, in seconds.
+        :type latency: float
+        """
+        with self.__condition:
+            if status_code in self.__THROTTLED:
+                self.__cut("throttled")
+            elif status_code in self.__FAILED:
+                self.__cut("failure")
+            elif 200 <= status_code < 300:
+                if self.__long_latency == 0.0:
+                    self.__short_latency = self.__long_latency = latency
+                else:
+                    self.__short_latency += 0.2 * (latency - self.__short_latency)
+                    self.__long_latency += 0.01 * (latency - self.__long_latency)
+
+                spike = (
+                    self.__short_latency
+                    > self.__long_latency * self.__latency_tolerance
+                )
+                if spike:
+                    self.__cut("latency")
+                elif self.__in_flight >= int(self.__limit):
+                    # Only a limit that is fully used has shown it is too low
+                    self.__set_limit(
+                        self.__limit + self.__increase / max(self.__limit, 1.0),
+                        "increase",
+                    )
+
+            self.__condition.notify_all()
+
+    def record_error(self, error: Exception, latency: float) -> None:
+        """
+        Cut the limit after a request raised instead of returning a response.
+
+        :param error: The error raised by the request.
+        :type error: Exception
+        :param latency: The time until the error was raised, in seconds.
+        :type latency: float
+        """
+        with self.__condition:
+            self.__cut("failure")
+            self.__condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the limiter's state for monitoring.
+
+        :return: The current limit, its bounds, the requests in flight, the
+            latency averages and the history of limit changes.
+        :rtype: Dict[str, Any]
+        """
+        with self.__condition:
+            return {
+                "limit": int(self.__limit),
+                "min_limit": self.__min_limit,
+                "max_limit": self.__max_limit,
+                "in_flight": self.__in_flight,
+                "latency_short": self.__short_latency,
+                "latency_long": self.__long_latency,
+                "history": list(self.__history),
+            }
@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from ...utils.cancellation.token import CancellationToken
+
+
+class Limiter(ABC):
+    """
+    Interface for request limiters.
+
+    A limiter decides when a request may be sent. :meth:`acquire` blocks until
+    the request fits both the rate and the concurrency budget, and
+    :meth:`release` hands the concurrency slot back once the response has been
+    received. Limiters that adapt to the API's behaviour are told about every
+    response through :meth:`record`, and about every request that raised
+    through :meth:`record_error`.
+
+    Waiting for a slot can be interrupted with a :class:`CancellationToken`.
+    """
+
+    @abstractmethod
+    def acquire(self, cancellation: Optional[CancellationToken] = None) -> None:
+        """
+        Block until a request may be sent.
+
+        :param cancellation: A token interrupting the wait when cancelled
+            (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :raises CancelledError: If the token is cancelled before a slot is
+            taken.
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    @abstractmethod
+    def release(self) -> None:
+        """
+        Release the concurrency slot taken by :meth:`acquire`.
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def record(self, status_code: int, latency: float) -> None:
+        """
+        Report the outcome of a request sent under a slot of this limiter.
+
+        The default implementation ignores the feedback.
+
+        :param status_code: The HTTP status code of the response.
+        :type status_code: int
+        :param latency: The time the request took, in seconds.
+        :type latency: float
+        """
+
+    def record_error(self, error: Exception, latency: float) -> None:
+        """
+        Report a request sent under a slot of this limiter that raised instead
+        of returning a response, e.g. on a connection error or a timeout.
+
+        The default implementation ignores the feedback.
+
+        :param error: The error raised by the request.
+        :type error: Exception
+        :param latency: The time until the error was raised, in seconds.
+        :type latency: float
+        """
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the limiter's state for monitoring.
+
+        :return: A dictionary of metric names and values.
+        :rtype: Dict[str, Any]
+        """
+        return {}
+
+    @contextmanager
+    def slot(self, cancellation: Optional[CancellationToken] = None) -> Iterator[None]:
+        """
+        Hold a slot for the duration of a ``with`` block.
+
+        :param cancellation: A token interrupting the wait for the slot
+            (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+
+        Usage:
+            >>> with limiter.slot():
+            ...     client.post(endpoint, parameters)
+        """
+        self.acquire(cancellation)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from ...utils.cancellation.token import CancellationToken
+from .limiter import Limiter
+
+
+class LocalLimiter(Limiter):
+    """
+    A :class:`Limiter` whose budget is shared by the threads of a single
+    process.
+
+    Requests are limited by a token bucket refilled at ``rate`` requests per
+    second and by a maximum number of requests in flight. Either limit can be
+    disabled by passing None. The state is rebuilt when the limiter is used in
+    a forked child, so every process gets its own budget; use
+    :class:`SharedLimiter` to share one budget across processes.
+    """
+
+    __rate: Optional[float]
+    __burst: float
+    __max_concurrency: Optional[int]
+    __pid: int
+    __condition: threading.Condition
+    __tokens: float
+    __stamp: float
+    __in_flight: int
+
+    def __init__(
+        self,
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        """
+        :param rate: The sustained number of requests per second, or None for
+            no rate limit (default: None).
+        :type rate: Optional[float]
+        :param burst: The number of requests that may be sent at once after an
+            idle period (default: ``max(1, rate)``).
+        :type burst: Optional[int]
+        :param max_concurrency: The maximum number of requests in flight, or
+            None for no limit (default: None).
+        :type max_concurrency: Optional[int]
+        """
+        self.__rate = rate
+        self.__burst = float(burst if burst is not None else max(1.0, rate or 1.0))
+        self.__max_concurrency = max_concurrency
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.__pid = os.getpid()
+        self.__condition = threading.Condition()
+        self.__tokens = self.__burst
+        self.__stamp = time.monotonic()
+        self.__in_flight = 0
+
+    def __check_fork(self) -> None:
+        # Locks may be held by threads that do not exist in a forked child
+        if self.__pid != os.getpid():
+            self.__reset()
+
+    def __refill(self, now: float) -> None:
+        if self.__rate is not None:
+            self.__tokens = min(
+                self.__burst, self.__tokens + (now - self.__stamp) * self.__rate
+            )
+        self.__stamp = now
+
+    def __wake(self) -> None:
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def acquire(self, cancellation: Optional[CancellationToken] = None) -> None:
+        """
+        Block until a token is available and the number of requests in flight
+        is below the concurrency limit.
+
+        :param cancellation: A token interrupting the wait when cancelled
+            (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :raises CancelledError: If the token is cancelled before a slot is
+            taken.
+        """
+        self.__check_fork()
+        unregister = cancellation.register(self.__wake) if cancellation else None
+        try:
+            self.__acquire(cancellation)
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def __acquire(self, cancellation: Optional[CancellationToken]) -> None:
+        with self.__condition:
+            while True:
+                if cancellation is not None and cancellation.cancelled:
+                    # Hand a wake-up this waiter may have consumed to the next
+                    self.__condition.notify()
+                    cancellation.raise_if_cancelled()
+
+                self.__refill(time.monotonic())
+
+                if (
+                    self.__max_concurrency is not None
+                    and self.__in_flight >= self.__max_concurrency
+                ):
+                    self.__condition.wait()
+                    continue
+
+                if self.__rate is not None and self.__tokens < 1:
+                    self.__condition.wait((1 - self.__tokens) / self.__rate)
+                    continue
+
+                if self.__rate is not None:
+                    self.__tokens -= 1
+                self.__in_flight += 1
+                return
+
+    def release(self) -> None:
+        """
+        Release a concurrency slot and wake up a waiting request.
+        """
+        self.__check_fork()
+        with self.__condition:
+            self.__in_flight = max(0, self.__in_flight - 1)
+            self.__condition.notify()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the limiter's state for monitoring.
+
+        :return: The number of requests in flight and the available tokens.
+        :rtype: Dict[str, Any]
+        """
+        self.__check_fork()
+        with self.__condition:
+            self.__refill(time.monotonic())
+            return {
+                "in_flight": self.__in_flight,
+                "max_concurrency": self.__max_concurrency,
+                "tokens": self.__tokens if self.__rate is not None else None,
+            }
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, IO, Iterator, Optional
+from ...utils.cancellation.token import CancellationToken
+from .limiter import Limiter
+
+try:
+    import fcntl
+
+    def _lock(file: IO) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(file: IO) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # pragma: no cover - Windows
+    import msvcrt
+
+    def _lock(file: IO) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(file: IO) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class SharedLimiter(Limiter):
+    """
+    A :class:`Limiter` whose budget is shared by every process on a machine
+    that points at the same state file.
+
+    The token bucket and the per-process count of requests in flight are kept
+    in a small JSON file guarded by an exclusive file lock, so the limits hold
+    for all gunicorn/celery workers together instead of per process.
+
+    Concurrency is shared fairly: while several processes are waiting, each may
+    hold at most ``max_concurrency`` divided by the number of contending
+    processes, and a process may only exceed its share when nobody else is
+    waiting. Slots held by processes that died are reclaimed automatically.
+
+    Usage:
+        >>> limiter = SharedLimiter("/tmp/imagine.limiter", rate=5, max_concurrency=16)
+        >>> client = Imagine(token="your-api-token", limiter=limiter)
+    """
+
+    __path: str
+    __rate: Optional[float]
+    __burst: float
+    __max_concurrency: Optional[int]
+    __poll_interval: float
+    __waiter_ttl: float
+    __pid: int
+    __file: Optional[IO]
+    __thread_lock: threading.Lock
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        poll_interval: float = 0.02,
+    ) -> None:
+        """
+        :param path: The path of the state file shared by all processes.
+        :type path: str
+        :param rate: The sustained number of requests per second for the whole
+            machine, or None for no rate limit (default: None).
+        :type rate: Optional[float]
+        :param burst: The number of requests that may be sent at once after an
+            idle period (default: ``max(1, rate)``).
+        :type burst: Optional[int]
+        :param max_concurrency: The maximum number of requests in flight for the
+            whole machine, or None for no limit (default: None).
+        :type max_concurrency: Optional[int]
+        :param poll_interval: The time to wait between attempts when the budget
+            is exhausted, in seconds (default: 0.02).
+        :type poll_interval: float
+        """
+        self.__path = path
+        self.__rate = rate
+        self.__burst = float(burst if burst is not None else max(1.0, rate or 1.0))
+        self.__max_concurrency = max_concurrency
+        self.__poll_interval = poll_interval
+        self.__waiter_ttl = max(1.0, poll_interval * 50)
+        self.__pid = os.getpid()
+        self.__file = None
+        self.__thread_lock = threading.Lock()
+
+    @contextmanager
+    def __locked(self) -> Iterator[IO]:
+        # A forked child shares the parent's open file description and
+        # therefore its lock, so every process opens the file itself
+        if self.__file is None or self.__pid != os.getpid():
+            self.__pid = os.getpid()
+            self.__thread_lock = threading.Lock()
+            self.__file = open(self.__path, "a+")
+
+        # File locks are held per process, threads are serialised separately
+        with self.__thread_lock:
+            _lock(self.__file)
+            try:
+                yield self.__file
+            finally:
+                _unlock(self.__file)
+
+    def __read(self, file: IO) -> Dict:
+        file.seek(0)
+        content = file.read()
+        state = json.loads(content) if content else {}
+        state.setdefault("tokens", self.__burst)
+        state.setdefault("stamp", time.time())
+        state.setdefault("holders", {})
+        state.setdefault("waiters", {})
+        return state
+
+    def __write(self, file: IO, state: Dict) -> None:
+        file.seek(0)
+        file.truncate()
+        file.write(json.dumps(state, separators=(",", ":")))
+        file.flush()
+
+    def __try_acquire(self) -> Optional[float]:
+        """
+        Attempt to take a slot.
+
+        :return: None if a slot was taken, otherwise the time to wait before
+            trying again.
+        :rtype: Optional[float]
+        """
+        with self.__locked() as file:
+            state = self.__read(file)
+            now = time.time()
+            pid = str(os.getpid())
+
+            holders = {
+                p: n
+                for (p, n) in state["holders"].items()
+                if n > 0 and _is_alive(int(p))
+            }
+            waiters = {
+                p: seen
+                for (p, seen) in state["waiters"].items()
+                if now - seen < self.__waiter_ttl and p != pid and _is_alive(int(p))
+            }
+
+            if self.__rate is not None:
+                elapsed = max(0.0, now - state["stamp"])
+                state["tokens"] = min(
+                    self.__burst, state["tokens"] + elapsed * self.__rate
+                )
+            state["stamp"] = now
+
+            wait = None
+            if self.__max_concurrency is not None:
+                in_flight = sum(holders.values())
+                contenders = len(set(holders) | set(waiters) | {pid})
+                share = max(1, self.__max_concurrency // contenders)
+                if in_flight >= self.__max_concurrency or (
+                    waiters and holders.get(pid, 0) >= share
+                ):
+                    wait = self.__poll_interval
+            if wait is None and self.__rate is not None and state["tokens"] < 1:
+                wait = max(self.__poll_interval, (1 - state["tokens"]) / self.__rate)
+
+            if wait is None:
+                if self.__rate is not None:
+                    state["tokens"] -= 1
+                holders[pid] = holders.get(pid, 0) + 1
+            else:
+                waiters[pid] = now
+
+            state["holders"] = holders
+            state["waiters"] = waiters
+            self.__write(file, state)
+            return wait
+
+    def acquire(self, cancellation: Optional[CancellationToken] = None) -> None:
+        """
+        Block until the machine-wide budget allows another request from this
+        process.
+
+        :param cancellation: A token interrupting the wait when cancelled
+            (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :raises CancelledError: If the token is cancelled before a slot is
+            taken.
+        """
+        while True:
+            if cancellation is not None:
+                cancellation.raise_if_cancelled()
+            wait = self.__try_acquire()
+            if wait is None:
+                return
+            if cancellation is not None:
+                cancellation.wait(wait)
+            else:
+                time.sleep(wait)
+
+    def release(self) -> None:
+        """
+        Release a concurrency slot held by this process.
+        """
+        with self.__locked() as file:
+            state = self.__read(file)
+            pid = str(os.getpid())
+            remaining = state["holders"].get(pid, 0) - 1
+            if remaining > 0:
+                state["holders"][pid] = remaining
+            else:
+                state["holders"].pop(pid, None)
+            self.__write(file, state)
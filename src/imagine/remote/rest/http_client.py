@@ -1,6 +1,10 @@
+import time
 from typing import Optional, Dict, Tuple, Union
 from ..http_client import HttpClient
 from .._imagine.http_client import RequestClient
+from ..limiter.limiter import Limiter
+from ...utils.cancellation.token import CancelledError, current_token
+from ...utils.tracing.span import span
 
 
 class RestClient(HttpClient):
@@ -8,21 +12,35 @@ class RestClient(HttpClient):
     The RestClient class is responsible for making authenticated HTTP POST requests
     to the Imagine API using an authorization token. It does this by delegating the
     task to an internal client either passed to it during instantiation or defaulting
-    to the provided implementation
+    to the provided implementation. Requests can be throttled by an optional
+    :class:`Limiter`, which may be shared with other clients and processes.
+
+    Requests made inside a :func:`cancellation_scope` stop waiting for the
+    limiter and discard their response once the scope's token is cancelled.
     """
 
     __client: HttpClient
     __token: str
+    __limiter: Optional[Limiter]
 
-    def __init__(self, token: str, client: Optional[HttpClient] = None) -> None:
+    def __init__(
+        self,
+        token: str,
+        client: Optional[HttpClient] = None,
+        limiter: Optional[Limiter] = None,
+    ) -> None:
         """
         :param token: The authorization token used for API authentication.
         :type token: str
         :param client: An optional :class:`HttpClient` instance for making requests.
             If not provided, a default :class:`RequestClient` instance will be used.
         :type client: Optional[:class:`HttpClient`], optional
+        :param limiter: An optional :class:`Limiter` every request has to pass
+            before it is sent.
+        :type limiter: Optional[:class:`Limiter`], optional
         """
         self.__token = token
+        self.__limiter = limiter
         if client is not None:
             self.__client = client
         else:
@@ -49,11 +67,56 @@ class RestClient(HttpClient):
         :return: A tuple containing the HTTP response status code and the
             response content (bytes) received from the server.
         :rtype: Tuple[int, bytes]
+        :raises CancelledError: If the active cancellation token is cancelled.
         """
+        cancellation = current_token()
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+
         final_headers = {"Bearer": self.__token}
         if headers is not None:
             final_headers = {**final_headers, **headers}
-            
-        return self.__client.post(
-            endpoint=endpoint, parameters=parameters, files=files, headers=final_headers
-        )
+
+        attributes = {
+            "imagine.endpoint": endpoint,
+            "imagine.upload.size": sum(len(f) for f in (files or {}).values()),
+        }
+        with span("imagine.request", attributes) as request_span:
+            if self.__limiter is None:
+                status_code, content = self.__client.post(
+                    endpoint=endpoint,
+                    parameters=parameters,
+                    files=files,
+                    headers=final_headers,
+                )
+            else:
+                with span("imagine.wait", {"imagine.wait.for": "limiter"}):
+                    self.__limiter.acquire(cancellation)
+                try:
+                    start = time.perf_counter()
+                    try:
+                        status_code, content = self.__client.post(
+                            endpoint=endpoint,
+                            parameters=parameters,
+                            files=files,
+                            headers=final_headers,
+                        )
+                    except CancelledError:
+                        raise
+                    except Exception as error:
+                        latency = time.perf_counter() - start
+                        self.__limiter.record_error(error, latency)
+                        raise
+                    self.__limiter.record(status_code, time.perf_counter() - start)
+                finally:
+                    self.__limiter.release()
+
+            request_span.set_attributes(
+                {"imagine.status": status_code, "imagine.response.size": len(content)}
+            )
+            if status_code != 200:
+                request_span.set_error(f"HTTP status {status_code}")
+
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+        return status_code, content
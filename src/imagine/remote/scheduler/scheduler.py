@@ -0,0 +1,246 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+from ...utils.cancellation.token import CancellationToken
+
+
+class Lane:
+    """
+    The configuration of a priority lane of a :class:`PriorityScheduler`.
+
+    :param weight: The share of the capacity the lane receives while other
+        lanes are busy, relative to the weights of the other lanes.
+    :type weight: float
+    :param reserved: The number of slots kept free for this lane; other lanes
+        can never use them.
+    :type reserved: int
+    """
+
+    __slots__ = ("weight", "reserved")
+
+    def __init__(self, weight: float = 1.0, reserved: int = 0) -> None:
+        if weight <= 0 or reserved < 0:
+            raise ValueError(
+                f"Invalid lane: weight={weight}, reserved={reserved}. The weight"
+                + " must be positive and the reservation non-negative."
+            )
+        self.weight = weight
+        self.reserved = reserved
+
+
+class _LaneState:
+    __slots__ = ("lane", "in_flight", "waiting", "virtual_time")
+
+    def __init__(self, lane: Lane) -> None:
+        self.lane = lane
+        self.in_flight = 0
+        self.waiting: Deque["_Ticket"] = deque()
+        self.virtual_time = 0.0
+
+
+class _Ticket:
+    __slots__ = ("granted",)
+
+    def __init__(self) -> None:
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    Admission control that shares a fixed number of concurrent calls between
+    named priority lanes.
+
+    Calls wait in a FIFO queue per lane. Whenever a slot is free, the waiting
+    lane that has received the least service relative to its weight is served
+    next (weighted fair queueing), so a burst in a low-weight lane cannot
+    starve the others. Reserved slots are held back for their lane even when
+    it is idle. A call whose :class:`CancellationToken` is cancelled leaves
+    its queue right away.
+
+    Usage:
+        >>> scheduler = PriorityScheduler(
+        ...     16,
+        ...     {"interactive": Lane(weight=4, reserved=4), "bulk": Lane(weight=1)},
+        ...     default_lane="interactive",
+        ... )
+        >>> client = Imagine(token="your-api-token", scheduler=scheduler)
+        >>> client.generations("a red fox", priority="bulk")
+    """
+
+    __capacity: int
+    __lanes: Dict[str, _LaneState]
+    __default_lane: str
+    __condition: threading.Condition
+
+    def __init__(
+        self,
+        capacity: int,
+        lanes: Dict[str, Lane],
+        *,
+        default_lane: Optional[str] = None,
+    ) -> None:
+        """
+        :param capacity: The total number of calls allowed in flight.
+        :type capacity: int
+        :param lanes: The lanes by name.
+        :type lanes: Dict[str, :class:`Lane`]
+        :param default_lane: The lane used for calls without a priority
+            (default: the first lane).
+        :type default_lane: Optional[str]
+        :raises ValueError: If the reservations exceed the capacity or the
+            default lane is unknown.
+        """
+        if not lanes:
+            raise ValueError("At least one lane must be configured.")
+        if sum(lane.reserved for lane in lanes.values()) > capacity:
+            raise ValueError(f"The reserved slots exceed the capacity of {capacity}.")
+
+        self.__capacity = capacity
+        self.__lanes = {name: _LaneState(lane) for (name, lane) in lanes.items()}
+        self.__default_lane = next(iter(lanes)) if default_lane is None else default_lane
+        self.__state(self.__default_lane)
+        self.__condition = threading.Condition()
+
+    def __state(self, name: Optional[str]) -> _LaneState:
+        state = self.__lanes.get(self.__default_lane if name is None else name)
+        if state is None:
+            raise ValueError(
+                f"Unknown priority lane '{name}'. Known lanes: "
+                + ", ".join(self.__lanes)
+            )
+        return state
+
+    def __can_admit(self, state: _LaneState) -> bool:
+        in_flight = sum(s.in_flight for s in self.__lanes.values())
+        if in_flight >= self.__capacity:
+            return False
+        if state.in_flight < state.lane.reserved:
+            return True
+
+        # Unused reservations of the other lanes are not available
+        held_back = sum(
+            max(0, s.lane.reserved - s.in_flight)
+            for s in self.__lanes.values()
+            if s is not state
+        )
+        return in_flight + held_back < self.__capacity
+
+    def __dispatch(self) -> None:
+        while True:
+            candidates = [
+                s for s in self.__lanes.values() if s.waiting and self.__can_admit(s)
+            ]
+            if not candidates:
+                return
+
+            state = min(candidates, key=lambda s: s.virtual_time)
+            state.waiting.popleft().granted = True
+            state.in_flight += 1
+            state.virtual_time += 1.0 / state.lane.weight
+
+    def __wake(self) -> None:
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def acquire(
+        self,
+        lane: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Block until the lane is granted a slot.
+
+        :param lane: The name of the lane, or None for the default lane.
+        :type lane: Optional[str]
+        :param cancellation: A token withdrawing the call from the queue when
+            cancelled (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        :raises ValueError: If the lane is unknown.
+        :raises CancelledError: If the token is cancelled before a slot is
+            granted.
+        """
+        state = self.__state(lane)
+        unregister = cancellation.register(self.__wake) if cancellation else None
+        try:
+            self.__acquire(state, cancellation)
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def __acquire(
+        self, state: _LaneState, cancellation: Optional[CancellationToken]
+    ) -> None:
+        ticket = _Ticket()
+        with self.__condition:
+            if not state.waiting and state.in_flight == 0:
+                # A lane returning from idle does not get credit for the time
+                # it was idle, it joins at the pace of the busy lanes
+                busy = [
+                    s.virtual_time
+                    for s in self.__lanes.values()
+                    if s.waiting or s.in_flight
+                ]
+                if busy:
+                    state.virtual_time = max(state.virtual_time, min(busy))
+
+            state.waiting.append(ticket)
+            self.__dispatch()
+            self.__condition.notify_all()
+            while not ticket.granted:
+                if cancellation is not None and cancellation.cancelled:
+                    state.waiting.remove(ticket)
+                    self.__dispatch()
+                    self.__condition.notify_all()
+                    cancellation.raise_if_cancelled()
+                self.__condition.wait()
+
+    def release(self, lane: Optional[str] = None) -> None:
+        """
+        Return the slot taken by :meth:`acquire` and admit the next call.
+
+        :param lane: The name of the lane the slot was acquired for.
+        :type lane: Optional[str]
+        """
+        state = self.__state(lane)
+        with self.__condition:
+            state.in_flight = max(0, state.in_flight - 1)
+            self.__dispatch()
+            self.__condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the scheduler's state for monitoring.
+
+        :return: The capacity and, per lane, the calls in flight and waiting.
+        :rtype: Dict[str, Any]
+        """
+        with self.__condition:
+            return {
+                "capacity": self.__capacity,
+                "lanes": {
+                    name: {"in_flight": s.in_flight, "waiting": len(s.waiting)}
+                    for (name, s) in self.__lanes.items()
+                },
+            }
+
+    @contextmanager
+    def slot(
+        self,
+        lane: Optional[str] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Iterator[None]:
+        """
+        Hold a slot of the lane for the duration of a ``with`` block.
+
+        :param lane: The name of the lane, or None for the default lane.
+        :type lane: Optional[str]
+        :param cancellation: A token withdrawing the call from the queue when
+            cancelled (default: None).
+        :type cancellation: Optional[:class:`CancellationToken`]
+        """
+        self.acquire(lane, cancellation)
+        try:
+            yield
+        finally:
+            self.release(lane)
@@ -0,0 +1,19 @@
+from .request import (
+    RequestSpec,
+    GenerationsSpec,
+    ImageRemixSpec,
+    SuperResolutionSpec,
+    VariationsSpec,
+    InPaintingSpec,
+)
+from .template import PromptTemplate
+
+__all__ = [
+    "RequestSpec",
+    "GenerationsSpec",
+    "ImageRemixSpec",
+    "SuperResolutionSpec",
+    "VariationsSpec",
+    "InPaintingSpec",
+    "PromptTemplate",
+]
@@ -0,0 +1,404 @@
+import base64
+import hashlib
+import json
+import numbers
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from ..features.aspect_ratio import AspectRatio
+from ..features.generations.style_ids import GenerationsStyle
+from ..features.image_remix.controls import RemixControls
+from ..features.image_remix.style_ids import ImageRemixStyle
+from ..features.in_painting.style_ids import InPaintingStyle
+from ..features.super_resolution.style_ids import SuperResolutionStyle
+from ..utils.file.read import ImageSource
+
+_BINARY_TYPES = (bytes, bytearray, memoryview)
+
+
+def _normalise(kind: type, value: Any) -> Any:
+    """
+    Coerce a numeric argument to its declared type, so that e.g. ``cfg=7``
+    and ``cfg=7.0`` make equal specifications. Values that do not convert
+    exactly are kept for validation to reject.
+    """
+    if kind is bool:
+        return bool(value) if isinstance(value, numbers.Integral) else value
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        return value
+    if kind is float:
+        return float(value)
+    if isinstance(value, numbers.Integral) or float(value).is_integer():
+        return int(value)
+    return value
+
+
+def _encode_binary(data: bytes) -> Dict[str, str]:
+    return {"base64": base64.b64encode(data).decode("ascii")}
+
+
+def _hash_binary(data: bytes) -> Dict[str, str]:
+    return {"sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _decode_binary(value: Any) -> Any:
+    if isinstance(value, dict) and list(value) == ["base64"]:
+        return base64.b64decode(value["base64"])
+    return value
+
+
+class RequestSpec:
+    """
+    Base class of immutable request specifications.
+
+    A request specification captures every argument of one :class:`Imagine`
+    call as a value: it can be hashed, compared, serialised, queued, cached and
+    de-duplicated, and executed with :meth:`Imagine.submit`.
+
+    Specifications are frozen; assigning an attribute raises
+    :class:`AttributeError`. Numeric arguments are coerced to their declared
+    type, so ``cfg=7`` and ``cfg=7.0`` make equal specifications. Their
+    canonical serialisation (:meth:`to_json`) stores enums by name, images
+    given as bytes in base64, and sorts keys, so equal specifications always
+    yield the same :attr:`digest`.
+    """
+
+    __slots__ = ("_digest",)
+
+    #: The name of the :class:`Imagine` method executing the specification.
+    operation: str = ""
+    #: The argument names in declaration order.
+    _fields: Tuple[str, ...] = ()
+    #: The enum type of enum valued arguments.
+    _enums: Dict[str, Type[Enum]] = {}
+    #: The type of numeric arguments.
+    _numbers: Dict[str, type] = {}
+
+    def __init__(self, **values: Any) -> None:
+        for name in self._fields:
+            value = _decode_binary(values.get(name))
+            enum = self._enums.get(name)
+            if enum is not None and value is not None and not isinstance(value, enum):
+                value = enum[value]
+            if name in self._numbers and value is not None:
+                value = _normalise(self._numbers[name], value)
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_digest", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def arguments(self) -> Dict[str, Any]:
+        """
+        Get the keyword arguments of the :class:`Imagine` method, leaving out
+        unset optional arguments.
+
+        :return: The keyword arguments.
+        :rtype: Dict[str, Any]
+        """
+        return {
+            name: getattr(self, name)
+            for name in self._fields
+            if getattr(self, name) is not None
+        }
+
+    def __plain(self, binary: Callable[[bytes], Any]) -> Dict[str, Any]:
+        data = {}
+        for name, value in self.arguments().items():
+            if isinstance(value, Enum):
+                value = value.name
+            elif isinstance(value, _BINARY_TYPES):
+                value = binary(bytes(value))
+            data[name] = value
+        data["operation"] = self.operation
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialise the specification into a JSON compatible dictionary.
+
+        :return: The arguments, with enums replaced by their names and bytes by
+            ``{"base64": ...}``, and the ``operation``.
+        :rtype: Dict[str, Any]
+        """
+        return self.__plain(_encode_binary)
+
+    def to_json(self) -> str:
+        """
+        Serialise the specification into canonical JSON.
+
+        :return: Compact JSON with sorted keys.
+        :rtype: str
+        """
+        return json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"))
+
+    @property
+    def digest(self) -> str:
+        """
+        Get the stable content hash of the specification.
+
+        :return: The SHA-256 hex digest of the canonical JSON, in which bytes
+            are replaced by their own SHA-256 digest.
+        :rtype: str
+        """
+        if self._digest is None:
+            canonical = json.dumps(
+                self.__plain(_hash_binary), sort_keys=True, separators=(",", ":")
+            )
+            digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+            object.__setattr__(self, "_digest", digest)
+        return self._digest
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "RequestSpec":
+        """
+        Build a specification from the output of :meth:`to_dict`.
+
+        :param data: The serialised specification.
+        :type data: Dict[str, Any]
+        :return: The specification of the type named by ``operation``.
+        :rtype: :class:`RequestSpec`
+        :raises ValueError: If the operation is unknown.
+        """
+        values = dict(data)
+        operation = values.pop("operation", None)
+        spec_type = _SPEC_TYPES.get(operation)
+        if spec_type is None:
+            raise ValueError(f"Unknown request operation '{operation}'.")
+        return spec_type(**values)
+
+    @staticmethod
+    def from_json(text: str) -> "RequestSpec":
+        """
+        Build a specification from the output of :meth:`to_json`.
+
+        :param text: The serialised specification.
+        :type text: str
+        :return: The specification of the type named by ``operation``.
+        :rtype: :class:`RequestSpec`
+        """
+        return RequestSpec.from_dict(json.loads(text))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        arguments = ", ".join(f"{k}={v!r}" for (k, v) in self.arguments().items())
+        return f"{type(self).__name__}({arguments})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (RequestSpec.from_dict, (self.__plain(bytes),))
+
+
+class GenerationsSpec(RequestSpec):
+    """
+    The arguments of :meth:`Imagine.generations`.
+    """
+
+    __slots__ = (
+        "prompt",
+        "style",
+        "aspect_ratio",
+        "neg_prompt",
+        "cfg",
+        "seed",
+        "steps",
+        "high_res_results",
+    )
+
+    operation = "generations"
+    _fields = __slots__
+    _enums = {"style": GenerationsStyle, "aspect_ratio": AspectRatio}
+    _numbers = {"cfg": float, "seed": int, "steps": int, "high_res_results": bool}
+
+    def __init__(
+        self,
+        prompt: str,
+        *,
+        style: GenerationsStyle = GenerationsStyle.IMAGINE_V1,
+        aspect_ratio: AspectRatio = AspectRatio.ONE_RATIO_ONE,
+        neg_prompt: Optional[str] = None,
+        cfg: Optional[float] = None,
+        seed: Optional[int] = None,
+        steps: Optional[int] = None,
+        high_res_results: bool = False,
+    ) -> None:
+        super().__init__(
+            prompt=prompt,
+            style=style,
+            aspect_ratio=aspect_ratio,
+            neg_prompt=neg_prompt,
+            cfg=cfg,
+            seed=seed,
+            steps=steps,
+            high_res_results=high_res_results,
+        )
+
+
+class ImageRemixSpec(RequestSpec):
+    """
+    The arguments of :meth:`Imagine.image_remix`.
+    """
+
+    __slots__ = (
+        "image_path",
+        "prompt",
+        "style",
+        "control",
+        "seed",
+        "strength",
+        "steps",
+        "cfg",
+        "neg_prompt",
+    )
+
+    operation = "image_remix"
+    _fields = __slots__
+    _enums = {"style": ImageRemixStyle, "control": RemixControls}
+    _numbers = {"seed": int, "strength": int, "steps": int, "cfg": float}
+
+    def __init__(
+        self,
+        image_path: ImageSource,
+        prompt: str,
+        *,
+        style: ImageRemixStyle = ImageRemixStyle.IMAGINE_V1,
+        control: RemixControls = RemixControls.OPENPOSE,
+        seed: Optional[int] = None,
+        strength: Optional[int] = None,
+        steps: Optional[int] = None,
+        cfg: Optional[float] = None,
+        neg_prompt: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            image_path=image_path,
+            prompt=prompt,
+            style=style,
+            control=control,
+            seed=seed,
+            strength=strength,
+            steps=steps,
+            cfg=cfg,
+            neg_prompt=neg_prompt,
+        )
+
+
+class SuperResolutionSpec(RequestSpec):
+    """
+    The arguments of :meth:`Imagine.super_resolution`.
+    """
+
+    __slots__ = ("image_path", "style", "tile_size", "tile_overlap", "max_workers")
+
+    operation = "super_resolution"
+    _fields = __slots__
+    _enums = {"style": SuperResolutionStyle}
+    _numbers = {"tile_size": int, "tile_overlap": int, "max_workers": int}
+
+    def __init__(
+        self,
+        image_path: ImageSource,
+        *,
+        style: SuperResolutionStyle = SuperResolutionStyle.BASIC,
+        tile_size: Optional[int] = None,
+        tile_overlap: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            image_path=image_path,
+            style=style,
+            tile_size=tile_size,
+            tile_overlap=tile_overlap,
+            max_workers=max_workers,
+        )
+
+
+class VariationsSpec(RequestSpec):
+    """
+    The arguments of :meth:`Imagine.variations`.
+    """
+
+    __slots__ = (
+        "image_path",
+        "prompt",
+        "style",
+        "seed",
+        "steps",
+        "strength",
+        "cfg",
+        "neg_prompt",
+    )
+
+    operation = "variations"
+    _fields = __slots__
+    _enums = {"style": GenerationsStyle}
+    _numbers = {"seed": int, "steps": int, "strength": int, "cfg": float}
+
+    def __init__(
+        self,
+        image_path: ImageSource,
+        prompt: str,
+        *,
+        style: GenerationsStyle = GenerationsStyle.IMAGINE_V1,
+        seed: Optional[int] = None,
+        steps: Optional[int] = None,
+        strength: Optional[int] = None,
+        cfg: Optional[float] = None,
+        neg_prompt: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            image_path=image_path,
+            prompt=prompt,
+            style=style,
+            seed=seed,
+            steps=steps,
+            strength=strength,
+            cfg=cfg,
+            neg_prompt=neg_prompt,
+        )
+
+
+class InPaintingSpec(RequestSpec):
+    """
+    The arguments of :meth:`Imagine.in_painting`.
+    """
+
+    __slots__ = ("image_path", "mask_path", "prompt", "style")
+
+    operation = "in_painting"
+    _fields = __slots__
+    _enums = {"style": InPaintingStyle}
+
+    def __init__(
+        self,
+        image_path: ImageSource,
+        mask_path: ImageSource,
+        prompt: str,
+        *,
+        style: InPaintingStyle = InPaintingStyle.BASIC,
+    ) -> None:
+        super().__init__(
+            image_path=image_path,
+            mask_path=mask_path,
+            prompt=prompt,
+            style=style,
+        )
+
+
+_SPEC_TYPES: Dict[str, Type[RequestSpec]] = {
+    spec_type.operation: spec_type
+    for spec_type in (
+        GenerationsSpec,
+        ImageRemixSpec,
+        SuperResolutionSpec,
+        VariationsSpec,
+        InPaintingSpec,
+    )
+}
@@ -0,0 +1,261 @@
+import hashlib
+import itertools
+import math
+import random
+from string import Formatter
+from typing import Any, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+from .request import GenerationsSpec
+
+
+def _sample(total: int, fraction: float, seed: int) -> Iterator[int]:
+    """
+    Yield the indices below ``total`` kept by Bernoulli sampling, jumping
+    over the others with geometrically distributed gaps.
+    """
+    generator = random.Random(seed)
+    log_skip = math.log1p(-fraction) if fraction < 1 else None
+    number = -1
+    while True:
+        number += 1
+        if log_skip is not None:
+            number += int(math.log(1.0 - generator.random()) / log_skip)
+        if number >= total:
+            return
+        yield number
+
+
+class PromptTemplate:
+    """
+    A prompt template expanded lazily over tables of variable values.
+
+    The template uses :meth:`str.format` fields naming the variables, e.g.
+    ``"{product} on {background}, {lighting}"``, and is compiled once into a
+    positional format string. Expanding it over one table of values per
+    variable yields every combination of the cartesian product, one at a
+    time: combinations are decoded from their index, so the memory used does
+    not grow with their number, and workers can sample and shard the same
+    product consistently without coordination.
+
+    Repeated values within a table are dropped before expanding, so they do
+    not yield duplicate prompts. Prompts that are equal although their values
+    differ are only suppressed with ``unique``, which remembers an 8 byte
+    digest of every prompt yielded.
+
+    Usage:
+        >>> template = PromptTemplate("{product} on {background}, {lighting}")
+        >>> specs = template.specs(tables, shard=(worker, workers), sample=0.1)
+        >>> for spec, response in client.submit_iter(specs, max_workers=16):
+        ...     response.get_or_throw().as_file(f"{spec.digest}.png")
+    """
+
+    __template: str
+    __format: str
+    __fields: Tuple[str, ...]
+
+    def __init__(self, template: str) -> None:
+        """
+        :param template: The template, with a field per variable.
+        :type template: str
+        :raises ValueError: If a field is positional, accesses an attribute or
+            an item, or has a nested format specification.
+        """
+        fields: List[str] = []
+        pieces: List[str] = []
+        for literal, name, spec, conversion in Formatter().parse(template):
+            pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+            if name is None:
+                continue
+            if not name.isidentifier():
+                raise ValueError(f"Invalid template field '{{{name}}}'.")
+            if "{" in spec:
+                raise ValueError(f"Nested format specification in '{{{name}}}'.")
+            if name not in fields:
+                fields.append(name)
+            pieces.append(
+                "{"
+                + str(fields.index(name))
+                + (f"!{conversion}" if conversion else "")
+                + (f":{spec}" if spec else "")
+                + "}"
+            )
+
+        self.__template = template
+        self.__format = "".join(pieces)
+        self.__fields = tuple(fields)
+
+    @property
+    def template(self) -> str:
+        """
+        :return: The template as given.
+        :rtype: str
+        """
+        return self.__template
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """
+        :return: The variable names, in order of first appearance.
+        :rtype: Tuple[str, ...]
+        """
+        return self.__fields
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        Fill the template with one value per variable.
+
+        :param values: The values by variable name.
+        :type values: Mapping[str, Any]
+        :return: The prompt.
+        :rtype: str
+        :raises KeyError: If a variable has no value.
+        """
+        return self.__format.format(*(values[name] for name in self.__fields))
+
+    def __tables(self, variables: Mapping[str, Sequence[Any]]) -> List[Tuple[Any, ...]]:
+        missing = [name for name in self.__fields if name not in variables]
+        unknown = [name for name in variables if name not in self.__fields]
+        if missing or unknown:
+            raise ValueError(
+                f"Template variables do not match: missing {missing},"
+                + f" unknown {unknown}."
+            )
+        # Values must be hashable to drop repeated ones
+        return [tuple(dict.fromkeys(variables[name])) for name in self.__fields]
+
+    def count(self, variables: Mapping[str, Sequence[Any]]) -> int:
+        """
+        Count the combinations of the variable values, before sampling,
+        sharding and duplicate suppression.
+
+        :param variables: The values of every variable.
+        :type variables: Mapping[str, Sequence[Any]]
+        :return: The number of combinations.
+        :rtype: int
+        :raises ValueError: If the variables do not match the fields.
+        """
+        total = 1
+        for table in self.__tables(variables):
+            total *= len(table)
+        return total
+
+    def expand(
+        self,
+        variables: Mapping[str, Sequence[Any]],
+        *,
+        sample: Optional[float] = None,
+        seed: int = 0,
+        shard: Optional[Tuple[int, int]] = None,
+        unique: bool = False,
+    ) -> Iterator[str]:
+        """
+        Lazily yield the prompts of every combination of the variable values.
+
+        Combinations are yielded in the order of :func:`itertools.product`,
+        the last field varying fastest. Sampling keeps every combination with
+        the probability ``sample`` and jumps over the others without decoding
+        them; the same ``seed`` keeps the same combinations on every run and
+        in every shard. Shard ``index`` of ``count`` yields every
+        ``count``-th of the (sampled) combinations starting at ``index``, so
+        the shards partition them.
+
+        :param variables: The values of every variable, hashable.
+        :type variables: Mapping[str, Sequence[Any]]
+        :param sample: The fraction of combinations to keep, or None for all
+            of them (default: None).
+        :type sample: Optional[float]
+        :param seed: The seed of the sampling (default: 0).
+        :type seed: int
+        :param shard: The ``(index, count)`` of the shard to yield, e.g. the
+            worker index and the number of workers, or None for all
+            combinations (default: None).
+        :type shard: Optional[Tuple[int, int]]
+        :param unique: Whether to suppress repeated prompts, which takes
+            memory proportional to the number of prompts (default: False).
+        :type unique: bool
+        :return: The prompts.
+        :rtype: Iterator[str]
+        :raises ValueError: If the variables do not match the fields, or the
+            sample or the shard is invalid.
+        """
+        tables = self.__tables(variables)
+        if sample is not None and not 0 < sample <= 1:
+            raise ValueError(f"Invalid sample fraction {sample}.")
+        index, step = shard if shard is not None else (0, 1)
+        if not 0 <= index < step:
+            raise ValueError(f"Invalid shard {shard}.")
+        return self.__expand(tables, sample, seed, index, step, unique)
+
+    def __expand(
+        self,
+        tables: List[Tuple[Any, ...]],
+        sample: Optional[float],
+        seed: int,
+        start: int,
+        step: int,
+        unique: bool,
+    ) -> Iterator[str]:
+        total = 1
+        for table in tables:
+            total *= len(table)
+
+        numbers: Iterator[int] = iter(range(start, total, step))
+        if sample is not None:
+            numbers = itertools.islice(_sample(total, sample, seed), start, None, step)
+
+        seen: Set[bytes] = set()
+        reversed_tables = tables[::-1]
+        render = self.__format.format
+        for number in numbers:
+            # Decode the index in the mixed radix of the table sizes
+            values = []
+            for table in reversed_tables:
+                number, position = divmod(number, len(table))
+                values.append(table[position])
+            prompt = render(*reversed(values))
+
+            if unique:
+                digest = hashlib.blake2b(
+                    prompt.encode("utf-8"), digest_size=8
+                ).digest()
+                if digest in seen:
+                    continue
+                seen.add(digest)
+            yield prompt
+
+    def specs(
+        self,
+        variables: Mapping[str, Sequence[Any]],
+        *,
+        sample: Optional[float] = None,
+        seed: int = 0,
+        shard: Optional[Tuple[int, int]] = None,
+        unique: bool = False,
+        **arguments: Any,
+    ) -> Iterator[GenerationsSpec]:
+        """
+        Lazily yield a :class:`GenerationsSpec` per prompt of :meth:`expand`,
+        e.g. to stream them into :meth:`Imagine.submit_iter`.
+
+        :param variables: The values of every variable, hashable.
+        :type variables: Mapping[str, Sequence[Any]]
+        :param sample: See :meth:`expand` (default: None).
+        :type sample: Optional[float]
+        :param seed: See :meth:`expand` (default: 0).
+        :type seed: int
+        :param shard: See :meth:`expand` (default: None).
+        :type shard: Optional[Tuple[int, int]]
+        :param unique: See :meth:`expand` (default: False).
+        :type unique: bool
+        :param arguments: The other arguments of every specification, e.g.
+            ``style`` or ``aspect_ratio``.
+        :return: The specifications.
+        :rtype: Iterator[:class:`GenerationsSpec`]
+        :raises ValueError: See :meth:`expand`.
+        """
+        prompts = self.expand(
+            variables, sample=sample, seed=seed, shard=shard, unique=unique
+        )
+        return (GenerationsSpec(prompt, **arguments) for prompt in prompts)
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.__template!r})"
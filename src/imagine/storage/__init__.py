@@ -0,0 +1,7 @@
+from .archive import ArchiveSink
+from .packed import PackedImageStore
+
+__all__ = [
+    "ArchiveSink",
+    "PackedImageStore",
+]
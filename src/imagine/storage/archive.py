@@ -0,0 +1,271 @@
+import hashlib
+import io
+import json
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from typing import Any, Dict, IO, List, Optional, Set, Union
+from ..models.image import Image
+from ..models.response import Response
+from .packed import _metadata_value
+
+
+_FORMATS = {
+    "tar": "w|",
+    "gztar": "w|gz",
+    "bztar": "w|bz2",
+    "xztar": "w|xz",
+    "zip": None,
+}
+
+_EXTENSIONS = (
+    (".tar.gz", "gztar"),
+    (".tgz", "gztar"),
+    (".tar.bz2", "bztar"),
+    (".tar.xz", "xztar"),
+    (".tar", "tar"),
+    (".zip", "zip"),
+)
+
+_MANIFEST_NAME = "manifest.jsonl"
+
+_CLOSE = object()
+
+
+def _infer_format(path: str) -> str:
+    for extension, archive_format in _EXTENSIONS:
+        if path.lower().endswith(extension):
+            return archive_format
+    raise ValueError(
+        f"Cannot infer the archive format of '{path}'. Pass one of "
+        + ", ".join(_FORMATS)
+        + " as format."
+    )
+
+
+class ArchiveSink:
+    """
+    A sink streaming images straight into a single tar or zip archive.
+
+    :meth:`put` only queues an image; a dedicated writer thread appends it to
+    the archive, so batch workers on any number of threads can feed the sink
+    concurrently without touching the disk themselves. The archive is written
+    sequentially in one pass and needs no intermediate files, so it may also
+    be a pipe or a socket. When the queue is full, :meth:`put` blocks until the
+    writer has caught up.
+
+    With ``manifest`` enabled, a ``manifest.jsonl`` member is appended when the
+    sink is closed. It holds one JSON object per image with its name, size,
+    SHA-256, status and metadata; failed responses are listed there too, with
+    ``stored`` set to false and no image member.
+
+    Usage:
+        >>> with ArchiveSink("batch-42.tar") as sink:
+        ...     for spec, response in zip(specs, client.submit_many(specs)):
+        ...         sink.put(f"{spec.digest}.jpeg", response, prompt=spec.prompt)
+    """
+
+    __archive_format: str
+    __manifest: bool
+    __file: IO
+    __owns_file: bool
+    __queue: "queue.Queue"
+    __names: Set[str]
+    __entries: List[Dict[str, Any]]
+    __lock: threading.Lock
+    __closed: bool
+    __error: Optional[BaseException]
+    __written: int
+    __thread: threading.Thread
+
+    def __init__(
+        self,
+        destination: Union[str, IO],
+        *,
+        format: Optional[str] = None,
+        manifest: bool = True,
+        queue_size: int = 64,
+    ) -> None:
+        """
+        :param destination: The path of the archive, or a writable binary file
+            object, which is not closed by the sink.
+        :type destination: Union[str, IO]
+        :param format: One of ``tar``, ``gztar``, ``bztar``, ``xztar`` or
+            ``zip`` (default: inferred from the path, ``tar`` for file objects).
+        :type format: Optional[str]
+        :param manifest: Whether to append a ``manifest.jsonl`` member
+            (default: True).
+        :type manifest: bool
+        :param queue_size: The number of images that may wait for the writer
+            (default: 64).
+        :type queue_size: int
+        :raises ValueError: If the format is unknown or cannot be inferred.
+        """
+        if format is None:
+            format = "tar"
+            if isinstance(destination, str):
+                format = _infer_format(destination)
+        if format not in _FORMATS:
+            raise ValueError(
+                f"Unknown archive format '{format}'. Use one of "
+                + ", ".join(_FORMATS)
+                + "."
+            )
+
+        self.__archive_format = format
+        self.__manifest = manifest
+        self.__owns_file = isinstance(destination, str)
+        self.__file = open(destination, "wb") if self.__owns_file else destination
+        self.__queue = queue.Queue(maxsize=max(1, queue_size))
+        self.__names = set()
+        self.__entries = []
+        self.__lock = threading.Lock()
+        self.__closed = False
+        self.__error = None
+        self.__written = 0
+        self.__thread = threading.Thread(
+            target=self.__run, name="imagine-archive-sink", daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def written(self) -> int:
+        """
+        Get the number of images written to the archive so far.
+
+        :return: The number of image members.
+        :rtype: int
+        """
+        return self.__written
+
+    def put(
+        self,
+        name: str,
+        image: Union[Image, Response[Image], bytes],
+        **metadata: Any,
+    ) -> None:
+        """
+        Queue an image for the archive.
+
+        :param name: The member name of the image in the archive.
+        :type name: str
+        :param image: The image, its bytes, or the :class:`Response` that
+            produced it. A response without data is only listed in the
+            manifest.
+        :type image: Union[:class:`Image`, :class:`Response`[:class:`Image`], bytes]
+        :param `**metadata`: JSON serialisable metadata for the manifest, such
+            as ``prompt`` or ``seed``. Enum values are stored by name.
+        :type `**metadata`: Any
+        :raises ValueError: If the name is already taken or the sink is
+            closed.
+        :raises RuntimeError: If the writer thread failed earlier.
+        """
+        if isinstance(image, Response):
+            metadata.setdefault("status", image.status)
+            image = image.data
+        data = image.bytes if isinstance(image, Image) else image
+        metadata = {k: _metadata_value(v) for (k, v) in metadata.items()}
+
+        with self.__lock:
+            self.__raise_if_failed()
+            if self.__closed:
+                raise ValueError("The archive sink is closed.")
+            if name in self.__names or name == _MANIFEST_NAME:
+                raise ValueError(f"The archive already has a member named '{name}'.")
+            self.__names.add(name)
+            # Queued under the lock, so nothing can follow the close marker
+            self.__queue.put((name, data, metadata))
+
+    def __raise_if_failed(self) -> None:
+        if self.__error is not None:
+            raise RuntimeError("Writing the archive failed.") from self.__error
+
+    def __run(self) -> None:
+        writer = None
+        try:
+            writer = self.__open()
+            while True:
+                item = self.__queue.get()
+                if item is _CLOSE:
+                    break
+                self.__write(writer, *item)
+            if self.__manifest:
+                lines = (json.dumps(entry) + "\n" for entry in self.__entries)
+                self.__add(writer, _MANIFEST_NAME, "".join(lines).encode("utf-8"))
+        except BaseException as error:
+            self.__error = error
+            # Keep consuming so producers blocked on a full queue return
+            while self.__queue.get() is not _CLOSE:
+                pass
+        finally:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception as error:
+                    self.__error = self.__error or error
+
+    def __open(self) -> Union[tarfile.TarFile, zipfile.ZipFile]:
+        if self.__archive_format == "zip":
+            # Images are compressed already, storing them is as small and faster
+            return zipfile.ZipFile(self.__file, "w", compression=zipfile.ZIP_STORED)
+        return tarfile.open(fileobj=self.__file, mode=_FORMATS[self.__archive_format])
+
+    def __write(
+        self,
+        writer: Union[tarfile.TarFile, zipfile.ZipFile],
+        name: str,
+        data: Optional[bytes],
+        metadata: Dict[str, Any],
+    ) -> None:
+        entry: Dict[str, Any] = {"name": name, "stored": data is not None}
+        if data is not None:
+            self.__add(writer, name, data)
+            self.__written += 1
+            entry["size"] = len(data)
+            entry["sha256"] = hashlib.sha256(data).hexdigest()
+        entry["metadata"] = metadata
+        self.__entries.append(entry)
+
+    def __add(
+        self,
+        writer: Union[tarfile.TarFile, zipfile.ZipFile],
+        name: str,
+        data: bytes,
+    ) -> None:
+        if isinstance(writer, zipfile.ZipFile):
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            writer.writestr(info, data)
+            return
+
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        writer.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        """
+        Write the queued images and the manifest and finish the archive.
+
+        :raises RuntimeError: If writing the archive failed.
+        """
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+
+        self.__queue.put(_CLOSE)
+        self.__thread.join()
+        if self.__owns_file:
+            self.__file.close()
+        else:
+            self.__file.flush()
+        self.__raise_if_failed()
+
+    def __enter__(self) -> "ArchiveSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
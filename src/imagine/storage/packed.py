@@ -0,0 +1,440 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import threading
+from enum import Enum
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Union
+from ..models.image import Image
+from ..models.response import Response
+
+
+_SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.bin$")
+_INDEX_NAME = "index.jsonl"
+
+
+class IndexEntry:
+    """
+    The location and metadata of a record in a :class:`PackedImageStore`.
+
+    :param segment: The number of the segment file holding the record.
+    :type segment: int
+    :param offset: The byte offset of the record in the segment.
+    :type offset: int
+    :param length: The length of the record in bytes.
+    :type length: int
+    :param metadata: The metadata stored with the record.
+    :type metadata: Dict[str, Any]
+    """
+
+    __slots__ = ("segment", "offset", "length", "metadata")
+
+    def __init__(
+        self, segment: int, offset: int, length: int, metadata: Dict[str, Any]
+    ) -> None:
+        self.segment = segment
+        self.offset = offset
+        self.length = length
+        self.metadata = metadata
+
+
+def _segment_name(segment: int) -> str:
+    return f"segment-{segment:06d}.bin"
+
+
+def _metadata_value(value: Any) -> Any:
+    # Styles and statuses are stored by name so the index stays readable
+    return value.name if isinstance(value, Enum) else value
+
+
+class PackedImageStore:
+    """
+    An append-only store packing many images into a few large segment files.
+
+    Image bytes are appended to ``segment-NNNNNN.bin`` files inside
+    ``directory`` and an append-only ``index.jsonl`` maps every key to its
+    segment, offset and length together with its metadata (prompt, seed,
+    style, status, ...). Writing the same key again supersedes the previous
+    record; :meth:`compact` reclaims the space of superseded and deleted
+    records.
+
+    Reads are served from memory-mapped segments: the returned :class:`Image`
+    wraps a ``memoryview`` into the mapping, so no bytes are copied. The store
+    is safe to use from multiple threads of one process.
+
+    Usage:
+        >>> with PackedImageStore("results/") as store:
+        ...     store.put("fox-42", response, prompt="a red fox", seed=42)
+        ...     image = store.get("fox-42")
+    """
+
+    __directory: str
+    __segment_size: int
+    __fsync: bool
+    __index: Dict[str, IndexEntry]
+    __lock: threading.RLock
+    __maps: Dict[int, mmap.mmap]
+    __segment: int
+    __segment_file: Optional[IO]
+    __index_file: Optional[IO]
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        segment_size: int = 1 << 30,
+        fsync: bool = False,
+    ) -> None:
+        """
+        :param directory: The directory holding the segments and the index. It
+            is created if it does not exist.
+        :type directory: str
+        :param segment_size: The size after which a new segment file is
+            started, in bytes (default: 1 GiB).
+        :type segment_size: int
+        :param fsync: Whether every write is flushed to disk with ``fsync``
+            (default: False).
+        :type fsync: bool
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__segment_size = segment_size
+        self.__fsync = fsync
+        self.__lock = threading.RLock()
+        self.__maps = {}
+        self.__segment_file = None
+        self.__index_file = None
+        self.__index = self.__load_index()
+
+        segments = self.__segments_on_disk()
+        self.__segment = segments[-1] if segments else 0
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.__directory, name)
+
+    def __segments_on_disk(self) -> List[int]:
+        return sorted(
+            int(match.group(1))
+            for match in map(_SEGMENT_PATTERN.match, os.listdir(self.__directory))
+            if match is not None
+        )
+
+    def __load_index(self) -> Dict[str, IndexEntry]:
+        index: Dict[str, IndexEntry] = {}
+        path = self.__path(_INDEX_NAME)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, "rb+") as file:
+            complete = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # A torn last line left by an interrupted write: cut it off,
+                    # or the next record would be appended to it and lost
+                    file.truncate(complete)
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    continue
+                if record.get("deleted"):
+                    index.pop(record["key"], None)
+                else:
+                    index[record["key"]] = IndexEntry(
+                        record["segment"],
+                        record["offset"],
+                        record["length"],
+                        record.get("metadata", {}),
+                    )
+        return index
+
+    def __sync(self, file: IO) -> None:
+        file.flush()
+        if self.__fsync:
+            os.fsync(file.fileno())
+
+    def __append_index(self, record: Dict[str, Any]) -> None:
+        if self.__index_file is None:
+            self.__index_file = open(self.__path(_INDEX_NAME), "a", encoding="utf-8")
+        self.__index_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.__sync(self.__index_file)
+
+    def __writable_segment(self, length: int) -> IO:
+        if self.__segment_file is None:
+            self.__segment_file = open(self.__path(_segment_name(self.__segment)), "ab")
+
+        position = self.__segment_file.tell()
+        if position > 0 and position + length > self.__segment_size:
+            self.__segment_file.close()
+            self.__segment += 1
+            name = _segment_name(self.__segment)
+            self.__segment_file = open(self.__path(name), "ab")
+        return self.__segment_file
+
+    def put(
+        self,
+        key: str,
+        image: Union[Image, Response[Image], bytes],
+        **metadata: Any,
+    ) -> IndexEntry:
+        """
+        Append an image to the store.
+
+        :param key: The key to store the image under, e.g. a request hash.
+        :type key: str
+        :param image: The image, its bytes, or the :class:`Response` that
+            produced it. The status of a response is stored as metadata; a
+            response without data is stored as an empty record.
+        :type image: Union[:class:`Image`, :class:`Response`[:class:`Image`], bytes]
+        :param `**metadata`: JSON serialisable metadata such as ``prompt``,
+            ``seed`` or ``style``. Enum values are stored by name.
+        :type `**metadata`: Any
+        :return: The index entry of the new record.
+        :rtype: :class:`IndexEntry`
+        """
+        if isinstance(image, Response):
+            metadata.setdefault("status", image.status)
+            image = image.data if image.data is not None else b""
+        data = image.view if isinstance(image, Image) else image
+        metadata = {k: _metadata_value(v) for (k, v) in metadata.items()}
+
+        with self.__lock:
+            segment_file = self.__writable_segment(len(data))
+            offset = segment_file.tell()
+            segment_file.write(data)
+            self.__sync(segment_file)
+
+            entry = IndexEntry(self.__segment, offset, len(data), metadata)
+            self.__append_index(
+                {
+                    "key": key,
+                    "segment": entry.segment,
+                    "offset": entry.offset,
+                    "length": entry.length,
+                    "metadata": metadata,
+                }
+            )
+            self.__index[key] = entry
+        return entry
+
+    def __view(self, entry: IndexEntry) -> memoryview:
+        end = entry.offset + entry.length
+        mapping = self.__maps.get(entry.segment)
+        if mapping is None or len(mapping) < end:
+            if self.__segment_file is not None and entry.segment == self.__segment:
+                self.__segment_file.flush()
+            with open(self.__path(_segment_name(entry.segment)), "rb") as file:
+                # Views of a previous, smaller mapping keep it alive on their own
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__maps[entry.segment] = mapping
+        return memoryview(mapping)[entry.offset:end]
+
+    def get(self, key: str) -> Optional[Image]:
+        """
+        Read an image without copying its bytes.
+
+        :param key: The key the image was stored under.
+        :type key: str
+        :return: The image backed by a ``memoryview`` of the segment, or None if
+            the key is unknown.
+        :rtype: Optional[:class:`Image`]
+        """
+        with self.__lock:
+            entry = self.__index.get(key)
+            if entry is None:
+                return None
+            if entry.length == 0:
+                return Image(b"")
+            return Image(self.__view(entry))
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the metadata stored with an image.
+
+        :param key: The key the image was stored under.
+        :type key: str
+        :return: The metadata, or None if the key is unknown.
+        :rtype: Optional[Dict[str, Any]]
+        """
+        with self.__lock:
+            entry = self.__index.get(key)
+            return dict(entry.metadata) if entry is not None else None
+
+    def delete(self, key: str) -> bool:
+        """
+        Remove a key from the store. The space is reclaimed by :meth:`compact`.
+
+        :param key: The key to remove.
+        :type key: str
+        :return: Whether the key existed.
+        :rtype: bool
+        """
+        with self.__lock:
+            if self.__index.pop(key, None) is None:
+                return False
+            self.__append_index({"key": key, "deleted": True})
+            return True
+
+    def keys(self) -> List[str]:
+        """
+        :return: The keys currently in the store.
+        :rtype: List[str]
+        """
+        with self.__lock:
+            return list(self.__index)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__index
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __close_files(self) -> Set[int]:
+        for file in (self.__segment_file, self.__index_file):
+            if file is not None:
+                file.close()
+        self.__segment_file = None
+        self.__index_file = None
+
+        exported: Set[int] = set()
+        for segment, mapping in self.__maps.items():
+            try:
+                mapping.close()
+            except BufferError:
+                # Images handed out still reference the mapping
+                exported.add(segment)
+        self.__maps = {}
+        return exported
+
+    def compact(self) -> int:
+        """
+        Rewrite the live records into fresh segments and drop the space used by
+        superseded and deleted records.
+
+        The new index replaces the old one atomically, so an interrupted
+        compaction leaves the store readable. Images returned by :meth:`get`
+        before compaction stay valid; where the platform does not allow
+        removing a segment they still map, it is removed by the next
+        compaction.
+
+        :return: The number of bytes reclaimed.
+        :rtype: int
+        """
+        with self.__lock:
+            # Mappings are closed before their segments are removed below
+            exported = self.__close_files()
+            old_segments = self.__segments_on_disk()
+            old_size = sum(
+                os.path.getsize(self.__path(_segment_name(s))) for s in old_segments
+            )
+
+            first = (old_segments[-1] + 1) if old_segments else 0
+            self.__segment = first
+            live = sorted(
+                self.__index.items(),
+                key=lambda item: (item[1].segment, item[1].offset),
+            )
+
+            index: Dict[str, IndexEntry] = {}
+            sources: Dict[int, IO] = {}
+            temporary_index = self.__path(_INDEX_NAME + ".tmp")
+            try:
+                with open(temporary_index, "w", encoding="utf-8") as index_file:
+                    for key, entry in live:
+                        source = sources.get(entry.segment)
+                        if source is None:
+                            name = _segment_name(entry.segment)
+                            source = open(self.__path(name), "rb")
+                            sources[entry.segment] = source
+                        source.seek(entry.offset)
+                        data = source.read(entry.length)
+
+                        segment_file = self.__writable_segment(len(data))
+                        offset = segment_file.tell()
+                        segment_file.write(data)
+
+                        index[key] = IndexEntry(
+                            self.__segment, offset, len(data), entry.metadata
+                        )
+                        record = {
+                            "key": key,
+                            "segment": self.__segment,
+                            "offset": offset,
+                            "length": len(data),
+                            "metadata": entry.metadata,
+                        }
+                        index_file.write(
+                            json.dumps(record, separators=(",", ":")) + "\n"
+                        )
+
+                    if self.__segment_file is not None:
+                        self.__sync(self.__segment_file)
+                        os.fsync(self.__segment_file.fileno())
+                    index_file.flush()
+                    os.fsync(index_file.fileno())
+            finally:
+                for source in sources.values():
+                    source.close()
+                self.__close_files()
+
+            os.replace(temporary_index, self.__path(_INDEX_NAME))
+            self.__index = index
+            for segment in old_segments:
+                try:
+                    os.remove(self.__path(_segment_name(segment)))
+                except OSError:
+                    # Some platforms refuse to remove a file that is still
+                    # mapped; it is removed by the next compaction instead
+                    if segment not in exported:
+                        raise
+
+            new_segments = [s for s in self.__segments_on_disk() if s >= first]
+            self.__segment = new_segments[-1] if new_segments else first
+            new_size = sum(
+                os.path.getsize(self.__path(_segment_name(s))) for s in new_segments
+            )
+            return old_size - new_size
+
+    def close(self) -> None:
+        """
+        Close all open segment, index and mapping handles.
+        """
+        with self.__lock:
+            self.__close_files()
+
+    def __enter__(self) -> "PackedImageStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point for maintaining a store.
+
+    Usage:
+        $ python -m imagine.storage.packed compact results/
+    """
+    parser = argparse.ArgumentParser(prog="python -m imagine.storage.packed")
+    commands = parser.add_subparsers(dest="command")
+    compact = commands.add_parser("compact", help="reclaim space of stale records")
+    compact.add_argument("directory")
+    arguments = parser.parse_args(argv)
+
+    if arguments.command is None:
+        parser.print_help()
+        return
+
+    with PackedImageStore(arguments.directory) as store:
+        reclaimed = store.compact()
+        print(f"Reclaimed {reclaimed} bytes, {len(store)} records remain.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class CancelledError(Exception):
+    """
+    Raised inside a call when its :class:`CancellationToken` is cancelled.
+
+    The public methods of :class:`Imagine` catch it and return a response with
+    the ``CANCELLED`` status instead.
+    """
+
+
+class CancellationToken:
+    """
+    A thread-safe flag to cooperatively cancel one or many calls.
+
+    Calls holding a cancelled token stop waiting for limiter and scheduler
+    slots, abort uploads and downloads in progress, and calls that have not
+    started yet are skipped. One token may be shared by any number of calls,
+    e.g. by every request of a batch.
+
+    Usage:
+        >>> token = CancellationToken()
+        >>> future = executor.submit(
+        ...     client.generations, "a red fox", cancellation=token
+        ... )
+        >>> token.cancel()
+        >>> future.result().status
+        <Status.CANCELLED: 1001>
+    """
+
+    __event: threading.Event
+    __lock: threading.Lock
+    __callbacks: List[Callable[[], None]]
+
+    def __init__(self) -> None:
+        self.__event = threading.Event()
+        self.__lock = threading.Lock()
+        self.__callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the token has been cancelled.
+
+        :return: True once :meth:`cancel` has been called.
+        :rtype: bool
+        """
+        return self.__event.is_set()
+
+    def cancel(self) -> None:
+        """
+        Cancel the token and run the registered callbacks. Cancelling twice
+        has no further effect.
+        """
+        with self.__lock:
+            if self.__event.is_set():
+                return
+            self.__event.set()
+            callbacks, self.__callbacks = self.__callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the token is cancelled or the timeout expires.
+
+        :param timeout: The maximum time to wait in seconds, or None to wait
+            forever (default: None).
+        :type timeout: Optional[float]
+        :return: Whether the token is cancelled.
+        :rtype: bool
+        """
+        return self.__event.wait(timeout)
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run a callback when the token is cancelled. The callback runs right
+        away if the token is already cancelled.
+
+        :param callback: The function to call, on the thread calling
+            :meth:`cancel`.
+        :type callback: Callable[[], None]
+        :return: A function removing the callback again.
+        :rtype: Callable[[], None]
+        """
+        with self.__lock:
+            if not self.__event.is_set():
+                self.__callbacks.append(callback)
+                return lambda: self.__unregister(callback)
+
+        callback()
+        return lambda: None
+
+    def __unregister(self, callback: Callable[[], None]) -> None:
+        with self.__lock:
+            if callback in self.__callbacks:
+                self.__callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        :raises CancelledError: If the token has been cancelled.
+        """
+        if self.__event.is_set():
+            raise CancelledError("The call was cancelled.")
+
+
+_local = threading.local()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """
+    Get the token of the innermost :func:`cancellation_scope` of the calling
+    thread.
+
+    :return: The active token, or None outside of a scope.
+    :rtype: Optional[:class:`CancellationToken`]
+    """
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def cancellation_scope(token: Optional[CancellationToken]) -> Iterator[None]:
+    """
+    Make a token the active one of the calling thread for the duration of a
+    ``with`` block.
+
+    The active token is picked up by the limiters, the scheduler and the HTTP
+    clients, so it does not have to be passed through every layer. Threads do
+    not inherit it; work handed to another thread has to open its own scope.
+
+    :param token: The token to activate, or None to deactivate cancellation.
+    :type token: Optional[:class:`CancellationToken`]
+
+    Usage:
+        >>> with cancellation_scope(token):
+        ...     client.generations("a red fox")
+    """
+    previous = current_token()
+    _local.token = token
+    try:
+        yield
+    finally:
+        _local.token = previous
+
+
+def call_interruptibly(
+    function: Callable[[], T],
+    cancellation: Optional[CancellationToken],
+    *,
+    discard: Optional[Callable[[T], Any]] = None,
+) -> T:
+    """
+    Call a blocking function, e.g. one waiting for response headers, and stop
+    waiting for it as soon as a token is cancelled.
+
+    A blocked socket does not check any token, so with a token the function
+    runs on a helper thread while the calling thread waits for either its
+    result or the cancellation. The helper of a call given up on keeps
+    running until the function returns, and hands its late result to
+    ``discard``, e.g. to close a response.
+
+    :param function: The function to call.
+    :type function: Callable[[], T]
+    :param cancellation: The token, or None to simply call the function.
+    :type cancellation: Optional[:class:`CancellationToken`]
+    :param discard: A function releasing a result that arrived after the
+        call was given up on (default: None).
+    :type discard: Optional[Callable[[T], Any]]
+    :return: The result of the function.
+    :rtype: T
+    :raises CancelledError: If the token is cancelled before the function
+        returns.
+    """
+    if cancellation is None:
+        return function()
+    cancellation.raise_if_cancelled()
+
+    finished = threading.Event()
+    lock = threading.Lock()
+    outcome: List[Tuple[Any, Optional[BaseException]]] = []
+    abandoned: List[bool] = []
+
+    def run() -> None:
+        try:
+            result: Tuple[Any, Optional[BaseException]] = (function(), None)
+        except BaseException as error:
+            result = (None, error)
+        with lock:
+            if not abandoned:
+                outcome.append(result)
+                finished.set()
+                return
+        if result[1] is None and discard is not None:
+            discard(result[0])
+
+    unregister = cancellation.register(finished.set)
+    try:
+        threading.Thread(target=run, daemon=True).start()
+        finished.wait()
+    finally:
+        unregister()
+
+    with lock:
+        if not outcome:
+            abandoned.append(True)
+            raise CancelledError("The call was cancelled.")
+    value, error = outcome[0]
+    if error is not None:
+        raise error
+    return value
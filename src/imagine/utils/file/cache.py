@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from .read import read_image_file_as_bytes
+
+
+class ImageFileCache:
+    """
+    A bounded, thread-safe cache of image files read from disk.
+
+    Entries are validated against the file's modification time and size on
+    every lookup, so a file changed on disk is read again. The least recently
+    used entries are evicted once ``max_entries`` or ``max_bytes`` is
+    exceeded. Concurrent lookups of the same missing path read the file once.
+
+    Usage:
+        >>> cache = ImageFileCache(max_entries=64)
+        >>> client = Imagine(token="your-api-token", file_cache=cache)
+    """
+
+    __max_entries: int
+    __max_bytes: int
+    __entries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]"
+    __size: int
+    __lock: threading.Lock
+    __loading: Dict[str, threading.Lock]
+
+    def __init__(self, *, max_entries: int = 128, max_bytes: int = 256 << 20) -> None:
+        """
+        :param max_entries: The maximum number of cached files (default: 128).
+        :type max_entries: int
+        :param max_bytes: The maximum total size of cached files in bytes
+            (default: 256 MiB).
+        :type max_bytes: int
+        """
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__loading = {}
+
+    def __lookup(self, path: str, version: Tuple[int, int]) -> Optional[bytes]:
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is not None and entry[0] == version:
+                self.__entries.move_to_end(path)
+                return entry[1]
+            return None
+
+    def read(self, image_path: str) -> bytes:
+        """
+        Read an image file, serving it from the cache when it is unchanged.
+
+        :param image_path: The path to the image file.
+        :type image_path: str
+        :return: The content of the image file as bytes.
+        :rtype: bytes
+        """
+        path = os.path.abspath(image_path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        data = self.__lookup(path, version)
+        if data is not None:
+            return data
+
+        with self.__lock:
+            loading = self.__loading.setdefault(path, threading.Lock())
+        try:
+            with loading:
+                data = self.__lookup(path, version)
+                if data is None:
+                    data = read_image_file_as_bytes(path)
+                    self.__store(path, version, data)
+        finally:
+            # Also when the read raises, or the entry would never be removed
+            with self.__lock:
+                if self.__loading.get(path) is loading:
+                    del self.__loading[path]
+        return data
+
+    def __store(self, path: str, version: Tuple[int, int], data: bytes) -> None:
+        if len(data) > self.__max_bytes:
+            return
+
+        with self.__lock:
+            previous = self.__entries.pop(path, None)
+            if previous is not None:
+                self.__size -= len(previous[1])
+            self.__entries[path] = (version, data)
+            self.__size += len(data)
+
+            while (
+                len(self.__entries) > self.__max_entries
+                or self.__size > self.__max_bytes
+            ):
+                _, (_, evicted) = self.__entries.popitem(last=False)
+                self.__size -= len(evicted)
+
+    def clear(self) -> None:
+        """
+        Remove all cached files.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
@@ -0,0 +1,126 @@
+import mmap
+import os
+import struct
+from typing import Any, Optional
+
+
+def detect_image_format(data: bytes) -> Optional[str]:
+    """
+    Recognise an image format by its magic bytes.
+
+    :param data: The content of the image, or at least its first 12 bytes.
+    :type data: bytes
+    :return: ``png``, ``jpeg``, ``webp`` or ``gif``, or None if the format is
+        not recognised.
+    :rtype: Optional[str]
+
+    Usage:
+        >>> detect_image_format(b"\\x89PNG\\r\\n\\x1a\\n...")
+        'png'
+    """
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    return None
+
+
+def check_image_integrity(data: bytes) -> Optional[str]:
+    """
+    Check that an image of a recognised format is complete.
+
+    Only the framing is checked, not the pixel data: PNG images must contain
+    their ``IEND`` chunk, found by walking the chunks, and JPEG images an
+    end-of-image marker after their first scan, so data appended after the
+    end of the image is accepted. WebP images must be as long as their
+    header says and GIF images must end with a trailer. Images of other
+    formats pass as long as they are not empty.
+
+    :param data: The content of the image.
+    :type data: bytes
+    :return: Why the image is incomplete, or None if it looks complete.
+    :rtype: Optional[str]
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        data = bytes(data)
+    return _check_framing(data, len(data))
+
+
+def check_image_file_integrity(path: str) -> Optional[str]:
+    """
+    Check that an image file is complete, see :func:`check_image_integrity`.
+
+    The file is memory-mapped rather than read, so only the pages holding
+    the structure that is checked are loaded.
+
+    :param path: The path of the image file.
+    :type path: str
+    :return: Why the image is incomplete, or None if it looks complete.
+    :rtype: Optional[str]
+    :raises OSError: If the file cannot be read.
+    """
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return "the image is empty"
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _check_framing(buffer, size)
+
+
+def _check_framing(buffer: Any, size: int) -> Optional[str]:
+    """
+    Check the framing of an image held by ``buffer``, bytes or a memory map.
+    """
+    if size == 0:
+        return "the image is empty"
+
+    image_format = detect_image_format(buffer[:16])
+    if image_format == "png":
+        return _check_png(buffer, size)
+    if image_format == "jpeg":
+        return _check_jpeg(buffer, size)
+    if image_format == "webp":
+        if size < 12 or struct.unpack("<I", buffer[4:8])[0] + 8 > size:
+            return "the WebP image is shorter than its header says"
+    elif image_format == "gif":
+        if buffer[size - 1 : size] != b"\x3b":
+            return "the GIF image has no trailer"
+    return None
+
+
+def _check_png(buffer: Any, size: int) -> Optional[str]:
+    # Chunks are a 4 byte length, a 4 byte type, the data and a 4 byte CRC
+    offset = 8
+    while offset + 8 <= size:
+        length = struct.unpack(">I", buffer[offset : offset + 4])[0]
+        if buffer[offset + 4 : offset + 8] == b"IEND":
+            return None if offset + 12 <= size else "the PNG image is cut off"
+        offset += 12 + length
+    return "the PNG image has no IEND chunk"
+
+
+def _check_jpeg(buffer: Any, size: int) -> Optional[str]:
+    # Marker segments carry their length up to the first scan, so embedded
+    # thumbnails are skipped; entropy coded data never contains 0xFFD9
+    offset = 2
+    while offset + 4 <= size:
+        if buffer[offset] != 0xFF:
+            break
+        marker = buffer[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+        elif marker == 0xD9:
+            return None
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            offset += 2
+        elif marker == 0xDA:
+            break
+        else:
+            offset += 2 + struct.unpack(">H", buffer[offset + 2 : offset + 4])[0]
+    if buffer.find(b"\xff\xd9", offset) == -1:
+        return "the JPEG image has no end-of-image marker"
+    return None
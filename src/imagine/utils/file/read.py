@@ -1,3 +1,7 @@
+from typing import Callable, Union
+from ..tracing.span import span
+
+
 def read_image_file_as_bytes(image_path: str) -> bytes:
     """
     Read the content of an image file and return it as bytes.
@@ -15,3 +19,34 @@ def read_image_file_as_bytes(image_path: str) -> bytes:
     with open(image_path, "rb") as image_file:
         image_bytes = image_file.read()
     return image_bytes
+
+
+ImageSource = Union[str, bytes, bytearray, memoryview]
+ImageReader = Callable[[str], bytes]
+
+
+def load_image_source(
+    source: ImageSource, reader: ImageReader = read_image_file_as_bytes
+) -> bytes:
+    """
+    Get the bytes of an image given either its path or its already loaded
+    content.
+
+    Loaded content is returned as is, so one buffer can be shared by many
+    requests without being read or copied again.
+
+    :param source: The path to the image file, or its bytes.
+    :type source: Union[str, bytes, bytearray, memoryview]
+    :param reader: The function reading a path (default:
+        :func:`read_image_file_as_bytes`).
+    :type reader: Callable[[str], bytes]
+    :return: The content of the image.
+    :rtype: bytes
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+
+    with span("imagine.read_file") as read_span:
+        image_bytes = reader(source)
+        read_span.set_attribute("imagine.file.size", len(image_bytes))
+    return image_bytes
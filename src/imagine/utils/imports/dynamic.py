@@ -20,3 +20,25 @@ def dynamic_import(module_name: str) -> Optional[ModuleType]:
         print(f"Module '{module_name}' not found. If you wish to make use of this method,"
               + " consider using pip to install the module in question or providing"
               + " your own implementation.")
+
+
+def required_import(module_name: str) -> ModuleType:
+    """
+    Import a module that a feature cannot work without.
+
+    Unlike :func:`dynamic_import`, a missing module is an error for the caller
+    rather than a printed notice.
+
+    :param module_name: The name of the module to import.
+    :type module_name: str
+    :return: The imported module object.
+    :rtype: ModuleType
+    :raises ImportError: If module cannot be imported
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as error:
+        raise ImportError(
+            f"Module '{module_name}' not found. This feature requires it, consider"
+            + " using pip to install the module in question."
+        ) from error
@@ -1,5 +1,6 @@
-from typing import Any, Dict
-from ...type.multipart import MultipartForm, MultipartFile
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from ...type.multipart import Multipart, MultipartForm, MultipartFile
 
 
 def multipart_form_builder(params: Dict[str, Any]) -> MultipartForm:
@@ -59,3 +60,43 @@ def multipart_file_builder(
         {'image1.jpg': image_bytes_data, 'image2.jpg': image_bytes_data}
     """
     return {k: (f"{k}.{extension}", v, content_type) for (k, v) in params.items()}
+
+
+def multipart_body_builder(
+    multipart: Multipart, *, boundary: Optional[str] = None
+) -> Tuple[List[bytes], str]:
+    """
+    Encode multipart items into a ``multipart/form-data`` body.
+
+    The body is returned as a list of parts so file contents are referenced,
+    not copied; the parts can be streamed as they are or joined.
+
+    :param multipart: The form and file items, as built by
+        :func:`multipart_form_builder` and :func:`multipart_file_builder`.
+    :type multipart: Dict[str, Union[Tuple[None, str], Tuple[str, bytes, str]]]
+    :param boundary: The boundary separating the parts (default: random).
+    :type boundary: Optional[str]
+    :return: The parts of the body and the matching ``Content-Type`` header.
+    :rtype: Tuple[List[bytes], str]
+
+    Usage:
+        >>> parts, content_type = multipart_body_builder(
+        ...     {**multipart_form_builder(params), **multipart_file_builder(files)}
+        ... )
+        >>> body = b"".join(parts)
+    """
+    boundary = boundary if boundary is not None else os.urandom(16).hex()
+    parts: List[bytes] = []
+    for name, item in multipart.items():
+        filename, value = item[0], item[1]
+        header = f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+        if filename is not None:
+            header += f'; filename="{filename}"'
+        header += "\r\n"
+        if len(item) > 2:
+            header += f"Content-Type: {item[2]}\r\n"
+        parts.append((header + "\r\n").encode("utf-8"))
+        parts.append(value.encode("utf-8") if isinstance(value, str) else value)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return parts, f"multipart/form-data; boundary={boundary}"
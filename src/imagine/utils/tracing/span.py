@@ -0,0 +1,195 @@
+import functools
+import importlib.util
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_TRACER_NAME = "imagine-sdk"
+
+
+class _NoopSpan:
+    """
+    The span handed out while tracing is disabled. It is a shared singleton,
+    so an untraced call allocates nothing.
+    """
+
+    __slots__ = ()
+
+    recording = False
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def set_error(self, description: str) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _OpenTelemetrySpan:
+    """
+    A span recorded by an OpenTelemetry tracer.
+    """
+
+    __slots__ = ("__trace", "__manager", "__span")
+
+    recording = True
+
+    def __init__(self, trace: Any, manager: Any) -> None:
+        self.__trace = trace
+        self.__manager = manager
+        self.__span = None
+
+    def __enter__(self) -> "_OpenTelemetrySpan":
+        self.__span = self.__manager.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return self.__manager.__exit__(*exc_info)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.__span.set_attribute(key, value)
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_error(self, description: str) -> None:
+        self.__span.set_status(
+            self.__trace.Status(self.__trace.StatusCode.ERROR, description)
+        )
+
+
+class _Tracing:
+    __slots__ = ("resolved", "trace", "context", "tracer")
+
+    def __init__(self) -> None:
+        self.resolved = False
+        self.trace = None
+        self.context = None
+        self.tracer = None
+
+
+_state = _Tracing()
+
+
+def _resolve() -> None:
+    # Looked up once: without OpenTelemetry the module is never imported
+    _state.resolved = True
+    _state.trace = _state.context = _state.tracer = None
+    try:
+        if importlib.util.find_spec("opentelemetry") is None:
+            return
+        from opentelemetry import context, trace
+    except ImportError:
+        return
+
+    _state.trace = trace
+    _state.context = context
+    _state.tracer = trace.get_tracer(_TRACER_NAME)
+
+
+def set_tracer(tracer: Optional[Any]) -> None:
+    """
+    Replace the tracer used by the SDK.
+
+    By default, an OpenTelemetry tracer is used automatically when the
+    ``opentelemetry`` package is installed, and tracing is disabled otherwise.
+
+    :param tracer: An OpenTelemetry tracer, or None to disable tracing.
+    :type tracer: Optional[opentelemetry.trace.Tracer]
+    :raises ImportError: If a tracer is given but the ``opentelemetry``
+        package is not installed.
+    """
+    if tracer is None:
+        _state.resolved = True
+        _state.tracer = None
+        return
+
+    _resolve()
+    if _state.trace is None:
+        raise ImportError(
+            "Module 'opentelemetry' not found. A tracer requires the OpenTelemetry"
+            + " API, consider using pip to install the module in question."
+        )
+    _state.tracer = tracer
+
+
+def tracing_enabled() -> bool:
+    """
+    :return: Whether the SDK records spans.
+    :rtype: bool
+    """
+    if not _state.resolved:
+        _resolve()
+    return _state.tracer is not None
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Open a span for the duration of a ``with`` block, as a child of the
+    current span.
+
+    Attributes whose value is None are left out. Exceptions escaping the block
+    are recorded on the span.
+
+    :param name: The name of the span, e.g. ``imagine.send``.
+    :type name: str
+    :param attributes: The initial attributes of the span (default: None).
+    :type attributes: Optional[Dict[str, Any]]
+    :return: A context manager yielding an object with ``set_attribute``,
+        ``set_attributes`` and ``set_error`` methods.
+
+    Usage:
+        >>> with span("imagine.send", {"imagine.endpoint": endpoint}) as s:
+        ...     status_code, content = send()
+        ...     s.set_attribute("imagine.status", status_code)
+    """
+    if not _state.resolved:
+        _resolve()
+    if _state.tracer is None:
+        return _NOOP_SPAN
+
+    attributes = {k: v for (k, v) in (attributes or {}).items() if v is not None}
+    manager = _state.tracer.start_as_current_span(name, attributes=attributes)
+    return _OpenTelemetrySpan(_state.trace, manager)
+
+
+def bind(function: F) -> F:
+    """
+    Make a function run in the tracing context of the caller, so spans it
+    opens on another thread, e.g. in a thread pool, keep their parent.
+
+    :param function: The function to bind.
+    :type function: Callable
+    :return: The bound function, or ``function`` itself while tracing is
+        disabled.
+    :rtype: Callable
+    """
+    if not tracing_enabled():
+        return function
+
+    context = _state.context
+    captured = context.get_current()
+
+    @functools.wraps(function)
+    def bound(*args: Any, **kwargs: Any) -> Any:
+        token = context.attach(captured)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            context.detach(token)
+
+    return bound
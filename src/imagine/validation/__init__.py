@@ -0,0 +1,11 @@
+from .catalog import ConstraintCatalog, Constraints, Range, default_catalog
+from .error import ValidationError, Violation
+
+__all__ = [
+    "ConstraintCatalog",
+    "Constraints",
+    "Range",
+    "default_catalog",
+    "ValidationError",
+    "Violation",
+]
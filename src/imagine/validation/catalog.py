@@ -0,0 +1,401 @@
+import importlib
+import importlib.util
+import math
+import numbers
+from enum import Enum
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from ..features.aspect_ratio import AspectRatio
+from ..features.generations.style_ids import GenerationsStyle
+from ..features.image_remix.style_ids import ImageRemixStyle
+from ..features.in_painting.style_ids import InPaintingStyle
+from ..features.super_resolution.style_ids import SuperResolutionStyle
+from ..specs.request import RequestSpec
+from .error import ValidationError, Violation
+
+
+# Below this many values per column, plain Python is faster than NumPy
+_VECTORIZE_THRESHOLD = 32
+
+_STYLE_TYPES: Dict[str, Type[Enum]] = {
+    "generations": GenerationsStyle,
+    "variations": GenerationsStyle,
+    "image_remix": ImageRemixStyle,
+    "in_painting": InPaintingStyle,
+    "super_resolution": SuperResolutionStyle,
+}
+
+# Arguments naming the style of a call, as spelled by the specifications and
+# by the handlers
+_STYLE_ARGUMENTS = ("style", "style_id", "model_version")
+
+_Record = Tuple[str, Any, Dict[str, Any]]
+
+
+def _numpy() -> Optional[ModuleType]:
+    if importlib.util.find_spec("numpy") is None:
+        return None
+    return importlib.import_module("numpy")
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+class Range:
+    """
+    An inclusive numeric range an argument must fall into.
+
+    :param minimum: The smallest allowed value.
+    :type minimum: float
+    :param maximum: The largest allowed value.
+    :type maximum: float
+    :param integer: Whether the value must be a whole number (default: False).
+    :type integer: bool
+    """
+
+    __slots__ = ("minimum", "maximum", "integer")
+
+    def __init__(
+        self, minimum: float, maximum: float, *, integer: bool = False
+    ) -> None:
+        if minimum > maximum:
+            raise ValueError(f"Invalid range: {minimum} is greater than {maximum}.")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.integer = integer
+
+    def contains(self, value: float) -> bool:
+        """
+        :param value: The value to check.
+        :type value: float
+        :return: Whether the value satisfies the range.
+        :rtype: bool
+        """
+        if not math.isfinite(value) or not self.minimum <= value <= self.maximum:
+            return False
+        return not self.integer or float(value).is_integer()
+
+    def describe(self) -> str:
+        """
+        :return: A description of the range for error messages.
+        :rtype: str
+        """
+        kind = "an integer" if self.integer else "a number"
+        return f"must be {kind} between {self.minimum} and {self.maximum}"
+
+    def __repr__(self) -> str:
+        return f"Range({self.minimum}, {self.maximum}, integer={self.integer})"
+
+
+class Constraints:
+    """
+    The constraints of the arguments of one operation, optionally for a single
+    style.
+
+    :param ranges: The numeric range of each argument (default: None).
+    :type ranges: Optional[Dict[str, :class:`Range`]]
+    :param choices: The allowed values of each argument; enum members and
+        their values are interchangeable (default: None).
+    :type choices: Optional[Dict[str, Iterable[Any]]]
+    :param required: The arguments that must be given and not be blank
+        (default: none).
+    :type required: Iterable[str]
+    """
+
+    __slots__ = ("ranges", "choices", "required")
+
+    def __init__(
+        self,
+        *,
+        ranges: Optional[Dict[str, Range]] = None,
+        choices: Optional[Dict[str, Iterable[Any]]] = None,
+        required: Iterable[str] = (),
+    ) -> None:
+        self.ranges = dict(ranges or {})
+        self.choices = {
+            name: frozenset(_plain(value) for value in values)
+            for (name, values) in (choices or {}).items()
+        }
+        self.required = tuple(required)
+
+    def merged(self, override: "Constraints") -> "Constraints":
+        """
+        Combine these constraints with more specific ones.
+
+        :param override: The constraints replacing those of the same argument.
+        :type override: :class:`Constraints`
+        :return: The combined constraints.
+        :rtype: :class:`Constraints`
+        """
+        merged = Constraints(
+            ranges={**self.ranges, **override.ranges},
+            required=tuple(dict.fromkeys(self.required + override.required)),
+        )
+        merged.choices = {**self.choices, **override.choices}
+        return merged
+
+
+class ConstraintCatalog:
+    """
+    A declarative catalog of argument constraints, keyed by operation and
+    style, to reject requests the API would answer with
+    ``UNPROCESSABLE_ENTITY`` before they are sent.
+
+    Constraints registered for a style are merged over the constraints of its
+    operation. Batches are checked column by column: requests are grouped by
+    operation and style, and each numeric argument of a group is checked in a
+    single vectorised comparison when NumPy is installed. Every violation is
+    reported, not only the first one.
+
+    Usage:
+        >>> catalog = default_catalog()
+        >>> catalog.register(
+        ...     "generations",
+        ...     Constraints(choices={"aspect_ratio": [AspectRatio.ONE_RATIO_ONE]}),
+        ...     style=GenerationsStyle.ANIME,
+        ... )
+        >>> catalog.validate(specs)
+        >>> client = Imagine(token="your-api-token", catalog=catalog)
+    """
+
+    __entries: Dict[Tuple[str, Any], Constraints]
+
+    def __init__(self) -> None:
+        self.__entries = {}
+
+    def register(
+        self,
+        operation: str,
+        constraints: Constraints,
+        *,
+        style: Optional[Enum] = None,
+    ) -> None:
+        """
+        Add constraints to the catalog, replacing earlier ones for the same
+        operation and style.
+
+        :param operation: The operation, e.g. ``generations``.
+        :type operation: str
+        :param constraints: The constraints.
+        :type constraints: :class:`Constraints`
+        :param style: The style the constraints are specific to, or None for
+            every style of the operation (default: None).
+        :type style: Optional[Enum]
+        :raises ValueError: If the operation is unknown or the style does not
+            belong to it.
+        """
+        style_type = _STYLE_TYPES.get(operation)
+        if style_type is None:
+            raise ValueError(f"Unknown operation '{operation}'.")
+        if style is not None and not isinstance(style, style_type):
+            raise ValueError(
+                f"The style of '{operation}' must be a {style_type.__name__},"
+                + f" got {style!r}."
+            )
+        self.__entries[(operation, _plain(style))] = constraints
+
+    def constraints(self, operation: str, style: Any = None) -> Constraints:
+        """
+        Get the effective constraints of an operation and style.
+
+        :param operation: The operation, e.g. ``generations``.
+        :type operation: str
+        :param style: The style or its value (default: None).
+        :type style: Any
+        :return: The constraints, empty if none are registered.
+        :rtype: :class:`Constraints`
+        """
+        general = self.__entries.get((operation, None), Constraints())
+        specific = self.__entries.get((operation, _plain(style)))
+        if style is None or specific is None:
+            return general
+        return general.merged(specific)
+
+    def check(self, specs: Iterable[RequestSpec]) -> List[Violation]:
+        """
+        Find every violation in a batch of request specifications.
+
+        :param specs: The requests to check.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :return: The violations, ordered by the position of their request.
+        :rtype: List[:class:`Violation`]
+        """
+        return self.__check(
+            [_record(spec.operation, spec.arguments()) for spec in specs]
+        )
+
+    def check_arguments(
+        self, operation: str, argument_sets: Iterable[Dict[str, Any]]
+    ) -> List[Violation]:
+        """
+        Find every violation in a batch of calls of one operation.
+
+        :param operation: The operation, e.g. ``generations``.
+        :type operation: str
+        :param argument_sets: The keyword arguments of every call.
+        :type argument_sets: Iterable[Dict[str, Any]]
+        :return: The violations, ordered by the position of their call.
+        :rtype: List[:class:`Violation`]
+        """
+        return self.__check([_record(operation, a) for a in argument_sets])
+
+    def validate(self, specs: Iterable[RequestSpec]) -> None:
+        """
+        Check a batch of request specifications.
+
+        :param specs: The requests to check.
+        :type specs: Iterable[:class:`RequestSpec`]
+        :raises ValidationError: If any request breaks a constraint.
+        """
+        violations = self.check(specs)
+        if violations:
+            raise ValidationError(violations)
+
+    def __check(self, records: List[_Record]) -> List[Violation]:
+        groups: Dict[Tuple[str, Any], List[int]] = {}
+        for index, (operation, style, _) in enumerate(records):
+            groups.setdefault((operation, style), []).append(index)
+
+        np = _numpy()
+        violations: List[Violation] = []
+        for (operation, style), indices in groups.items():
+            constraints = self.constraints(operation, style)
+            rows = [(index, records[index][2]) for index in indices]
+
+            for name in constraints.required:
+                for index, values in rows:
+                    value = values.get(name)
+                    if value is None or (isinstance(value, str) and not value.strip()):
+                        violations.append(
+                            Violation(index, operation, name, value, "is required")
+                        )
+
+            for name, allowed in constraints.choices.items():
+                message = "is not supported" + _style_suffix(operation, style)
+                for index, values in rows:
+                    value = values.get(name)
+                    if value is not None and value not in allowed:
+                        violations.append(
+                            Violation(index, operation, name, value, message)
+                        )
+
+            for name, allowed_range in constraints.ranges.items():
+                column = [
+                    (index, values[name])
+                    for (index, values) in rows
+                    if values.get(name) is not None
+                ]
+                violations.extend(
+                    _check_range(np, operation, name, allowed_range, column)
+                )
+
+        violations.sort(key=lambda violation: violation.index)
+        return violations
+
+
+def _record(operation: str, arguments: Dict[str, Any]) -> _Record:
+    values = {name: _plain(value) for (name, value) in arguments.items()}
+    style = None
+    for name in _STYLE_ARGUMENTS:
+        if values.get(name) is not None:
+            style = values.pop(name)
+    return operation, style, values
+
+
+def _style_suffix(operation: str, style: Any) -> str:
+    style_type = _STYLE_TYPES.get(operation)
+    try:
+        name = style_type(style).name
+    except (TypeError, ValueError):
+        return ""
+    return f" by style {name}"
+
+
+def _check_range(
+    np: Optional[ModuleType],
+    operation: str,
+    name: str,
+    allowed_range: Range,
+    column: List[Tuple[int, Any]],
+) -> List[Violation]:
+    message = allowed_range.describe()
+    violations = []
+
+    numeric = []
+    for index, value in column:
+        # Also accepts NumPy scalars such as numpy.int64 and numpy.float64
+        if isinstance(value, numbers.Real) and not isinstance(value, bool):
+            numeric.append((index, value))
+        else:
+            violations.append(Violation(index, operation, name, value, message))
+
+    if np is not None and len(numeric) >= _VECTORIZE_THRESHOLD:
+        values = np.fromiter((v for (_, v) in numeric), dtype=np.float64)
+        bad = ~np.isfinite(values)
+        bad |= values < allowed_range.minimum
+        bad |= values > allowed_range.maximum
+        if allowed_range.integer:
+            bad |= values != np.floor(values)
+        failed = (numeric[i] for i in np.flatnonzero(bad))
+    else:
+        failed = (item for item in numeric if not allowed_range.contains(item[1]))
+
+    violations.extend(
+        Violation(index, operation, name, value, message) for (index, value) in failed
+    )
+    return violations
+
+
+_SAMPLING = {
+    "cfg": Range(3, 15),
+    "steps": Range(30, 50, integer=True),
+    "seed": Range(0, 2**32 - 1, integer=True),
+}
+
+
+def default_catalog() -> ConstraintCatalog:
+    """
+    Build a catalog with the documented limits of the Imagine API.
+
+    The catalog is a new instance, so it can be extended or tightened without
+    affecting other users.
+
+    :return: The catalog.
+    :rtype: :class:`ConstraintCatalog`
+    """
+    strength = {"strength": Range(0, 100, integer=True)}
+    aspect_ratios = {"aspect_ratio": list(AspectRatio)}
+
+    catalog = ConstraintCatalog()
+    catalog.register(
+        "generations",
+        Constraints(ranges=_SAMPLING, choices=aspect_ratios, required=("prompt",)),
+    )
+    catalog.register(
+        "image_remix",
+        Constraints(
+            ranges={**_SAMPLING, **strength}, required=("prompt", "image_path")
+        ),
+    )
+    catalog.register(
+        "variations",
+        Constraints(
+            ranges={**_SAMPLING, **strength}, required=("prompt", "image_path")
+        ),
+    )
+    catalog.register(
+        "in_painting",
+        Constraints(required=("prompt", "image_path", "mask_path")),
+    )
+    catalog.register(
+        "super_resolution",
+        Constraints(
+            ranges={
+                "tile_size": Range(64, 4096, integer=True),
+                "tile_overlap": Range(0, 512, integer=True),
+            },
+            required=("image_path",),
+        ),
+    )
+    return catalog
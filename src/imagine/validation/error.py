@@ -0,0 +1,60 @@
+from typing import Any, List, Optional
+
+
+class Violation:
+    """
+    A constraint broken by one request.
+
+    :param index: The position of the request in the validated batch.
+    :type index: int
+    :param operation: The operation of the request, e.g. ``generations``.
+    :type operation: str
+    :param field: The name of the offending argument.
+    :type field: str
+    :param value: The offending value.
+    :type value: Any
+    :param message: A description of the constraint.
+    :type message: str
+    """
+
+    __slots__ = ("index", "operation", "field", "value", "message")
+
+    def __init__(
+        self, index: int, operation: str, field: str, value: Any, message: str
+    ) -> None:
+        self.index = index
+        self.operation = operation
+        self.field = field
+        self.value = value
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"Violation({self})"
+
+    def __str__(self) -> str:
+        return (
+            f"#{self.index} {self.operation}: {self.field}={self.value!r}"
+            + f" {self.message}"
+        )
+
+
+class ValidationError(ValueError):
+    """
+    Raised when requests break the constraints of a :class:`ConstraintCatalog`.
+    Every violation found is reported, not only the first one.
+
+    :param violations: The violations found.
+    :type violations: List[:class:`Violation`]
+    """
+
+    violations: List[Violation]
+
+    def __init__(self, violations: List[Violation], limit: Optional[int] = 20) -> None:
+        self.violations = violations
+        shown = violations if limit is None else violations[:limit]
+        lines = [str(violation) for violation in shown]
+        if len(shown) < len(violations):
+            lines.append(f"... and {len(violations) - len(shown)} more")
+        super().__init__(
+            f"{len(violations)} constraint violation(s):\n  " + "\n  ".join(lines)
+        )
@@ -0,0 +1,520 @@
+"""
+Local HTTP/1.1 and HTTP/2 servers standing in for the Imagine API in tests
+and benchmarks.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, Awaitable, Dict, Optional, Set
+from imagine.utils.imports.dynamic import required_import
+
+
+class Http2StubServer:
+    """
+    A local cleartext HTTP/2 server answering every request with a fixed body
+    after a fixed latency, meant for tests and benchmarks of
+    :class:`Http2Client`.
+
+    The server runs an asyncio loop in a background thread and requires
+    ``h2``. Clients must use prior knowledge, see ``Http2Client(...,
+    prior_knowledge=True)``.
+
+    Usage:
+        >>> with Http2StubServer(latency=0.05) as server:
+        ...     client = Http2Client(base_url=server.base_url, prior_knowledge=True)
+        ...     status, content = client.post("/generations", {"prompt": "a cat"})
+    """
+
+    __latency: float
+    __body: bytes
+    __status: int
+    __echo: bool
+    __max_concurrent_streams: int
+    __window: int = 16 << 20
+    __loop: Optional[asyncio.AbstractEventLoop]
+    __server: Optional[Any]
+    __thread: Optional[threading.Thread]
+    __port: int
+    __tasks: Set["asyncio.Future[Any]"]
+    __connections: int
+    __requests: int
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.05,
+        body_size: int = 64 * 1024,
+        status: int = 200,
+        echo: bool = False,
+        max_concurrent_streams: int = 256,
+    ) -> None:
+        """
+        :param latency: The time before every response in seconds
+            (default: 0.05).
+        :type latency: float
+        :param body_size: The size of the response body in bytes
+            (default: 64 KiB).
+        :type body_size: int
+        :param status: The status code of the responses (default: 200).
+        :type status: int
+        :param echo: Whether to answer with the request path, a newline and
+            the request body instead of the fixed body, so that clients can
+            check that every response belongs to its request (default: False).
+        :type echo: bool
+        :param max_concurrent_streams: The number of streams a connection may
+            carry at once (default: 256).
+        :type max_concurrent_streams: int
+        """
+        self.__latency = latency
+        self.__body = b"\x00" * body_size
+        self.__status = status
+        self.__echo = echo
+        self.__max_concurrent_streams = max_concurrent_streams
+        self.__loop = None
+        self.__server = None
+        self.__thread = None
+        self.__port = 0
+        self.__tasks = set()
+        self.__connections = 0
+        self.__requests = 0
+
+    @property
+    def base_url(self) -> str:
+        """
+        :return: The URL of the running server.
+        :rtype: str
+        """
+        return f"http://127.0.0.1:{self.__port}"
+
+    @property
+    def connections(self) -> int:
+        """
+        :return: The number of connections accepted so far.
+        :rtype: int
+        """
+        return self.__connections
+
+    @property
+    def requests(self) -> int:
+        """
+        :return: The number of requests received so far.
+        :rtype: int
+        """
+        return self.__requests
+
+    def start(self) -> "Http2StubServer":
+        """
+        Start serving in a background thread.
+
+        :return: The server itself.
+        :rtype: :class:`Http2StubServer`
+        """
+        required_import("h2.connection")
+        started = threading.Event()
+
+        def run() -> None:
+            self.__loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.__loop)
+            self.__server = self.__loop.run_until_complete(
+                asyncio.start_server(
+                    lambda reader, writer: self.__spawn(self.__handle(reader, writer)),
+                    "127.0.0.1",
+                    0,
+                )
+            )
+            self.__port = self.__server.sockets[0].getsockname()[1]
+            started.set()
+            self.__loop.run_forever()
+
+            self.__server.close()
+            tasks = list(self.__tasks)
+            for task in tasks:
+                task.cancel()
+            self.__loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+            self.__loop.run_until_complete(self.__server.wait_closed())
+            self.__loop.close()
+
+        self.__thread = threading.Thread(target=run, daemon=True)
+        self.__thread.start()
+        started.wait()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the server.
+        """
+        if self.__loop is not None and self.__thread is not None:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__loop = None
+            self.__thread = None
+
+    def __enter__(self) -> "Http2StubServer":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __spawn(self, coroutine: Awaitable[None]) -> "asyncio.Future[Any]":
+        # Tasks are tracked so that they can be cancelled before the loop
+        # is closed
+        task = asyncio.ensure_future(coroutine)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection_module = required_import("h2.connection")
+        config_module = required_import("h2.config")
+        events_module = required_import("h2.events")
+        settings_module = required_import("h2.settings")
+
+        self.__connections += 1
+        connection = connection_module.H2Connection(
+            config=config_module.H2Configuration(client_side=False)
+        )
+        connection.initiate_connection()
+        # Large receive windows, like production servers advertise, keep
+        # concurrent uploads from stalling on flow control
+        codes = settings_module.SettingCodes
+        connection.update_settings(
+            {
+                codes.MAX_CONCURRENT_STREAMS: self.__max_concurrent_streams,
+                codes.INITIAL_WINDOW_SIZE: self.__window,
+            }
+        )
+        connection.increment_flow_control_window(self.__window)
+        writer.write(connection.data_to_send())
+
+        windows: Dict[int, asyncio.Event] = {}
+        requests: Dict[int, bytearray] = {}
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+
+                for event in connection.receive_data(data):
+                    if isinstance(event, events_module.RequestReceived):
+                        path = dict(event.headers).get(b":path", b"")
+                        requests[event.stream_id] = bytearray(path + b"\n")
+                    elif isinstance(event, events_module.DataReceived):
+                        connection.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                        if self.__echo:
+                            requests[event.stream_id] += event.data
+                    elif isinstance(event, events_module.StreamEnded):
+                        # Counted on arrival, like the HTTP/1.1 stub does
+                        self.__requests += 1
+                        windows[event.stream_id] = asyncio.Event()
+                        request = requests.pop(event.stream_id, bytearray())
+                        respond = self.__respond(
+                            connection,
+                            writer,
+                            event.stream_id,
+                            windows,
+                            bytes(request) if self.__echo else self.__body,
+                        )
+                        self.__spawn(respond)
+                    elif isinstance(event, events_module.WindowUpdated):
+                        for window in windows.values():
+                            window.set()
+                    elif isinstance(event, events_module.ConnectionTerminated):
+                        return
+                writer.write(connection.data_to_send())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __respond(
+        self,
+        connection: Any,
+        writer: asyncio.StreamWriter,
+        stream_id: int,
+        windows: Dict[int, asyncio.Event],
+        body: bytes,
+    ) -> None:
+        await asyncio.sleep(self.__latency)
+
+        view = memoryview(body)
+        try:
+            connection.send_headers(
+                stream_id,
+                [
+                    (":status", str(self.__status)),
+                    ("content-type", "image/png"),
+                    ("content-length", str(len(view))),
+                ],
+            )
+            while view:
+                size = min(
+                    connection.local_flow_control_window(stream_id),
+                    connection.max_outbound_frame_size,
+                    len(view),
+                )
+                if size <= 0:
+                    windows[stream_id].clear()
+                    writer.write(connection.data_to_send())
+                    await windows[stream_id].wait()
+                    continue
+                connection.send_data(stream_id, view[:size].tobytes())
+                view = view[size:]
+            connection.end_stream(stream_id)
+            writer.write(connection.data_to_send())
+        except Exception:
+            # The stream was reset or the connection closed
+            pass
+        finally:
+            windows.pop(stream_id, None)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Clients of benchmarks and tests connect from many threads at once
+    request_queue_size = 128
+
+
+class Http1StubServer:
+    """
+    The HTTP/1.1 counterpart of :class:`Http2StubServer`, answering every
+    request with a fixed body after a fixed latency from a thread per
+    connection. Connections are kept alive, so they can be pooled by
+    :class:`RequestClient`.
+
+    With ``cut_after``, the first ``cuts`` responses are broken off after that
+    many body bytes by closing the connection, and with ``resumable``, every
+    response names its result in ``Content-Location`` and the result can be
+    fetched again with range requests, to exercise resumed downloads.
+
+    Usage:
+        >>> with Http1StubServer(latency=0.05) as server:
+        ...     print(server.base_url)
+    """
+
+    __latency: float
+    __body: bytes
+    __status: int
+    __echo: bool
+    __cut_after: Optional[int]
+    __cuts: int
+    __resumable: bool
+    __results: Dict[str, bytes]
+    __server: Optional[_ThreadingHTTPServer]
+    __thread: Optional[threading.Thread]
+    __connections: int
+    __requests: int
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.05,
+        body_size: int = 64 * 1024,
+        status: int = 200,
+        echo: bool = False,
+        body: Optional[bytes] = None,
+        cut_after: Optional[int] = None,
+        cuts: int = 1,
+        resumable: bool = False,
+    ) -> None:
+        """
+        :param latency: The time before every response in seconds
+            (default: 0.05).
+        :type latency: float
+        :param body_size: The size of the response body in bytes
+            (default: 64 KiB).
+        :type body_size: int
+        :param status: The status code of the responses (default: 200).
+        :type status: int
+        :param echo: Whether to answer with the request path, a newline and
+            the request body instead of the fixed body, so that clients can
+            check that every response belongs to its request (default: False).
+        :type echo: bool
+        :param body: The response body, replacing ``body_size`` zero bytes
+            (default: None).
+        :type body: Optional[bytes]
+        :param cut_after: The number of body bytes after which responses are
+            broken off, or None to send them whole (default: None).
+        :type cut_after: Optional[int]
+        :param cuts: The number of responses broken off (default: 1).
+        :type cuts: int
+        :param resumable: Whether results can be fetched again with range
+            requests (default: False).
+        :type resumable: bool
+        """
+        self.__latency = latency
+        self.__body = b"\x00" * body_size if body is None else body
+        self.__status = status
+        self.__echo = echo
+        self.__cut_after = cut_after
+        self.__cuts = cuts if cut_after is not None else 0
+        self.__resumable = resumable
+        self.__results = {}
+        self.__server = None
+        self.__thread = None
+        self.__connections = 0
+        self.__requests = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """
+        :return: The URL of the running server.
+        :rtype: str
+        """
+        return f"http://127.0.0.1:{self.__server.server_address[1]}"
+
+    @property
+    def connections(self) -> int:
+        """
+        :return: The number of connections accepted so far.
+        :rtype: int
+        """
+        return self.__connections
+
+    @property
+    def requests(self) -> int:
+        """
+        :return: The number of requests received so far.
+        :rtype: int
+        """
+        return self.__requests
+
+    def __count(self, connection: bool) -> None:
+        with self.__lock:
+            if connection:
+                self.__connections += 1
+            else:
+                self.__requests += 1
+
+    def __cut(self) -> bool:
+        with self.__lock:
+            if self.__cuts <= 0:
+                return False
+            self.__cuts -= 1
+            return True
+
+    def __store(self, body: bytes) -> str:
+        with self.__lock:
+            location = f"/results/{len(self.__results)}"
+            self.__results[location] = body
+            return location
+
+    def start(self) -> "Http1StubServer":
+        """
+        Start serving in a background thread.
+
+        :return: The server itself.
+        :rtype: :class:`Http1StubServer`
+        """
+        latency, fixed_body, status, echo, count = (
+            self.__latency,
+            self.__body,
+            self.__status,
+            self.__echo,
+            self.__count,
+        )
+        cut_after, cut, resumable, store, results = (
+            self.__cut_after,
+            self.__cut,
+            self.__resumable,
+            self.__store,
+            self.__results,
+        )
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, small
+            # responses wait for the delayed ACK of the client
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                count(True)
+
+            def do_POST(self) -> None:
+                # Counted on arrival, so the count is final once a client has
+                # seen the (possibly broken off) response
+                count(False)
+                length = int(self.headers.get("Content-Length", 0))
+                request = self.rfile.read(length)
+                body = fixed_body
+                if echo:
+                    body = self.path.encode("utf-8") + b"\n" + request
+                time.sleep(latency)
+                self.send_response(status)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                if resumable:
+                    location = store(body)
+                    self.send_header("Accept-Ranges", "bytes")
+                    self.send_header("Content-Location", location)
+                    self.send_header("ETag", f'"{location}"')
+                self.end_headers()
+                self.__send(body)
+
+            def do_GET(self) -> None:
+                count(False)
+                body = results.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                unit, _, rest = self.headers.get("Range", "").partition("=")
+                start = int(rest.split("-", 1)[0]) if unit == "bytes" else 0
+                if 0 < start < len(body):
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+                    )
+                else:
+                    self.send_response(200)
+                    start = 0
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body) - start))
+                self.end_headers()
+                self.__send(body[start:])
+
+            def __send(self, body: bytes) -> None:
+                if cut_after is not None and cut_after < len(body) and cut():
+                    self.wfile.write(body[:cut_after])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self.wfile.write(body)
+
+            def log_message(self, *_: Any) -> None:
+                pass
+
+        self.__server = _ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the server.
+        """
+        if self.__server is not None and self.__thread is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__thread.join()
+            self.__thread = None
+
+    def __enter__(self) -> "Http1StubServer":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
@@ -0,0 +1,68 @@
+import pytest
+
+from imagine.remote.http_client import HttpClient
+from imagine.remote.limiter.adaptive import AdaptiveLimiter
+from imagine.remote.rest.http_client import RestClient
+
+
+class _FailingClient(HttpClient):
+    def post(self, endpoint, parameters, files=None, headers=None):
+        raise ConnectionError("connection refused")
+
+
+def _saturated(limit=4, **options):
+    limiter = AdaptiveLimiter(initial_limit=limit, cooldown=0, **options)
+    for _ in range(limit):
+        limiter.acquire()
+    return limiter
+
+
+def test_successes_raise_a_saturated_limit():
+    limiter = _saturated()
+    for _ in range(20):
+        limiter.record(200, 0.1)
+
+    assert limiter.limit > 4
+    assert limiter.history[-1][2] == "increase"
+
+
+def test_successes_do_not_raise_an_unused_limit():
+    limiter = AdaptiveLimiter(initial_limit=4)
+    limiter.acquire()
+    for _ in range(100):
+        limiter.record(200, 0.1)
+
+    assert limiter.limit == 4
+
+
+@pytest.mark.parametrize("status", [400, 422, 424, 1000, 1001])
+def test_other_responses_leave_the_limit_unchanged(status):
+    limiter = _saturated()
+    for _ in range(20):
+        limiter.record(status, 0.1)
+
+    assert limiter.limit == 4
+
+
+@pytest.mark.parametrize(
+    "status, reason",
+    [(429, "throttled"), (503, "throttled"), (500, "failure"), (1002, "failure")],
+)
+def test_overload_and_failures_cut_the_limit(status, reason):
+    limiter = _saturated(limit=8)
+    limiter.record(status, 0.1)
+
+    assert limiter.limit == 4
+    assert limiter.history[-1][2] == reason
+
+
+def test_requests_that_raise_cut_the_limit_and_release_the_slot():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    client = RestClient("token", _FailingClient(), limiter)
+
+    with pytest.raises(ConnectionError):
+        client.post("/generations", {"prompt": "a cat"})
+
+    assert limiter.limit == 4
+    assert limiter.history[-1][2] == "failure"
+    assert limiter.metrics()["in_flight"] == 0
@@ -0,0 +1,108 @@
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from imagine.models.image import Image
+from imagine.models.response import Response
+from imagine.storage.archive import ArchiveSink
+
+
+def _members(path):
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {
+            member.name: archive.extractfile(member).read()
+            for member in archive.getmembers()
+        }
+
+
+class _BrokenFile(io.RawIOBase):
+    def writable(self):
+        return True
+
+    def write(self, data):
+        raise OSError("disk full")
+
+
+@pytest.mark.parametrize("name", ["batch.tar", "batch.tar.gz", "batch.zip"])
+def test_concurrent_puts_are_read_back_with_their_manifest(tmp_path, name):
+    path = str(tmp_path / name)
+    images = {f"{index:03d}.jpeg": bytes([index]) * (index + 1) for index in range(40)}
+    names = sorted(images)
+
+    with ArchiveSink(path, queue_size=4) as sink:
+
+        def feed(offset):
+            for image_name in names[offset::8]:
+                sink.put(
+                    image_name,
+                    Response(Image(images[image_name]), 200),
+                    prompt=image_name,
+                )
+
+        threads = [threading.Thread(target=feed, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sink.put("raw.jpeg", b"raw bytes")
+
+    members = _members(path)
+    manifest = [json.loads(line) for line in members.pop("manifest.jsonl").splitlines()]
+
+    assert members == {**images, "raw.jpeg": b"raw bytes"}
+    assert sink.written == 41
+    assert sorted(entry["name"] for entry in manifest) == sorted(members)
+    for entry in manifest:
+        assert entry["stored"]
+        assert entry["size"] == len(members[entry["name"]])
+        assert entry["sha256"] == hashlib.sha256(members[entry["name"]]).hexdigest()
+    entry = next(entry for entry in manifest if entry["name"] == "007.jpeg")
+    assert entry["metadata"] == {"status": "OK", "prompt": "007.jpeg"}
+
+
+def test_failed_responses_are_only_listed_in_the_manifest(tmp_path):
+    path = str(tmp_path / "batch.tar")
+    with ArchiveSink(path) as sink:
+        sink.put("ok.jpeg", Image(b"image"))
+        sink.put("failed.jpeg", Response(None, 424), seed=7)
+
+    members = _members(path)
+    manifest = [json.loads(line) for line in members["manifest.jsonl"].splitlines()]
+
+    assert sorted(members) == ["manifest.jsonl", "ok.jpeg"]
+    assert manifest[1] == {
+        "name": "failed.jpeg",
+        "stored": False,
+        "metadata": {"status": "NOT_ENOUGH_TOKENS", "seed": 7},
+    }
+    assert sink.written == 1
+
+
+def test_duplicate_names_and_puts_after_close_are_rejected(tmp_path):
+    sink = ArchiveSink(str(tmp_path / "batch.zip"))
+    sink.put("a.jpeg", b"a")
+
+    with pytest.raises(ValueError, match="already has a member"):
+        sink.put("a.jpeg", b"again")
+    with pytest.raises(ValueError, match="already has a member"):
+        sink.put("manifest.jsonl", b"{}")
+    sink.close()
+    with pytest.raises(ValueError, match="closed"):
+        sink.put("b.jpeg", b"b")
+
+
+def test_writer_errors_surface_from_close():
+    sink = ArchiveSink(_BrokenFile(), format="tar")
+    sink.put("a.jpeg", b"a" * 100000)
+
+    with pytest.raises(RuntimeError) as error:
+        sink.close()
+    assert isinstance(error.value.__cause__, OSError)
@@ -0,0 +1,103 @@
+import json
+
+from imagine.benchmark.suite import (
+    BenchmarkCase,
+    BenchmarkResult,
+    NullHttpClient,
+    compare,
+    default_cases,
+    main,
+    run_benchmarks,
+)
+from imagine.utils.profiling.profiler import CallProfiler
+
+MIB = 1 << 20
+
+
+def _result(name, median, peak_bytes):
+    return BenchmarkResult(
+        name=name,
+        rounds=1,
+        iterations=1,
+        minimum=median,
+        median=median,
+        mean=median,
+        stddev=0.0,
+        peak_bytes=peak_bytes,
+        retained_bytes=0,
+    )
+
+
+def test_null_client_answers_at_once():
+    client = NullHttpClient(status=503, body=b"busy")
+
+    assert client.post("/generations", {"prompt": "a cat"}) == (503, b"busy")
+
+
+def test_default_cases_run():
+    for case in default_cases():
+        case.function()
+
+
+def test_timings_and_allocations_are_consistent():
+    kept = []
+    cases = [
+        BenchmarkCase("allocate", lambda: bytearray(MIB)),
+        BenchmarkCase("retain", lambda: kept.append(bytearray(MIB // 4))),
+    ]
+
+    allocate, retain = run_benchmarks(
+        cases, repeat=3, min_time=0.01, allocation_samples=5
+    )
+
+    for result in (allocate, retain):
+        assert result.rounds == 3
+        assert result.iterations >= 1
+        assert 0 < result.minimum <= result.median
+        assert result.peak_bytes >= result.retained_bytes >= 0
+    assert allocate.peak_bytes >= MIB
+    assert allocate.retained_bytes < MIB // 4
+    assert retain.retained_bytes >= MIB // 4
+
+
+def test_profiler_collects_one_round_per_case(tmp_path):
+    profiler = CallProfiler(str(tmp_path))
+    cases = [BenchmarkCase("status", lambda: None)]
+
+    run_benchmarks(
+        cases, repeat=1, min_time=0.01, allocation_samples=1, profiler=profiler
+    )
+
+    assert profiler.calls() == {"status": 1}
+    assert profiler.dump() == [str(tmp_path / "status.prof")]
+
+
+def test_compare_reports_only_regressions_beyond_the_tolerance():
+    baseline = {
+        "slower": {"median": 1.0, "peak_bytes": 100},
+        "bigger": {"median": 1.0, "peak_bytes": 100},
+        "noise": {"median": 1.0, "peak_bytes": 100},
+        "unmeasured": {"median": 0.0, "peak_bytes": 0},
+    }
+    results = [
+        _result("slower", 1.5, 100),
+        _result("bigger", 1.0, 200),
+        _result("noise", 1.2, 120),
+        _result("unmeasured", 1.0, 100),
+        _result("new", 1.0, 100),
+    ]
+
+    regressions = compare(baseline, results, tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("slower: median")
+    assert regressions[1].startswith("bigger: peak_bytes")
+
+
+def test_command_line_compares_against_its_own_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    options = ["-k", "status", "--repeat", "1", "--min-time", "0.01"]
+
+    assert main(options + ["--json", str(baseline)]) == 0
+    assert list(json.loads(baseline.read_text())) == ["status"]
+    assert main(options + ["--compare", str(baseline), "--tolerance", "100"]) == 0
@@ -0,0 +1,88 @@
+import threading
+
+from imagine.bulk.directory import process_directory
+from imagine.models.image import Image
+from imagine.models.response import Response
+from imagine.models.status import Status
+
+
+class _UpscalingImagine:
+    def super_resolution(self, data, priority=None, cancellation=None):
+        return Response(Image(bytes(data) * 2), Status.OK)
+
+
+def _tree(tmp_path, count):
+    source = tmp_path / "photos"
+    (source / "nested").mkdir(parents=True)
+    for index in range(count):
+        folder = source / "nested" if index % 2 else source
+        (folder / f"{index}.png").write_bytes(b"%d" % index)
+    return source
+
+
+def _run(*args, **kwargs):
+    # Runs in a thread, so a deadlock fails the test instead of hanging it
+    outcome = {}
+    thread = threading.Thread(
+        target=lambda: outcome.update(report=process_directory(*args, **kwargs)),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), "process_directory deadlocked"
+    return outcome["report"]
+
+
+def test_images_are_written_into_a_mirror_of_the_tree(tmp_path):
+    source = _tree(tmp_path, 6)
+    output = tmp_path / "upscaled"
+
+    report = _run(_UpscalingImagine(), str(source), str(output), max_workers=2)
+
+    assert (report.processed, report.skipped, report.failed) == (6, 0, 0)
+    assert (output / "nested" / "1.png").read_bytes() == b"11"
+    assert (output / "4.png").read_bytes() == b"44"
+
+
+def test_a_raising_progress_callback_does_not_leak_window_slots(tmp_path):
+    source = _tree(tmp_path, 6)
+    calls = []
+
+    def progress(relative, outcome, report):
+        calls.append(outcome)
+        raise RuntimeError("progress bar closed")
+
+    report = _run(
+        _UpscalingImagine(),
+        str(source),
+        str(tmp_path / "upscaled"),
+        max_workers=1,
+        read_ahead=0,
+        progress=progress,
+    )
+
+    assert report.processed == 6
+    assert calls == ["processed"] * 6
+
+
+def test_a_raising_progress_callback_records_skipped_images_once(tmp_path):
+    source = _tree(tmp_path, 4)
+    output = tmp_path / "upscaled"
+    _run(_UpscalingImagine(), str(source), str(output))
+    calls = []
+
+    def progress(relative, outcome, report):
+        calls.append(outcome)
+        raise RuntimeError("progress bar closed")
+
+    report = _run(
+        _UpscalingImagine(),
+        str(source),
+        str(output),
+        max_workers=1,
+        read_ahead=0,
+        progress=progress,
+    )
+
+    assert (report.processed, report.skipped, report.failed) == (0, 4, 0)
+    assert calls == ["skipped"] * 4
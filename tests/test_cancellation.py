@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.models.status import Status
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.remote.limiter.adaptive import AdaptiveLimiter
+from imagine.remote.scheduler.scheduler import Lane, PriorityScheduler
+from imagine.utils.cancellation.token import (
+    CancellationToken,
+    CancelledError,
+    call_interruptibly,
+    cancellation_scope,
+    current_token,
+)
+from tests.support.stubs import Http1StubServer
+
+pytest.importorskip("requests")
+
+
+def _cancel_after(token, seconds):
+    timer = threading.Timer(seconds, token.cancel)
+    timer.start()
+    return timer
+
+
+def _timed(function, *args, **kwargs):
+    began = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - began
+
+
+def test_callbacks_run_once_and_can_be_removed():
+    token = CancellationToken()
+    calls = []
+    token.register(lambda: calls.append("kept"))
+    unregister = token.register(lambda: calls.append("removed"))
+    unregister()
+
+    token.cancel()
+    token.cancel()
+    token.register(lambda: calls.append("late"))
+
+    assert calls == ["kept", "late"]
+    assert token.cancelled and token.wait(0)
+    with pytest.raises(CancelledError):
+        token.raise_if_cancelled()
+
+
+def test_scopes_nest_and_are_not_inherited_by_threads():
+    outer, inner = CancellationToken(), CancellationToken()
+    seen = []
+    with cancellation_scope(outer):
+        with cancellation_scope(inner):
+            assert current_token() is inner
+            thread = threading.Thread(target=lambda: seen.append(current_token()))
+            thread.start()
+            thread.join()
+        assert current_token() is outer
+    assert current_token() is None
+    assert seen == [None]
+
+
+def test_call_interruptibly_gives_up_and_discards_the_late_result():
+    token = CancellationToken()
+    release, discarded = threading.Event(), []
+    _cancel_after(token, 0.1)
+
+    with pytest.raises(CancelledError):
+        call_interruptibly(
+            lambda: release.wait(5) and "late", token, discard=discarded.append
+        )
+    release.set()
+    time.sleep(0.1)
+
+    assert discarded == ["late"]
+    assert call_interruptibly(lambda: "now", CancellationToken()) == "now"
+    with pytest.raises(ZeroDivisionError):
+        call_interruptibly(lambda: 1 / 0, CancellationToken())
+
+
+def test_in_flight_call_returns_at_once_and_frees_the_limiter_slot():
+    with Http1StubServer(latency=3, body_size=16) as server:
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+        imagine = Imagine(
+            "token", client=RequestClient(base_url=server.base_url), limiter=limiter
+        )
+        token = CancellationToken()
+        _cancel_after(token, 0.3)
+
+        response, seconds = _timed(imagine.generations, "a cat", cancellation=token)
+
+        assert response.status == Status.CANCELLED
+        assert seconds < 1.5
+        assert limiter.metrics()["in_flight"] == 0
+
+
+def test_queued_call_leaves_the_scheduler_when_cancelled():
+    with Http1StubServer(latency=1, body_size=16) as server:
+        scheduler = PriorityScheduler(1, {"default": Lane()})
+        imagine = Imagine(
+            "token", client=RequestClient(base_url=server.base_url), scheduler=scheduler
+        )
+        holder = threading.Thread(target=imagine.generations, args=("a dog",))
+        holder.start()
+        time.sleep(0.2)
+        token = CancellationToken()
+        _cancel_after(token, 0.2)
+
+        response, seconds = _timed(imagine.generations, "a cat", cancellation=token)
+        holder.join()
+
+        assert response.status == Status.CANCELLED
+        assert seconds < 0.7
+        assert server.requests == 1
+        assert imagine.generations("a fox").status == Status.OK
+
+
+def test_in_flight_call_over_http2_returns_at_once():
+    pytest.importorskip("h2")
+    pytest.importorskip("httpx")
+    from imagine.remote.http2.http_client import Http2Client
+    from tests.support.stubs import Http2StubServer
+
+    with Http2StubServer(latency=3, body_size=16) as server:
+        imagine = Imagine(
+            "token", client=Http2Client(base_url=server.base_url, prior_knowledge=True)
+        )
+        token = CancellationToken()
+        _cancel_after(token, 0.3)
+
+        response, seconds = _timed(imagine.generations, "a cat", cancellation=token)
+
+        assert response.status == Status.CANCELLED
+        assert seconds < 1.5
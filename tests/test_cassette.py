@@ -0,0 +1,115 @@
+import gzip
+import json
+import time
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.models.status import Status
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.remote.cassette.cassette import (
+    CassetteWriter,
+    Exchange,
+    read_cassette,
+    request_key,
+)
+from imagine.remote.cassette.http_client import RecordingHttpClient, ReplayHttpClient
+from tests.support.stubs import Http1StubServer
+
+
+def _record(path, *exchanges):
+    writer = CassetteWriter(str(path))
+    for endpoint, parameters, status, body, latency in exchanges:
+        writer.write(
+            Exchange(request_key(endpoint, parameters), endpoint, status, body, latency)
+        )
+    writer.close()
+    return str(path)
+
+
+def test_calls_recorded_through_imagine_are_replayed(tmp_path):
+    pytest.importorskip("requests")
+    path = str(tmp_path / "run.cassette")
+    prompts = ["a cat", "a dog"]
+
+    with Http1StubServer(latency=0, body_size=32) as server:
+        with RecordingHttpClient(
+            RequestClient(base_url=server.base_url), path
+        ) as recorder:
+            imagine = Imagine("secret-token", client=recorder)
+            recorded = [imagine.generations(prompt) for prompt in prompts]
+
+    imagine = Imagine("other-token", client=ReplayHttpClient(path, latency_scale=0))
+    replayed = [imagine.generations(prompt) for prompt in prompts]
+
+    assert server.requests == 2
+    for before, after in zip(recorded, replayed):
+        assert before.status == after.status == Status.OK
+        assert before.data.bytes == after.data.bytes
+    with gzip.open(path, "rt") as file:
+        assert "secret-token" not in file.read()
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    path = _record(
+        tmp_path / "run.cassette",
+        *[
+            ("/generations", {"prompt": str(index)}, 200, b"same", 0.1)
+            for index in range(3)
+        ],
+        ("/generations", {"prompt": "other"}, 200, b"different", 0.1),
+    )
+
+    with gzip.open(path, "rt") as file:
+        records = [json.loads(line) for line in file]
+
+    assert [record["type"] for record in records].count("body") == 2
+    assert [exchange.body for exchange in read_cassette(path)] == [
+        b"same",
+        b"same",
+        b"same",
+        b"different",
+    ]
+
+
+def test_repeated_requests_cycle_through_their_exchanges(tmp_path):
+    parameters = {"prompt": "a cat", "seed": 1}
+    path = _record(
+        tmp_path / "run.cassette",
+        ("/generations", parameters, 200, b"first", 0),
+        ("/generations", parameters, 503, b"second", 0),
+    )
+    client = ReplayHttpClient(path)
+
+    answers = [
+        client.post("/generations", {"prompt": "a cat", "seed": "1"}) for _ in range(3)
+    ]
+
+    assert answers == [(200, b"first"), (503, b"second"), (200, b"first")]
+
+
+@pytest.mark.parametrize("scale, low, high", [(0.5, 0.09, 0.19), (0, 0, 0.05)])
+def test_recorded_latencies_are_scaled(tmp_path, scale, low, high):
+    path = _record(
+        tmp_path / "run.cassette", ("/generations", {"prompt": "a cat"}, 200, b"", 0.2)
+    )
+    client = ReplayHttpClient(path, latency_scale=scale)
+
+    began = time.perf_counter()
+    client.post("/generations", {"prompt": "a cat"})
+
+    assert low <= time.perf_counter() - began < high
+
+
+def test_unrecorded_requests_fall_back_to_their_endpoint_or_raise(tmp_path):
+    path = _record(
+        tmp_path / "run.cassette", ("/generations", {"prompt": "a cat"}, 200, b"cat", 0)
+    )
+    strict = ReplayHttpClient(path, latency_scale=0)
+    lenient = ReplayHttpClient(path, latency_scale=0, match_endpoint=True)
+
+    with pytest.raises(KeyError):
+        strict.post("/generations", {"prompt": "a dog"})
+    assert lenient.post("/generations", {"prompt": "a dog"}) == (200, b"cat")
+    with pytest.raises(KeyError):
+        lenient.post("/variations", {"prompt": "a cat"}, files={"image": b"\x89PNG"})
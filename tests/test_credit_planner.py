@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.credits import CostModel, CreditPlanner
+from imagine.features.aspect_ratio import AspectRatio
+from imagine.features.generations.style_ids import GenerationsStyle
+from imagine.models.status import Status
+from imagine.remote.http_client import HttpClient
+from imagine.specs import GenerationsSpec
+
+
+class _CreditClient(HttpClient):
+    """
+    Answer the first ``credits`` requests and report the credits exhausted
+    afterwards.
+    """
+
+    def __init__(self, credits):
+        self.credits = credits
+        self.prompts = []
+        self.__lock = threading.Lock()
+
+    def post(self, endpoint, parameters, files=None, headers=None):
+        with self.__lock:
+            self.prompts.append(parameters["prompt"])
+            if len(self.prompts) > self.credits:
+                return 424, b"Not enough tokens."
+        return 200, b"image"
+
+
+def _specs(*prompts, high_res=()):
+    return [
+        GenerationsSpec(prompt, high_res_results=prompt in high_res)
+        for prompt in prompts
+    ]
+
+
+def test_plans_keep_the_prefix_or_the_most_requests():
+    planner = CreditPlanner(budget=3)
+    specs = _specs("big", "a", "huge", "b", "a", high_res=("big", "huge"))
+
+    by_order = planner.plan(specs)
+    by_count = planner.plan(specs, prefer="count")
+
+    assert [spec.prompt for spec in by_order.accepted] == ["big", "a"]
+    assert [spec.prompt for spec in by_order.deferred] == ["huge", "b"]
+    assert by_order.cost == 3 and not by_order.complete
+    assert [spec.prompt for spec in by_count.accepted] == ["a", "b"]
+    assert [spec.prompt for spec in by_count.deferred] == ["big", "huge"]
+    assert by_count.cost == 2
+    with pytest.raises(ValueError):
+        planner.plan(specs, prefer="cheapest")
+
+
+def test_cost_factors_match_enums_by_member_or_value():
+    model = CostModel()
+    model.register(
+        "generations",
+        2.0,
+        factors={
+            "style": {GenerationsStyle.REALISTIC: 3.0},
+            "aspect_ratio": {"16:9": 1.5},
+        },
+    )
+
+    assert model.estimate(GenerationsSpec("a")) == 2.0
+    assert model.estimate(GenerationsSpec("a", style=GenerationsStyle.REALISTIC)) == 6
+    wide = GenerationsSpec("a", aspect_ratio=AspectRatio.SIXTEEN_RATIO_NINE)
+    assert model.estimate(wide) == 3.0
+    assert CostModel(default=4).estimate(GenerationsSpec("a")) == 4
+
+
+def test_dispatch_halts_after_the_first_exhausted_response():
+    client = _CreditClient(credits=2)
+    planner = CreditPlanner()
+    specs = _specs("a", "b", "c", "d", "e")
+
+    batch = planner.submit_many(Imagine("token", client=client), specs, max_workers=1)
+
+    assert batch.halted
+    assert client.prompts == ["a", "b", "c"]
+    assert [response.status for response in batch.responses[:3]] == [
+        Status.OK,
+        Status.OK,
+        Status.NOT_ENOUGH_TOKENS,
+    ]
+    assert batch.unsent(specs) == specs[3:]
+    assert batch.spent == 2
+    assert planner.budget == 0
+
+
+def test_the_budget_carries_over_between_batches():
+    imagine = Imagine("token", client=_CreditClient(credits=100))
+    planner = CreditPlanner(budget=5)
+
+    first = planner.submit_many(imagine, _specs("a", "b", "c"))
+    second = planner.submit_many(imagine, _specs("d", "e", "f"))
+
+    assert first.spent == 3 and first.plan.complete
+    assert planner.budget == 0
+    assert [spec.prompt for spec in second.plan.accepted] == ["d", "e"]
+    assert second.responses[2] is None and not second.halted
+    assert second.spent == 2
+
+    planner.set_budget(None)
+    third = planner.submit_many(imagine, _specs("f"))
+    assert third.plan.complete and planner.budget is None
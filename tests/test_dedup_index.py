@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from imagine.dedup.index import BKTree, MultiIndexHashTable
+
+
+def _hashes(count, seed=0):
+    generator = random.Random(seed)
+    hashes = [generator.getrandbits(64) for _ in range(count)]
+    # Near-duplicates of the first hashes, a few bits apart
+    for base in hashes[:50]:
+        flipped = base
+        for bit in generator.sample(range(64), generator.randint(1, 10)):
+            flipped ^= 1 << bit
+        hashes.append(flipped)
+    return hashes
+
+
+def _brute_force(hashes, query, max_distance):
+    return sorted(
+        (key, bin(value ^ query).count("1"))
+        for key, value in enumerate(hashes)
+        if bin(value ^ query).count("1") <= max_distance
+    )
+
+
+@pytest.mark.parametrize(
+    "chunks, max_distance",
+    [(1, 0), (2, 3), (4, 0), (4, 3), (4, 6), (4, 10), (5, 6), (8, 10)],
+)
+def test_multi_index_finds_exactly_the_hashes_within_the_distance(chunks, max_distance):
+    hashes = _hashes(500)
+    table = MultiIndexHashTable(max_distance, chunks=chunks)
+    for key, value in enumerate(hashes):
+        table.add(value, key)
+
+    for query in hashes[:60]:
+        expected = _brute_force(hashes, query, max_distance)
+        assert sorted(table.search(query, max_distance)) == expected
+
+
+def test_bk_tree_agrees_with_brute_force():
+    hashes = _hashes(500)
+    tree = BKTree()
+    for key, value in enumerate(hashes):
+        tree.add(value, key)
+
+    for query in hashes[:60]:
+        assert sorted(tree.search(query, 6)) == _brute_force(hashes, query, 6)
+
+
+def test_search_beyond_the_built_distance_is_rejected():
+    with pytest.raises(ValueError):
+        MultiIndexHashTable(4).search(0, 5)
@@ -0,0 +1,135 @@
+import time
+
+from imagine.distributed.sqlite import SQLiteBroker
+from imagine.distributed.worker import Producer, Worker
+from imagine.models.image import Image
+from imagine.models.response import Response
+from imagine.models.status import Status
+from imagine.specs.request import GenerationsSpec, RequestSpec, VariationsSpec
+
+
+class _ScriptedImagine:
+    """
+    Answers every submitted spec with the next outcome of a script: a status,
+    or an exception to raise.
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.specs = []
+
+    def submit(self, spec, cancellation=None):
+        self.specs.append(spec)
+        outcome = self.outcomes.pop(0) if self.outcomes else Status.OK
+        if isinstance(outcome, Exception):
+            raise outcome
+        data = Image(b"result") if outcome == Status.OK else None
+        return Response(data, outcome)
+
+
+def _worker(imagine, broker, **options):
+    options = {"poll_interval": 0.02, "retry_delay": 0, **options}
+    return Worker(imagine, broker, **options)
+
+
+def test_producer_sends_input_images_with_the_job(tmp_path):
+    image = tmp_path / "photo.png"
+    image.write_bytes(b"\x89PNG photo")
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+
+    Producer(broker).submit(VariationsSpec(str(image), "a cat"))
+    Producer(broker, embed_files=False).submit(VariationsSpec(str(image), "a dog"))
+
+    embedded = RequestSpec.from_json(broker.reserve(60).payload)
+    referenced = RequestSpec.from_json(broker.reserve(60).payload)
+    assert embedded.image_path == b"\x89PNG photo"
+    assert referenced.image_path == str(image)
+
+
+def test_exit_when_empty_waits_for_delayed_retries(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    producer = Producer(broker)
+    job_id = producer.submit(GenerationsSpec("a cat"))
+    imagine = _ScriptedImagine(ConnectionError("connection reset"))
+
+    processed = _worker(imagine, broker, retry_delay=0.3).run(exit_when_empty=True)
+
+    assert processed == 2
+    assert producer.result(job_id).status == Status.OK
+    assert broker.pending() == 0
+
+
+def test_cancelled_jobs_do_not_use_up_attempts(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    producer = Producer(broker)
+    job_id = producer.submit(GenerationsSpec("a cat"))
+    imagine = _ScriptedImagine(
+        Status.CANCELLED, Status.CANCELLED, ConnectionError("connection reset")
+    )
+
+    _worker(imagine, broker, max_attempts=2).run(exit_when_empty=True)
+
+    assert len(imagine.specs) == 4
+    assert producer.result(job_id).status == Status.OK
+
+
+def test_release_without_counting_an_attempt(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    broker.enqueue("{}")
+
+    broker.release(broker.reserve(60), count_attempt=False)
+    assert broker.reserve(60).attempts == 1
+
+
+def test_a_late_completion_does_not_overwrite_the_current_lease(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    job_id = broker.enqueue("{}")
+    stale = broker.reserve(0.05)
+    time.sleep(0.1)
+    current = broker.reserve(60)
+
+    broker.complete(stale, 500, b"stale failure")
+    assert broker.pending() == 1
+    broker.complete(current, 200, b"good")
+    broker.complete(stale, 500, b"stale failure")
+
+    assert broker.result(job_id) == (200, b"good")
+    assert broker.pending() == 0
+
+
+def test_throttled_and_failed_responses_are_retried(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    producer = Producer(broker)
+    job_id = producer.submit(GenerationsSpec("a cat"))
+    imagine = _ScriptedImagine(
+        Status.TOO_MANY_REQUESTS, Status.SERVICE_UNAVAILABLE, Status.OK
+    )
+
+    _worker(imagine, broker, max_attempts=3).run(exit_when_empty=True)
+
+    assert len(imagine.specs) == 3
+    assert producer.result(job_id).status == Status.OK
+
+
+def test_the_last_throttled_response_is_published_after_max_attempts(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    producer = Producer(broker)
+    job_id = producer.submit(GenerationsSpec("a cat"))
+    imagine = _ScriptedImagine(*[Status.TOO_MANY_REQUESTS] * 5)
+
+    _worker(imagine, broker, max_attempts=2).run(exit_when_empty=True)
+
+    assert len(imagine.specs) == 2
+    assert producer.result(job_id).status == Status.TOO_MANY_REQUESTS
+
+
+def test_client_errors_are_published_at_once(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    producer = Producer(broker)
+    job_id = producer.submit(GenerationsSpec("a cat"))
+    imagine = _ScriptedImagine(Status.UNPROCESSABLE_ENTITY)
+
+    _worker(imagine, broker).run(exit_when_empty=True)
+
+    assert len(imagine.specs) == 1
+    assert producer.result(job_id).status == Status.UNPROCESSABLE_ENTITY
@@ -0,0 +1,136 @@
+import io
+import struct
+
+import pytest
+
+from imagine.models.status import Status
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.utils.file.integrity import (
+    check_image_file_integrity,
+    check_image_integrity,
+)
+from tests.support.stubs import Http1StubServer
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _encode(format, size=(64, 48)):
+    buffer = io.BytesIO()
+    PIL.new("RGB", size, (200, 40, 10)).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+PNG = _encode("PNG", (256, 256))
+JPEG = _encode("JPEG")
+
+
+def _with_thumbnail(jpeg, thumbnail):
+    # An APP1 segment right after SOI, embedding a whole JPEG
+    segment = b"\xff\xe1" + struct.pack(">H", len(thumbnail) + 2) + thumbnail
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+def test_a_cut_download_is_resumed_with_a_range_request():
+    with Http1StubServer(
+        latency=0, body=PNG, cut_after=len(PNG) // 2, resumable=True
+    ) as server:
+        status, content = RequestClient(base_url=server.base_url).post(
+            "/generations", {"prompt": "a cat"}
+        )
+
+        assert (status, content) == (200, PNG)
+        # The POST and one ranged GET
+        assert server.requests == 2
+
+
+def test_a_short_download_is_rejected_without_sending_again():
+    with Http1StubServer(latency=0, body=PNG, cut_after=100) as server:
+        status, content = RequestClient(base_url=server.base_url).post(
+            "/generations", {"prompt": "a cat"}
+        )
+
+        assert status == Status.INCOMPLETE_RESPONSE.value
+        assert content.startswith(b"The download broke off")
+        assert server.requests == 1
+
+
+def test_sending_again_is_opt_in():
+    with Http1StubServer(latency=0, body=PNG, cut_after=100) as server:
+        client = RequestClient(base_url=server.base_url, max_retries=1)
+        status, content = client.post("/generations", {"prompt": "a cat"})
+
+        assert (status, content) == (200, PNG)
+        assert server.requests == 2
+
+
+def test_persistent_cuts_stop_after_max_resumes():
+    with Http1StubServer(
+        latency=0, body=PNG, cut_after=100, cuts=100, resumable=True
+    ) as server:
+        client = RequestClient(base_url=server.base_url, max_resumes=2)
+        status, _ = client.post("/generations", {"prompt": "a cat"})
+
+        assert status == Status.INCOMPLETE_RESPONSE.value
+        assert server.requests == 3
+
+
+def test_complete_bodies_pass_without_a_framing_check():
+    truncated = PNG[:-12]
+    with Http1StubServer(latency=0, body=truncated) as server:
+        status, content = RequestClient(base_url=server.base_url).post(
+            "/generations", {"prompt": "a cat"}
+        )
+
+    assert (status, content) == (200, truncated)
+
+
+def test_the_framing_check_is_opt_in():
+    with Http1StubServer(latency=0, body=PNG[:-12]) as server:
+        client = RequestClient(base_url=server.base_url, check_images=True)
+        status, content = client.post("/generations", {"prompt": "a cat"})
+
+        assert status == Status.INCOMPLETE_RESPONSE.value
+        assert b"IEND" in content
+        assert server.requests == 1
+
+    with Http1StubServer(latency=0, body=PNG + b"trailing data") as server:
+        client = RequestClient(base_url=server.base_url, check_images=True)
+        assert client.post("/generations", {"prompt": "a cat"})[0] == 200
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        PNG,
+        PNG + b"\x00" * 1000,
+        PNG + b"trailing data",
+        JPEG,
+        JPEG + b"trailing data" * 100,
+        _with_thumbnail(JPEG, _encode("JPEG", (8, 8))),
+        b"not an image",
+    ],
+)
+def test_complete_images_pass(data, tmp_path):
+    path = tmp_path / "image"
+    path.write_bytes(data)
+
+    assert check_image_integrity(data) is None
+    assert check_image_file_integrity(str(path)) is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        PNG[:-12],
+        PNG[: len(PNG) // 2],
+        JPEG[:-2],
+        _with_thumbnail(JPEG[:-2], _encode("JPEG", (8, 8))),
+    ],
+)
+def test_incomplete_images_fail(data, tmp_path):
+    path = tmp_path / "image"
+    path.write_bytes(data)
+
+    assert check_image_integrity(data) is not None
+    assert check_image_file_integrity(str(path)) is not None
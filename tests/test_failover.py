@@ -0,0 +1,130 @@
+import socket
+import time
+from collections import Counter
+
+from imagine.remote.failover.health import tcp_health_check
+from imagine.remote.failover.http_client import FailoverClient
+from imagine.remote.failover.selector import EndpointSelector
+from tests.support.stubs import Http1StubServer
+
+
+def _closed_port_url():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+
+def test_most_requests_go_to_the_fastest_server():
+    with Http1StubServer(latency=0.002, body_size=8) as fast, Http1StubServer(
+        latency=0.03, body_size=8
+    ) as slow:
+        client = FailoverClient([slow.base_url, fast.base_url])
+        statuses = [
+            client.post("/generations", {"prompt": "a cat"})[0] for _ in range(60)
+        ]
+
+        assert statuses == [200] * 60
+        assert slow.requests >= 1
+        assert fast.requests > 3 * slow.requests
+
+
+def test_slower_endpoints_keep_being_sampled():
+    selector = EndpointSelector(["a", "b"], seed=1)
+    selector.record_success("a", 0.1)
+    selector.record_success("b", 0.2)
+
+    picks = Counter(selector.ranked()[0] for _ in range(2000))
+
+    # Weights 1/0.1**2 and 1/0.2**2 share the traffic 4:1
+    assert 0.7 < picks["a"] / 2000 < 0.9
+
+
+def test_a_recovered_endpoint_regains_the_traffic():
+    # "a" measured slow once, then became the faster endpoint
+    selector = EndpointSelector(["a", "b"], seed=2)
+    selector.record_success("a", 1.0)
+    selector.record_success("b", 0.1)
+    latencies = {"a": 0.05, "b": 0.1}
+
+    picks = []
+    for _ in range(500):
+        url = selector.ranked()[0]
+        selector.record_success(url, latencies[url])
+        picks.append(url)
+
+    assert picks[-100:].count("a") > 60
+    assert selector.metrics()[0]["url"] == "a"
+
+
+def test_requests_fail_over_to_a_working_server():
+    dead = _closed_port_url()
+    with Http1StubServer(
+        latency=0, status=500, body_size=8
+    ) as failing, Http1StubServer(latency=0, body_size=8) as working:
+        client = FailoverClient([dead, failing.base_url, working.base_url])
+        statuses = [
+            client.post("/generations", {"prompt": "a cat"})[0] for _ in range(5)
+        ]
+        metrics = {entry["url"]: entry for entry in client.metrics()}
+
+    assert statuses == [200] * 5
+    assert working.requests == 5
+    assert failing.requests == 1
+    assert not metrics[dead]["healthy"]
+    assert not metrics[failing.base_url]["healthy"]
+    assert metrics[working.base_url]["healthy"]
+
+
+def test_health_checks_find_unreachable_servers():
+    dead = _closed_port_url()
+    with Http1StubServer(latency=0, body_size=8) as server:
+        assert tcp_health_check(server.base_url)
+        assert not tcp_health_check(dead, timeout=0.5)
+
+        client = FailoverClient([dead, server.base_url], health_check_interval=0.05)
+        try:
+            assert client.post("/generations", {"prompt": "a cat"})[0] == 200
+        finally:
+            client.close()
+        metrics = {entry["url"]: entry for entry in client.metrics()}
+
+    assert not metrics[dead]["healthy"]
+    assert server.requests == 1
+
+
+def test_passed_health_checks_only_end_their_own_cooldown():
+    selector = EndpointSelector(["a", "b"])
+    selector.record_failure("a")
+    selector.record_health("a", True)
+    selector.record_health("b", False)
+    assert [entry["healthy"] for entry in selector.metrics()] == [False, False]
+
+    selector.record_health("b", True)
+    selector.record_health("a", False)
+    selector.record_health("a", True)
+    assert {entry["url"]: entry["healthy"] for entry in selector.metrics()} == {
+        "a": False,
+        "b": True,
+    }
+
+    selector.record_success("a", 0.1)
+    assert all(entry["healthy"] for entry in selector.metrics())
+
+
+def test_reachable_servers_answering_server_errors_stay_out_of_rotation():
+    with Http1StubServer(
+        latency=0, status=503, body_size=8
+    ) as failing, Http1StubServer(latency=0, body_size=8) as working:
+        client = FailoverClient(
+            [failing.base_url, working.base_url], health_check_interval=0.02
+        )
+        try:
+            statuses = []
+            for _ in range(5):
+                statuses.append(client.post("/generations", {"prompt": "a cat"})[0])
+                time.sleep(0.05)
+        finally:
+            client.close()
+
+    assert statuses == [200] * 5
+    assert failing.requests == 1
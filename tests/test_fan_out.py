@@ -0,0 +1,48 @@
+import pytest
+
+from imagine import client as client_module
+from imagine.client import Imagine
+from imagine.models.status import Status
+from imagine.remote._imagine import http_client
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.utils.parameter.multipart import multipart_body_builder
+from tests.support.stubs import Http1StubServer
+
+pytest.importorskip("requests")
+
+_PHOTO = b"\x89PNG" + bytes(range(256)) * 512
+
+
+def test_fan_out_reads_the_image_once_and_streams_the_shared_buffer(
+    tmp_path, monkeypatch
+):
+    path = tmp_path / "photo.png"
+    path.write_bytes(_PHOTO)
+    reads, images = [], []
+    read = client_module.read_image_file_as_bytes
+    monkeypatch.setattr(
+        client_module,
+        "read_image_file_as_bytes",
+        lambda image_path: reads.append(read(image_path)) or reads[-1],
+    )
+
+    def build(multipart, **kwargs):
+        parts, content_type = multipart_body_builder(multipart, **kwargs)
+        images.extend(part for part in parts if part is reads[0])
+        return parts, content_type
+
+    monkeypatch.setattr(http_client, "multipart_body_builder", build)
+    prompts = [f"prompt {index}" for index in range(4)]
+
+    with Http1StubServer(latency=0, echo=True) as server:
+        imagine = Imagine("token", client=RequestClient(base_url=server.base_url))
+        responses = imagine.image_remix_many(
+            str(path), [{"prompt": prompt} for prompt in prompts]
+        )
+
+    assert len(reads) == 1
+    assert len(images) == len(prompts)
+    for prompt, response in zip(prompts, responses):
+        assert response.status == Status.OK
+        body = response.data.bytes
+        assert _PHOTO in body and prompt.encode() in body
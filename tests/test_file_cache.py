@@ -0,0 +1,43 @@
+import pytest
+
+from imagine.utils.file import cache as cache_module
+from imagine.utils.file.cache import ImageFileCache
+
+
+def _loading(cache):
+    return cache._ImageFileCache__loading
+
+
+def test_unchanged_files_are_read_once(tmp_path, monkeypatch):
+    path = tmp_path / "photo.png"
+    path.write_bytes(b"\x89PNG photo")
+    reads = []
+    read = cache_module.read_image_file_as_bytes
+    monkeypatch.setattr(
+        cache_module,
+        "read_image_file_as_bytes",
+        lambda image_path: reads.append(image_path) or read(image_path),
+    )
+    cache = ImageFileCache()
+
+    assert cache.read(str(path)) == b"\x89PNG photo"
+    assert cache.read(str(path)) == b"\x89PNG photo"
+    assert len(reads) == 1
+    assert _loading(cache) == {}
+
+
+def test_failed_reads_do_not_leak_loading_entries(tmp_path, monkeypatch):
+    path = tmp_path / "photo.png"
+    path.write_bytes(b"\x89PNG photo")
+
+    def fail(image_path):
+        raise OSError("disk error")
+
+    monkeypatch.setattr(cache_module, "read_image_file_as_bytes", fail)
+    cache = ImageFileCache()
+
+    for _ in range(3):
+        with pytest.raises(OSError):
+            cache.read(str(path))
+    assert _loading(cache) == {}
+    assert len(cache) == 0
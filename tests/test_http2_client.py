@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from imagine.remote.http2.http_client import Http2Client
+from tests.support.stubs import Http2StubServer
+
+pytest.importorskip("h2")
+pytest.importorskip("httpx")
+
+
+def test_concurrent_requests_share_one_connection():
+    with Http2StubServer(latency=0.02, echo=True) as server:
+        client = Http2Client(base_url=server.base_url, prior_knowledge=True)
+
+        def send(index):
+            return client.post(
+                "/generations", {"prompt": f"prompt-{index}"}, {"image": b"x" * 1024}
+            )
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(send, range(64)))
+        client.close()
+
+        for index, (status, content) in enumerate(results):
+            assert status == 200
+            assert content.startswith(b"/generations\n")
+            assert f"prompt-{index}".encode() in content
+        assert server.connections == 1
+        assert server.requests == 64
+
+
+def test_streams_are_opened_in_turn_but_wait_for_responses_together():
+    with Http2StubServer(latency=0.5, body_size=16) as server:
+        client = Http2Client(base_url=server.base_url, prior_knowledge=True)
+        client.post("/generations", {"prompt": "warm up"})
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(
+                executor.map(
+                    lambda index: client.post("/generations", {"prompt": str(index)})[
+                        0
+                    ],
+                    range(8),
+                )
+            )
+        elapsed = time.perf_counter() - began
+        client.close()
+
+    assert statuses == [200] * 8
+    assert elapsed < 1.5
+
+
+def test_status_of_the_response_is_returned():
+    with Http2StubServer(latency=0, status=503, body_size=4) as server:
+        client = Http2Client(base_url=server.base_url, prior_knowledge=True)
+        status, content = client.post("/generations", {"prompt": "a cat"})
+        client.close()
+
+    assert (status, content) == (503, b"\x00" * 4)
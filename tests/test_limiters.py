@@ -0,0 +1,190 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from imagine.remote.limiter.local import LocalLimiter
+from imagine.remote.limiter.shared import SharedLimiter
+from imagine.utils.cancellation.token import CancellationToken, CancelledError
+
+try:
+    _fork = multiprocessing.get_context("fork")
+except ValueError:  # pragma: no cover - Windows
+    _fork = None
+
+needs_fork = pytest.mark.skipif(_fork is None, reason="fork is not available")
+
+
+def _cancelled_after(seconds):
+    token = CancellationToken()
+    threading.Timer(seconds, token.cancel).start()
+    return token
+
+
+def _write_state(path, **state):
+    with open(path, "w") as file:
+        json.dump({"tokens": 1.0, "stamp": time.time(), **state}, file)
+
+
+def _dead_pid():
+    process = _fork.Process(target=lambda: None)
+    process.start()
+    process.join()
+    return process.pid
+
+
+def _hold(limiter, active, peak, lock, rounds):
+    for _ in range(rounds):
+        limiter.acquire()
+        with lock:
+            active.value += 1
+            peak.value = max(peak.value, active.value)
+        time.sleep(0.01)
+        with lock:
+            active.value -= 1
+        limiter.release()
+
+
+@needs_fork
+def test_shared_concurrency_is_bounded_across_forked_processes(tmp_path):
+    limiter = SharedLimiter(str(tmp_path / "state"), max_concurrency=2)
+    # The parent's open state file must not be shared with the children
+    limiter.acquire()
+    limiter.release()
+    active, peak, lock = _fork.Value("i", 0), _fork.Value("i", 0), _fork.Lock()
+
+    processes = [
+        _fork.Process(target=_hold, args=(limiter, active, peak, lock, 5))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert 1 <= peak.value <= 2
+
+
+def test_shared_limiter_keeps_to_its_fair_share_while_others_wait(tmp_path):
+    path = str(tmp_path / "state")
+    limiter = SharedLimiter(path, max_concurrency=4)
+    _write_state(path, holders={}, waiters={str(os.getppid()): time.time()})
+
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(CancelledError):
+        limiter.acquire(_cancelled_after(0.1))
+
+    with open(path) as file:
+        state = json.load(file)
+    _write_state(path, holders=state["holders"], waiters={})
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(CancelledError):
+        limiter.acquire(_cancelled_after(0.1))
+
+
+@needs_fork
+def test_shared_limiter_reclaims_the_slots_of_dead_processes(tmp_path):
+    path = str(tmp_path / "state")
+    _write_state(path, holders={str(_dead_pid()): 2}, waiters={})
+    limiter = SharedLimiter(path, max_concurrency=2)
+
+    limiter.acquire(_cancelled_after(1))
+    limiter.acquire(_cancelled_after(1))
+
+    with open(path) as file:
+        assert json.load(file)["holders"] == {str(os.getpid()): 2}
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda path: SharedLimiter(path, rate=20, burst=1),
+        lambda path: LocalLimiter(rate=20, burst=1),
+    ],
+)
+def test_token_bucket_rate(tmp_path, build):
+    limiter = build(str(tmp_path / "state"))
+
+    began = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release()
+    elapsed = time.monotonic() - began
+
+    # The burst is spent at once, every other request waits 1/20 s
+    assert 0.18 <= elapsed < 1.0
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda path: SharedLimiter(path, max_concurrency=1),
+        lambda path: LocalLimiter(max_concurrency=1),
+    ],
+)
+def test_cancellation_interrupts_a_waiting_acquire(tmp_path, build):
+    limiter = build(str(tmp_path / "state"))
+    limiter.acquire()
+
+    began = time.monotonic()
+    with pytest.raises(CancelledError):
+        limiter.acquire(_cancelled_after(0.1))
+    assert time.monotonic() - began < 0.5
+
+    limiter.release()
+    limiter.acquire(_cancelled_after(1))
+
+
+def test_a_cancelled_local_waiter_leaves_the_slot_to_the_next():
+    limiter = LocalLimiter(max_concurrency=1)
+    limiter.acquire()
+    token, errors, acquired = CancellationToken(), [], threading.Event()
+
+    def wait_cancelled():
+        try:
+            limiter.acquire(token)
+        except CancelledError as error:
+            errors.append(error)
+
+    def wait():
+        limiter.acquire()
+        acquired.set()
+
+    threads = [threading.Thread(target=wait_cancelled), threading.Thread(target=wait)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    token.cancel()
+    threads[0].join(1)
+    limiter.release()
+
+    assert len(errors) == 1
+    assert acquired.wait(1)
+    threads[1].join(1)
+    assert limiter.metrics()["in_flight"] == 1
+
+
+@needs_fork
+def test_local_limiter_starts_afresh_in_a_forked_child():
+    limiter = LocalLimiter(max_concurrency=1)
+    limiter.acquire()
+    results = _fork.Queue()
+
+    def child():
+        in_flight = limiter.metrics()["in_flight"]
+        limiter.acquire(_cancelled_after(1))
+        results.put(in_flight)
+
+    process = _fork.Process(target=child)
+    process.start()
+    process.join(10)
+
+    assert process.exitcode == 0
+    assert results.get(timeout=1) == 0
+    assert limiter.metrics()["in_flight"] == 1
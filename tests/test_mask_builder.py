@@ -0,0 +1,106 @@
+import threading
+from io import BytesIO
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.features.in_painting.mask import MaskBuilder
+from imagine.remote.http_client import HttpClient
+
+np = pytest.importorskip("numpy")
+
+
+class _RecordingClient(HttpClient):
+    def __init__(self):
+        self.masks = []
+        self.__lock = threading.Lock()
+
+    def post(self, endpoint, parameters, files=None, headers=None):
+        with self.__lock:
+            self.masks.append(files["mask"])
+        return 200, b"image"
+
+
+def _covered(masks):
+    return [int(count) for count in (np.asarray(masks) == 255).sum(axis=(1, 2))]
+
+
+def test_boxes_and_polygons_cover_their_pixels():
+    builder = MaskBuilder(32, 24)
+    boxes = builder.boxes([(5, 5, 15, 15), (0, 0, 2.4, 1)])
+    polygons = builder.polygons(
+        [[(5, 5), (15, 5), (15, 15), (5, 15)], [(0, 0), (20, 0), (0, 20)]]
+    )
+
+    assert boxes.shape == polygons.shape == (2, 24, 32)
+    assert boxes.dtype == np.uint8
+    # Pixels count when their centre is covered
+    assert _covered(boxes) == [100, 2]
+    assert _covered(polygons) == [100, 190]
+    assert set(np.unique(polygons)) == {0, 255}
+    assert (boxes[0] == polygons[0]).all()
+
+
+def test_polygons_follow_the_even_odd_rule():
+    builder = MaskBuilder(24, 24)
+    outer = [(0, 0), (20, 0), (20, 20), (0, 20), (0, 0)]
+    hole = [(5, 5), (5, 15), (15, 15), (15, 5), (5, 5)]
+
+    (mask,) = builder.polygons([outer + hole])
+
+    assert _covered([mask]) == [300]
+    assert mask[10, 10] == 0 and mask[2, 2] == 255
+
+
+def test_feathered_edges_fade_out_linearly():
+    builder = MaskBuilder(32, 32)
+    (box,) = builder.boxes([(10, 10, 20, 20)], feather=4)
+    (polygon,) = builder.polygons([[(10, 10), (20, 10), (20, 20), (10, 20)]], feather=4)
+    (ellipse,) = builder.ellipses([(16, 16, 6, 6)], feather=4)
+
+    # Pixel centres 0.5, 1.5, 2.5, 3.5 and 4.5 pixels outside the edge
+    assert list(box[15, 20:25]) == [223, 159, 96, 32, 0]
+    assert list(polygon[15, 20:25]) == [223, 159, 96, 32, 0]
+    assert (box[10:20, 10:20] == 255).all()
+    assert ellipse[16, 16] == 255
+    # Exact for circles, up to the rounding of float32 distances
+    ramp = ellipse[16, 22:27].astype(int) - [223, 159, 96, 32, 0]
+    assert np.abs(ramp).max() <= 1
+
+
+def test_union_covers_every_region():
+    builder = MaskBuilder(32, 32)
+    masks = builder.boxes([(0, 0, 10, 10), (20, 20, 30, 30), (5, 5, 15, 15)])
+
+    union = builder.union(masks)
+
+    assert union.shape == (1, 32, 32)
+    assert _covered(union) == [100 + 100 + 100 - 25]
+
+
+def test_encoded_masks_decode_to_the_same_pixels():
+    pil_image = pytest.importorskip("PIL.Image")
+    builder = MaskBuilder(32, 24)
+    masks = builder.boxes([(5, 5, 15, 15), (10, 0, 32, 24)], feather=2)
+
+    encoded = builder.encode(masks)
+    single = builder.encode(masks[0])
+
+    assert len(encoded) == 2 and single == encoded[:1]
+    for data, mask in zip(encoded, masks):
+        assert data.startswith(b"\x89PNG")
+        assert (np.array(pil_image.open(BytesIO(data))) == mask).all()
+
+
+def test_in_painting_many_sends_the_encoded_masks():
+    pytest.importorskip("PIL.Image")
+    builder = MaskBuilder(32, 24)
+    encoded = builder.encode(builder.boxes([(0, 0, 8, 8), (8, 8, 16, 16)]))
+    client = _RecordingClient()
+
+    responses = Imagine("token", client=client).in_painting_many(
+        b"\x89PNG source", encoded, "an empty street"
+    )
+
+    assert len(responses) == 2
+    assert sorted(client.masks) == sorted(encoded)
@@ -0,0 +1,63 @@
+import os
+
+from imagine.models.image import Image
+from imagine.storage.packed import PackedImageStore
+
+
+def _cut_last_line(directory):
+    path = os.path.join(directory, "index.jsonl")
+    with open(path, "rb") as file:
+        content = file.read()
+    with open(path, "wb") as file:
+        file.write(content[: content.rindex(b"\n", 0, len(content) - 1) + 5])
+
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".bin"))
+
+
+def test_torn_index_line_does_not_swallow_the_next_record(tmp_path):
+    with PackedImageStore(str(tmp_path)) as store:
+        store.put("a", b"first")
+        store.put("b", b"second")
+    _cut_last_line(str(tmp_path))
+
+    with PackedImageStore(str(tmp_path)) as store:
+        assert store.keys() == ["a"]
+        store.put("c", b"third")
+
+    with PackedImageStore(str(tmp_path)) as store:
+        assert sorted(store.keys()) == ["a", "c"]
+        assert store.get("c").bytes == b"third"
+
+
+def test_get_returns_bytes_and_a_view_without_copy(tmp_path):
+    with PackedImageStore(str(tmp_path)) as store:
+        store.put("a", Image(b"\x89PNG data"), prompt="a cat")
+        image = store.get("a")
+
+        assert type(image.bytes) is bytes
+        assert image.bytes == b"\x89PNG data"
+        assert isinstance(image.view, memoryview)
+        assert image.view.tobytes() == b"\x89PNG data"
+        assert store.metadata("a") == {"prompt": "a cat"}
+        del image
+
+
+def test_compact_reclaims_space_and_keeps_images_handed_out(tmp_path):
+    with PackedImageStore(str(tmp_path)) as store:
+        store.put("a", b"a" * 100)
+        store.put("b", b"b" * 100)
+        store.put("a", b"A" * 100)
+        store.delete("b")
+        kept = store.get("a")
+        assert _segments(str(tmp_path)) == ["segment-000000.bin"]
+
+        assert store.compact() == 200
+        assert _segments(str(tmp_path)) == ["segment-000001.bin"]
+        assert kept.bytes == b"A" * 100
+        assert store.get("a").bytes == b"A" * 100
+
+    with PackedImageStore(str(tmp_path)) as store:
+        assert store.keys() == ["a"]
+        assert store.get("a").bytes == b"A" * 100
@@ -0,0 +1,164 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.remote.http_client import HttpClient
+from imagine.specs import GenerationsSpec, PromptTemplate
+
+_TABLES = {
+    "product": ["mug", "lamp", "chair", "mug"],
+    "background": ["marble", "oak"],
+    "lighting": ["soft light", "neon", "daylight"],
+}
+
+
+class _DelayedClient(HttpClient):
+    """
+    Answer every prompt after its delay, and hold the prompts listed in
+    ``held`` until ``gate`` is set.
+    """
+
+    def __init__(self, delays=None, held=()):
+        self.delays = delays or {}
+        self.held = set(held)
+        self.gate = threading.Event()
+        self.prompts = []
+        self.__lock = threading.Lock()
+
+    def post(self, endpoint, parameters, files=None, headers=None):
+        prompt = parameters["prompt"]
+        with self.__lock:
+            self.prompts.append(prompt)
+        if prompt in self.held:
+            self.gate.wait(5)
+        time.sleep(self.delays.get(prompt, 0))
+        return 200, prompt.encode()
+
+
+def _numbered(count, consumed):
+    for number in range(count):
+        consumed.append(number)
+        yield GenerationsSpec(str(number))
+
+
+def test_prompts_follow_the_cartesian_product():
+    template = PromptTemplate("{product} on {background}, {lighting} ({product!r:>8})")
+
+    prompts = list(template.expand(_TABLES))
+
+    expected = [
+        f"{product} on {background}, {lighting} ({product!r:>8})"
+        for product, background, lighting in itertools.product(
+            ["mug", "lamp", "chair"], _TABLES["background"], _TABLES["lighting"]
+        )
+    ]
+    assert prompts == expected
+    assert template.count(_TABLES) == len(prompts) == 18
+    assert template.fields == ("product", "background", "lighting")
+
+
+def test_shards_partition_the_sampled_combinations():
+    template = PromptTemplate("{a}-{b}")
+    tables = {"a": range(100), "b": range(50)}
+
+    sampled = list(template.expand(tables, sample=0.2, seed=7))
+    shards = [
+        list(template.expand(tables, sample=0.2, seed=7, shard=(index, 3)))
+        for index in range(3)
+    ]
+
+    assert 800 < len(sampled) < 1200
+    assert shards == [sampled[index::3] for index in range(3)]
+    assert sorted(itertools.chain(*shards)) == sorted(sampled)
+
+
+def test_sampling_is_stable_for_a_seed():
+    template = PromptTemplate("{a}-{b}")
+    tables = {"a": range(100), "b": range(50)}
+
+    first = list(template.expand(tables, sample=0.1, seed=3))
+
+    assert list(template.expand(tables, sample=0.1, seed=3)) == first
+    assert list(template.expand(tables, sample=0.1, seed=4)) != first
+    assert list(template.expand(tables, sample=1.0)) == list(template.expand(tables))
+
+
+def test_unique_suppresses_equal_prompts_from_different_values():
+    template = PromptTemplate("{a}{b}")
+    tables = {"a": ["x", "xy"], "b": ["yz", "z"]}
+
+    assert list(template.expand(tables)) == ["xyz", "xz", "xyyz", "xyz"]
+    assert list(template.expand(tables, unique=True)) == ["xyz", "xz", "xyyz"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"sample": 0}, {"sample": 1.5}, {"shard": (3, 3)}, {"shard": (-1, 2)}],
+)
+def test_invalid_expansions_are_rejected(options):
+    with pytest.raises(ValueError):
+        PromptTemplate("{a}").expand({"a": [1]}, **options)
+
+
+def test_invalid_templates_and_variables_are_rejected():
+    with pytest.raises(ValueError):
+        PromptTemplate("{0} on {background}")
+    with pytest.raises(ValueError):
+        PromptTemplate("{product.name}")
+    with pytest.raises(ValueError, match="missing"):
+        PromptTemplate("{a}{b}").expand({"a": [1], "c": [2]})
+
+
+def test_submit_iter_takes_specs_within_the_window():
+    client = _DelayedClient()
+    consumed = []
+
+    results = Imagine("token", client=client).submit_iter(
+        _numbered(20, consumed), max_workers=2, window=5
+    )
+    next(results)
+    assert len(consumed) == 5
+
+    remaining = list(results)
+    assert len(consumed) == 20 and len(remaining) == 19
+
+
+def test_submit_iter_yields_in_order_or_as_completed():
+    delays = {"0": 0.3, "1": 0.1}
+    imagine = Imagine("token", client=_DelayedClient(delays))
+    specs = [GenerationsSpec(str(number)) for number in range(6)]
+
+    ordered = [spec.prompt for spec, _ in imagine.submit_iter(specs, max_workers=6)]
+    completed = [
+        (spec.prompt, response.data.bytes.decode())
+        for spec, response in imagine.submit_iter(specs, max_workers=6, ordered=False)
+    ]
+
+    assert ordered == [str(number) for number in range(6)]
+    assert [prompt for prompt, _ in completed[-2:]] == ["1", "0"]
+    assert all(prompt == body for prompt, body in completed)
+
+
+def test_closing_submit_iter_withdraws_the_pending_requests():
+    client = _DelayedClient(held={"1", "2"})
+    consumed = []
+    results = Imagine("token", client=client).submit_iter(
+        _numbered(100, consumed), max_workers=2, window=6
+    )
+
+    spec, _ = next(results)
+    deadline = time.monotonic() + 5
+    while len(client.prompts) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    closing = threading.Thread(target=results.close)
+    closing.start()
+    time.sleep(0.1)
+    client.gate.set()
+    closing.join(5)
+
+    assert spec.prompt == "0"
+    assert len(consumed) == 6
+    assert sorted(client.prompts) == ["0", "1", "2"]
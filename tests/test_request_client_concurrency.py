@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from benchmarks.stress import run_stress
+from imagine.remote._imagine.http_client import RequestClient
+from tests.support.stubs import Http1StubServer
+
+requests = pytest.importorskip("requests")
+
+
+def _session(client):
+    return client._RequestClient__get_session(requests)
+
+
+def test_sequential_requests_reuse_one_connection():
+    with Http1StubServer(latency=0, body_size=16) as server:
+        client = RequestClient(base_url=server.base_url)
+        statuses = [
+            client.post("/generations", {"prompt": "a cat"})[0] for _ in range(20)
+        ]
+
+        assert statuses == [200] * 20
+        assert server.connections == 1
+
+
+def test_threads_share_one_pool_but_not_sessions():
+    threads, iterations = 16, 10
+    with Http1StubServer(latency=0.005, body_size=16) as server:
+        client = RequestClient(base_url=server.base_url, pool_size=threads)
+        sessions, statuses = {}, []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def work(index):
+            barrier.wait()
+            for _ in range(iterations):
+                status, _ = client.post("/generations", {"prompt": f"cat {index}"})
+                with lock:
+                    statuses.append(status)
+            sessions[index] = _session(client)
+
+        workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert statuses == [200] * (threads * iterations)
+        assert len({id(session) for session in sessions.values()}) == threads
+        adapters = {
+            id(session.get_adapter(server.base_url)) for session in sessions.values()
+        }
+        assert len(adapters) == 1
+        assert server.connections <= threads
+
+
+def test_responses_never_cross_threads():
+    report = run_stress(threads=16, iterations=10, latency=0.001, files=4)
+
+    assert report.failures == []
+    assert report.requests == 160
+    assert report.connections <= 16
+
+
+def test_responses_never_cross_streams_over_http2():
+    pytest.importorskip("h2")
+    pytest.importorskip("httpx")
+    report = run_stress(threads=16, iterations=10, http2=True, latency=0.001)
+
+    assert report.failures == []
+    assert report.connections == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_forked_child_builds_its_own_pool():
+    with Http1StubServer(latency=0, body_size=16) as server:
+        client = RequestClient(base_url=server.base_url)
+        assert client.post("/generations", {"prompt": "a cat"})[0] == 200
+        parent_session = _session(client)
+        parent_adapter = parent_session.get_adapter(server.base_url)
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+
+        def child():
+            session = _session(client)
+            status, _ = client.post("/generations", {"prompt": "a dog"})
+            results.put(
+                (
+                    session is not parent_session,
+                    session.get_adapter(server.base_url) is not parent_adapter,
+                    status,
+                )
+            )
+
+        process = context.Process(target=child)
+        process.start()
+        result = results.get(timeout=30)
+        process.join(30)
+
+        assert result == (True, True, 200)
+        assert process.exitcode == 0
+        # The parent keeps its own connection, the child opened another one
+        assert client.post("/generations", {"prompt": "a cat"})[0] == 200
+        assert _session(client) is parent_session
+        assert server.connections == 2
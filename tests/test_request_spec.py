@@ -0,0 +1,54 @@
+import json
+import pickle
+
+import pytest
+
+from imagine.specs.request import (
+    GenerationsSpec,
+    RequestSpec,
+    SuperResolutionSpec,
+    VariationsSpec,
+)
+
+
+def test_numeric_arguments_are_normalised_before_hashing():
+    left = GenerationsSpec("a cat", cfg=7, steps=40.0, high_res_results=0)
+    right = GenerationsSpec("a cat", cfg=7.0, steps=40, high_res_results=False)
+
+    assert left == right
+    assert left.digest == right.digest
+    assert left.to_json() == right.to_json()
+    assert type(left.cfg) is float and type(left.steps) is int
+
+
+def test_inexact_values_are_kept_for_validation():
+    assert GenerationsSpec("a cat", seed=1.5).seed == 1.5
+
+
+def test_numpy_scalars_are_normalised():
+    np = pytest.importorskip("numpy")
+    spec = GenerationsSpec("a cat", cfg=np.float32(7.5), seed=np.int64(3))
+
+    assert spec == GenerationsSpec("a cat", cfg=7.5, seed=3)
+    assert json.loads(spec.to_json())["seed"] == 3
+
+
+def test_bytes_images_are_hashed_and_serialised():
+    image = b"\x89PNG image"
+    spec = VariationsSpec(image, "a cat")
+
+    assert spec.digest == VariationsSpec(bytearray(image), "a cat").digest
+    assert spec.digest != VariationsSpec(b"\x89PNG other", "a cat").digest
+
+    restored = RequestSpec.from_json(spec.to_json())
+    assert restored.image_path == image
+    assert restored == spec
+    assert pickle.loads(pickle.dumps(spec)).image_path == image
+
+
+def test_super_resolution_spec_carries_max_workers():
+    spec = SuperResolutionSpec("photo.png", tile_size=512, max_workers=8)
+
+    assert spec.arguments()["max_workers"] == 8
+    assert RequestSpec.from_json(spec.to_json()) == spec
+    assert spec != SuperResolutionSpec("photo.png", tile_size=512)
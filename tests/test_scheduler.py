@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from imagine.remote.scheduler.scheduler import Lane, PriorityScheduler
+from imagine.utils.cancellation.token import CancellationToken, CancelledError
+
+
+def _cancelled_after(seconds):
+    token = CancellationToken()
+    threading.Timer(seconds, token.cancel).start()
+    return token
+
+
+def _wait_for(scheduler, lane, waiting):
+    deadline = time.monotonic() + 5
+    while scheduler.metrics()["lanes"][lane]["waiting"] != waiting:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _queue(scheduler, lane, grants, cancellation=None):
+    def wait():
+        try:
+            scheduler.acquire(lane, cancellation)
+        except CancelledError:
+            grants.put("cancelled")
+        else:
+            grants.put(lane)
+
+    thread = threading.Thread(target=wait, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_a_backlog_is_admitted_in_proportion_to_the_weights():
+    scheduler = PriorityScheduler(1, {"high": Lane(weight=3), "low": Lane(weight=1)})
+    scheduler.acquire("high")
+    grants = queue.Queue()
+    for lane in ("high", "low"):
+        for count in range(1, 9):
+            _queue(scheduler, lane, grants)
+            _wait_for(scheduler, lane, count)
+
+    order, holder = [], "high"
+    for _ in range(16):
+        scheduler.release(holder)
+        holder = grants.get(timeout=1)
+        order.append(holder)
+
+    # Three high calls are admitted for every low one until high runs dry
+    assert order[:8] == ["high", "low", "high", "high", "high", "low", "high", "high"]
+    assert order.count("high") == order.count("low") == 8
+
+
+def test_reserved_slots_are_never_used_by_other_lanes():
+    scheduler = PriorityScheduler(
+        3, {"bulk": Lane(), "interactive": Lane(reserved=1)}, default_lane="bulk"
+    )
+    scheduler.acquire()
+    scheduler.acquire()
+
+    with pytest.raises(CancelledError):
+        scheduler.acquire("bulk", _cancelled_after(0.1))
+    scheduler.acquire("interactive", _cancelled_after(1))
+
+    assert scheduler.metrics()["lanes"] == {
+        "bulk": {"in_flight": 2, "waiting": 0},
+        "interactive": {"in_flight": 1, "waiting": 0},
+    }
+
+
+def test_a_cancelled_waiter_leaves_the_queue_and_the_next_is_admitted():
+    scheduler = PriorityScheduler(1, {"default": Lane()})
+    scheduler.acquire()
+    grants, token = queue.Queue(), CancellationToken()
+    cancelled = _queue(scheduler, "default", grants, token)
+    _wait_for(scheduler, "default", 1)
+    _queue(scheduler, "default", grants)
+    _wait_for(scheduler, "default", 2)
+
+    token.cancel()
+    assert grants.get(timeout=1) == "cancelled"
+    cancelled.join(1)
+    assert scheduler.metrics()["lanes"]["default"]["waiting"] == 1
+
+    scheduler.release()
+    assert grants.get(timeout=1) == "default"
+    assert scheduler.metrics()["lanes"]["default"] == {"in_flight": 1, "waiting": 0}
+
+
+def test_unknown_lanes_are_rejected():
+    scheduler = PriorityScheduler(2, {"default": Lane()})
+
+    with pytest.raises(ValueError, match="Unknown priority lane 'bulk'"):
+        scheduler.acquire("bulk")
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, {"default": Lane()}, default_lane="bulk")
+    with pytest.raises(ValueError):
+        PriorityScheduler(2, {"a": Lane(reserved=2), "b": Lane(reserved=1)})
+    with pytest.raises(ValueError):
+        Lane(weight=0)
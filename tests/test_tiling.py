@@ -0,0 +1,90 @@
+import io
+
+import pytest
+
+from imagine.features.super_resolution.handler import SuperResolutionHandler
+from imagine.features.super_resolution.tiling import stitch, tile_grid
+from imagine.remote.http_client import HttpClient
+
+np = pytest.importorskip("numpy")
+PIL = pytest.importorskip("PIL.Image")
+
+
+class _DoublingClient(HttpClient):
+    """
+    Upscales every image twice with Pillow, returning an opaque PNG like the
+    API does.
+    """
+
+    def __init__(self):
+        self.tiles = []
+
+    def post(self, endpoint, parameters, files=None, headers=None):
+        tile = PIL.open(io.BytesIO(files["image"]))
+        self.tiles.append(tile.mode)
+        buffer = io.BytesIO()
+        tile.convert("RGB").resize((tile.width * 2, tile.height * 2)).save(
+            buffer, format="PNG"
+        )
+        return 200, buffer.getvalue()
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_tiles_cover_the_image_with_the_overlap():
+    boxes = tile_grid(100, 60, 32, 8)
+
+    covered = np.zeros((60, 100), dtype=bool)
+    for left, top, right, bottom in boxes:
+        assert right - left == 32 and bottom - top == 32
+        covered[top:bottom, left:right] = True
+    assert covered.all()
+    assert tile_grid(20, 20, 32, 8) == [(0, 0, 20, 20)]
+    with pytest.raises(ValueError):
+        tile_grid(100, 100, 32, 32)
+
+
+def test_stitching_equal_tiles_leaves_no_seams():
+    boxes = tile_grid(100, 60, 32, 8)
+    tiles = [np.full((32, 32, 3), 77, dtype=np.uint8) for _ in boxes]
+
+    stitched = stitch(np, tiles, boxes, (100, 60), 8)
+
+    assert stitched.shape == (60, 100, 3)
+    assert (stitched == 77).all()
+
+
+def test_tiled_upscaling_matches_the_scale_of_the_api():
+    client = _DoublingClient()
+    source = PIL.new("RGB", (100, 60), (10, 120, 240))
+
+    response = SuperResolutionHandler(client)(
+        _encode(source), "model", tile_size=32, tile_overlap=8
+    )
+    result = response.get_or_throw().to_pil_image()
+
+    assert len(client.tiles) == len(tile_grid(100, 60, 32, 8))
+    assert result.size == (200, 120)
+    assert result.mode == "RGB"
+    assert np.abs(np.asarray(result).astype(int) - (10, 120, 240)).max() <= 1
+
+
+def test_tiled_upscaling_keeps_the_alpha_channel():
+    client = _DoublingClient()
+    source = PIL.new("RGBA", (100, 60), (10, 120, 240, 255))
+    source.paste((0, 0, 0, 0), (0, 0, 50, 60))
+
+    response = SuperResolutionHandler(client)(
+        _encode(source), "model", tile_size=32, tile_overlap=8
+    )
+    result = response.get_or_throw().to_pil_image()
+    alpha = np.asarray(result.getchannel("A"))
+
+    assert set(client.tiles) == {"RGB"}
+    assert result.mode == "RGBA" and result.size == (200, 120)
+    assert (alpha[:, :90] == 0).all()
+    assert (alpha[:, 110:] == 255).all()
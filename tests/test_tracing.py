@@ -0,0 +1,89 @@
+import importlib.util
+import threading
+
+import pytest
+
+from imagine.client import Imagine
+from imagine.remote._imagine.http_client import RequestClient
+from imagine.utils.tracing import span as span_module
+from imagine.utils.tracing.span import bind, set_tracer, span, tracing_enabled
+from tests.support.stubs import Http1StubServer
+
+
+@pytest.fixture(autouse=True)
+def _restore_tracing():
+    state = span_module._state
+    saved = (state.resolved, state.trace, state.context, state.tracer)
+    yield
+    state.resolved, state.trace, state.context, state.tracer = saved
+
+
+@pytest.fixture
+def exporter():
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    set_tracer(provider.get_tracer("tests"))
+    return exporter
+
+
+def test_disabled_tracing_hands_out_the_noop_span():
+    def function():
+        return 42
+
+    set_tracer(None)
+
+    assert not tracing_enabled()
+    assert bind(function) is function
+    with span("imagine.send", {"imagine.endpoint": "/generations"}) as noop:
+        noop.set_attribute("imagine.status", 200)
+        noop.set_error("failed")
+    assert not noop.recording
+
+
+def test_a_tracer_without_opentelemetry_is_rejected(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    set_tracer(None)
+
+    with pytest.raises(ImportError, match="opentelemetry"):
+        set_tracer(object())
+    assert not tracing_enabled()
+
+
+def test_spans_nest_across_bound_threads_and_keep_their_attributes(exporter):
+    from opentelemetry.trace import StatusCode
+
+    def child():
+        with span("child") as inner:
+            inner.set_error("failed")
+
+    with span("parent", {"kept": 1, "dropped": None}) as outer:
+        outer.set_attributes({"added": "yes", "skipped": None})
+        thread = threading.Thread(target=bind(child))
+        thread.start()
+        thread.join()
+
+    spans = {finished.name: finished for finished in exporter.get_finished_spans()}
+    assert spans["child"].parent.span_id == spans["parent"].context.span_id
+    assert dict(spans["parent"].attributes) == {"kept": 1, "added": "yes"}
+    assert spans["child"].status.status_code == StatusCode.ERROR
+    assert spans["child"].status.description == "failed"
+
+
+def test_a_call_records_its_phases(exporter):
+    pytest.importorskip("requests")
+
+    with Http1StubServer(latency=0, body_size=16) as server:
+        imagine = Imagine("token", client=RequestClient(base_url=server.base_url))
+        imagine.generations("a cat")
+
+    spans = {finished.name: finished for finished in exporter.get_finished_spans()}
+    assert {"imagine.encode", "imagine.send", "imagine.download"} <= set(spans)
+    assert spans["imagine.send"].attributes["imagine.status"] == 200
+    assert spans["imagine.download"].attributes["imagine.response.size"] == 16
@@ -0,0 +1,73 @@
+import pytest
+
+from imagine.client import Imagine
+from imagine.features.image_remix.style_ids import ImageRemixStyle
+from imagine.remote.http_client import HttpClient
+from imagine.validation.catalog import (
+    ConstraintCatalog,
+    Constraints,
+    Range,
+    default_catalog,
+)
+from imagine.validation.error import ValidationError
+
+
+class _CountingClient(HttpClient):
+    def __init__(self):
+        self.posts = 0
+
+    def post(self, endpoint, parameters, files=None, headers=None):
+        self.posts += 1
+        return 200, b"image"
+
+
+@pytest.mark.parametrize("count", [1, 64])
+def test_numpy_scalars_are_checked_like_python_numbers(count):
+    np = pytest.importorskip("numpy")
+    catalog = default_catalog()
+    arguments = [
+        {"prompt": "a cat", "cfg": np.float64(7.5), "seed": np.int64(42)}
+    ] * count
+
+    assert catalog.check_arguments("generations", arguments) == []
+
+
+@pytest.mark.parametrize("count", [1, 64])
+def test_out_of_range_numpy_scalars_are_reported(count):
+    np = pytest.importorskip("numpy")
+    catalog = default_catalog()
+    arguments = [{"prompt": "a cat", "cfg": np.float64(20), "steps": np.int32(40)}]
+
+    violations = catalog.check_arguments("generations", arguments * count)
+
+    assert [violation.field for violation in violations] == ["cfg"] * count
+
+
+def test_booleans_are_not_numbers():
+    catalog = default_catalog()
+
+    violations = catalog.check_arguments(
+        "generations", [{"prompt": "a cat", "seed": True}]
+    )
+
+    assert [violation.field for violation in violations] == ["seed"]
+
+
+def test_batches_are_checked_against_the_default_style_before_sending():
+    catalog = ConstraintCatalog()
+    catalog.register(
+        "image_remix",
+        Constraints(ranges={"strength": Range(0, 50, integer=True)}),
+        style=ImageRemixStyle.IMAGINE_V1,
+    )
+    client = _CountingClient()
+    imagine = Imagine("token", client=client, catalog=catalog)
+
+    with pytest.raises(ValidationError) as error:
+        imagine.image_remix_many(
+            b"image",
+            [{"prompt": "a cat", "strength": 10}, {"prompt": "a dog", "strength": 90}],
+        )
+
+    assert client.posts == 0
+    assert [violation.index for violation in error.value.violations] == [1]